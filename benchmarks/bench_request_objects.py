@@ -0,0 +1,85 @@
+# benchmarks/bench_request_objects.py
+"""
+Memory cost of Request/Response objects, measured with tracemalloc
+
+Objects are kept alive so the snapshot diff shows what each one retains.
+Run from the repository root:
+
+    python benchmarks/bench_request_objects.py
+"""
+
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from web.request import Request
+from web.response import Response
+
+SCOPE = {
+    "type": "http",
+    "method": "GET",
+    "path": "/api/items",
+    "query_string": b"page=2&size=50",
+    "headers": [
+        (b"host", b"example.com"),
+        (b"accept", b"application/json"),
+        (b"user-agent", b"bench/1.0"),
+        (b"content-length", b"0"),
+    ],
+    "client": ("127.0.0.1", 50000),
+    "server": ("example.com", 80),
+    "scheme": "http",
+}
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+def measure(label, make, number=10000):
+    make()  # warm up caches and interned strings
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    kept = [make() for _ in range(number)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    stats = after.compare_to(before, "filename")
+    size = sum(stat.size_diff for stat in stats) - sys.getsizeof(kept)
+    count = sum(stat.count_diff for stat in stats) - 1
+    print(f"{label:<32} {size / number:8.1f} bytes  {count / number:6.2f} blocks")
+    return kept
+
+
+def request_with_access():
+    request = Request(SCOPE, receive)
+    request.method, request.path, request.url
+    request.headers.get("accept"), request.content_length
+    request.query_params.get("page")
+    return request
+
+
+async def send(message):
+    pass
+
+
+def sent(response):
+    """Run the response's ASGI send (it never suspends) and return it"""
+    try:
+        response(SCOPE, receive, send).send(None)
+    except StopIteration:
+        pass
+    return response
+
+
+def main():
+    measure("Request (bare)", lambda: Request(SCOPE, receive))
+    measure("Request (typical access)", request_with_access)
+    measure("Response.json (sent)", lambda: sent(Response.json({"ok": True})))
+    measure("Response text (sent)", lambda: sent(Response("hello")))
+
+
+if __name__ == "__main__":
+    main()
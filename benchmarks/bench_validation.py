@@ -0,0 +1,100 @@
+# benchmarks/bench_validation.py
+"""
+Compiled vs. naive request body validation
+
+Run from the repository root:
+
+    python benchmarks/bench_validation.py
+"""
+
+import os
+import sys
+import timeit
+import typing
+from dataclasses import dataclass, field, fields, is_dataclass, MISSING
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.validation import compile_model
+
+
+@dataclass
+class Address:
+    street: str
+    city: str
+    zip_code: str
+
+
+@dataclass
+class Order:
+    customer: str
+    quantity: int
+    price: float
+    express: bool = False
+    address: Optional[Address] = None
+    items: List[str] = field(default_factory=list)
+    metadata: Dict[str, int] = field(default_factory=dict)
+
+
+PAYLOAD = {
+    "customer": "ada",
+    "quantity": 3,
+    "price": 19,
+    "express": True,
+    "address": {"street": "1 Main St", "city": "Tabriz", "zip_code": "51368"},
+    "items": ["widget", "gadget", "gizmo"],
+    "metadata": {"priority": 1, "source": 2},
+}
+
+
+def naive_validate(tp: Any, value: Any) -> Any:
+    """Interpret type hints on every call (what handlers do by hand today)"""
+    if is_dataclass(tp):
+        if not isinstance(value, dict):
+            raise ValueError("must be an object")
+        hints = typing.get_type_hints(tp)
+        kwargs = {}
+        for f in fields(tp):
+            if f.name in value:
+                kwargs[f.name] = naive_validate(hints[f.name], value[f.name])
+            elif f.default is not MISSING:
+                kwargs[f.name] = f.default
+            elif f.default_factory is not MISSING:
+                kwargs[f.name] = f.default_factory()
+            else:
+                raise ValueError(f"{f.name}: field required")
+        return tp(**kwargs)
+
+    origin = typing.get_origin(tp)
+    args = typing.get_args(tp)
+    if origin is typing.Union:
+        if value is None:
+            return None
+        return naive_validate(next(a for a in args if a is not type(None)), value)
+    if origin is list:
+        return [naive_validate(args[0], v) for v in value]
+    if origin is dict:
+        return {k: naive_validate(args[1], v) for k, v in value.items()}
+    if tp is float and isinstance(value, int):
+        return float(value)
+    if not isinstance(value, tp):
+        raise ValueError(f"expected {tp.__name__}")
+    return value
+
+
+def main(number: int = 20000):
+    compiled = compile_model(Order)
+    loc = ("body",)
+    assert compiled(PAYLOAD, loc) == naive_validate(Order, PAYLOAD)
+
+    naive_time = min(timeit.repeat(lambda: naive_validate(Order, PAYLOAD), number=number, repeat=5))
+    compiled_time = min(timeit.repeat(lambda: compiled(PAYLOAD, loc), number=number, repeat=5))
+
+    print(f"naive:    {naive_time / number * 1e6:8.2f} us/validation")
+    print(f"compiled: {compiled_time / number * 1e6:8.2f} us/validation")
+    print(f"speedup:  {naive_time / compiled_time:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@ from core.config import Config
 from web.response import Response
 import json
 import math
+from dataclasses import dataclass
 from typing import Union
 
 # Initialize AbriPy
@@ -47,11 +48,13 @@ class Calculator:
         except Exception as e:
             return {"error": f"Invalid expression: {str(e)}", "success": False}
 
-# Routes
-@app.get("/")
-async def calculator_home(request):
-    """Serve the calculator interface"""
-    html_content = """
+@dataclass
+class CalculationInput:
+    """Request body for /api/calculate"""
+    expression: str
+
+# The home page never changes: encode it and its headers once at import
+HOME_PAGE = Response.html("""
 <!DOCTYPE html>
 <html lang="en">
 <head>
@@ -373,16 +376,20 @@ async def calculator_home(request):
     </script>
 </body>
 </html>
-    """
-    return Response.html(html_content)
+""").freeze()
+
+# Routes
+@app.get("/")
+async def calculator_home(request):
+    """Serve the calculator interface"""
+    return HOME_PAGE
 
 @app.post("/api/calculate")
-async def calculate_api(request):
+async def calculate_api(request, body: CalculationInput):
     """API endpoint for calculations"""
     try:
-        # Get JSON data from request
-        body = await request.json()
-        expression = body.get('expression', '')
+        # The body has already been validated against CalculationInput
+        expression = body.expression
         
         if not expression:
             return Response.json({
@@ -0,0 +1,243 @@
+# cli/bench.py
+import asyncio
+import importlib
+import json
+import math
+import os
+import random
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Optional
+
+from testing.transport import InMemoryTransport
+
+PERCENTILES = (50.0, 75.0, 90.0, 95.0, 99.0, 99.9)
+
+
+@dataclass
+class BenchRequest:
+    """One entry of the request mix"""
+    method: str = "GET"
+    path: str = "/"
+    weight: int = 1
+    headers: Dict[str, str] = field(default_factory=dict)
+    body: bytes = b""
+
+    @classmethod
+    def parse(cls, spec: str) -> 'BenchRequest':
+        """Parse a 'METHOD PATH[*WEIGHT]' spec, e.g. 'GET /api/help*3'"""
+        parts = spec.split(None, 1)
+        if len(parts) != 2:
+            raise ValueError(f"Invalid request spec: {spec!r} (expected 'METHOD PATH')")
+
+        method, path = parts
+        weight = 1
+        if "*" in path:
+            path, weight_str = path.rsplit("*", 1)
+            weight = int(weight_str)
+        return cls(method=method.upper(), path=path, weight=weight)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'BenchRequest':
+        """Build a mix entry from a JSON mix file entry"""
+        headers = dict(data.get("headers", {}))
+        body = data.get("body", b"")
+        if "json" in data:
+            body = json.dumps(data["json"]).encode("utf-8")
+            headers.setdefault("content-type", "application/json")
+        elif isinstance(body, str):
+            body = body.encode("utf-8")
+
+        return cls(
+            method=data.get("method", "GET").upper(),
+            path=data.get("path", "/"),
+            weight=int(data.get("weight", 1)),
+            headers=headers,
+            body=body,
+        )
+
+
+@dataclass
+class BenchResult:
+    """Aggregated numbers for one benchmark run"""
+    requests: int
+    elapsed: float
+    latencies_ns: List[int]
+    status_counts: Dict[int, int]
+    errors: int
+    alloc_bytes_per_request: Optional[float] = None
+    retained_blocks_per_request: Optional[float] = None
+
+    @property
+    def throughput(self) -> float:
+        """Requests per second"""
+        return self.requests / self.elapsed if self.elapsed else 0.0
+
+    def percentile(self, pct: float) -> float:
+        """Latency percentile in milliseconds (nearest-rank)"""
+        if not self.latencies_ns:
+            return 0.0
+        ordered = sorted(self.latencies_ns)
+        rank = max(0, math.ceil(pct / 100.0 * len(ordered)) - 1)
+        return ordered[rank] / 1e6
+
+    def report(self) -> str:
+        """Render a human-readable report"""
+        lines = [
+            f"Requests:     {self.requests}",
+            f"Elapsed:      {self.elapsed:.3f}s",
+            f"Throughput:   {self.throughput:,.0f} req/s",
+            f"Errors:       {self.errors}",
+            "Status codes: " + ", ".join(
+                f"{status}={count}" for status, count in sorted(self.status_counts.items())
+            ),
+            "",
+            "Latency (ms)",
+        ]
+        for pct in PERCENTILES:
+            lines.append(f"  p{pct:<6g} {self.percentile(pct):10.3f}")
+        if self.latencies_ns:
+            lines.append(f"  {'max':<7} {max(self.latencies_ns) / 1e6:10.3f}")
+
+        if self.alloc_bytes_per_request is not None:
+            lines.extend([
+                "",
+                "Memory per request",
+                f"  peak bytes       {self.alloc_bytes_per_request:10.0f}",
+                f"  retained blocks  {self.retained_blocks_per_request:10.1f}",
+            ])
+        return "\n".join(lines)
+
+
+def load_app(app_path: str):
+    """Import an ASGI app from a 'module:attribute' string"""
+    module_name, _, attr = app_path.partition(":")
+    attr = attr or "app"
+
+    if os.getcwd() not in sys.path:
+        sys.path.insert(0, os.getcwd())
+
+    module = importlib.import_module(module_name)
+    try:
+        return getattr(module, attr)
+    except AttributeError:
+        raise ValueError(f"Module '{module_name}' has no attribute '{attr}'")
+
+
+def load_mix(mix_file: str) -> List[BenchRequest]:
+    """Load a request mix from a JSON file containing a list of entries"""
+    with open(mix_file, 'r') as f:
+        data = json.load(f)
+    return [BenchRequest.from_dict(entry) for entry in data]
+
+
+class BenchRunner:
+    """Closed-loop load generator over an in-memory ASGI transport"""
+
+    def __init__(self, app, mix: List[BenchRequest], concurrency: int = 10, seed: int = 0):
+        if not mix:
+            raise ValueError("Request mix is empty")
+        self.transport = InMemoryTransport(app)
+        self.mix = mix
+        self.concurrency = max(1, concurrency)
+        self.random = random.Random(seed)
+        self._weights = [entry.weight for entry in mix]
+
+    def schedule(self, count: int) -> List[BenchRequest]:
+        """Pick a deterministic weighted sequence of requests"""
+        return self.random.choices(self.mix, weights=self._weights, k=count)
+
+    async def _send(self, entry: BenchRequest):
+        return await self.transport.request(entry.method, entry.path, entry.headers, entry.body)
+
+    async def run(self, requests: int, warmup: int = 0) -> BenchResult:
+        """Run the benchmark and collect latency and status numbers"""
+        for entry in self.schedule(warmup):
+            await self._send(entry)
+
+        plan = self.schedule(requests)
+        latencies: List[int] = []
+        status_counts: Dict[int, int] = {}
+        errors = 0
+        position = 0
+
+        async def worker():
+            nonlocal position, errors
+            while position < len(plan):
+                entry = plan[position]
+                position += 1
+                started = time.perf_counter_ns()
+                try:
+                    response = await self._send(entry)
+                except Exception:
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter_ns() - started)
+                status_counts[response.status_code] = status_counts.get(response.status_code, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        elapsed = time.perf_counter() - started
+
+        return BenchResult(
+            requests=len(plan),
+            elapsed=elapsed,
+            latencies_ns=latencies,
+            status_counts=status_counts,
+            errors=errors,
+        )
+
+    async def measure_allocations(self, requests: int):
+        """Measure memory per request (run serially)
+
+        Returns the average tracemalloc peak above the pre-request baseline
+        in bytes, and the average number of memory blocks still held after
+        each request (sys.getallocatedblocks; growth here suggests a leak,
+        it is not a count of allocations).
+        """
+        plan = self.schedule(requests)
+        if not plan:
+            return 0.0, 0.0
+
+        # Prime caches so one-off imports don't show up as per-request cost
+        await self._send(plan[0])
+
+        reset_peak = getattr(tracemalloc, "reset_peak", None)  # Python 3.9+
+        tracemalloc.start()
+        try:
+            peak_total = 0
+            start_blocks = sys.getallocatedblocks()
+            for entry in plan:
+                if reset_peak is not None:
+                    baseline, _ = tracemalloc.get_traced_memory()
+                    reset_peak()
+                else:
+                    # Also zeroes the current and peak counters
+                    tracemalloc.clear_traces()
+                    baseline = 0
+                await self._send(entry)
+                _, peak = tracemalloc.get_traced_memory()
+                peak_total += peak - baseline
+            retained_blocks = sys.getallocatedblocks() - start_blocks
+        finally:
+            tracemalloc.stop()
+
+        return peak_total / len(plan), retained_blocks / len(plan)
+
+
+def run_bench(app, mix: List[BenchRequest], requests: int = 10000, concurrency: int = 10,
+              warmup: int = 100, alloc_requests: int = 500, seed: int = 0) -> BenchResult:
+    """Run a full benchmark, including an allocation pass, and return the result"""
+    runner = BenchRunner(app, mix, concurrency=concurrency, seed=seed)
+
+    async def main():
+        result = await runner.run(requests, warmup=warmup)
+        if alloc_requests:
+            per_request, blocks = await runner.measure_allocations(alloc_requests)
+            result.alloc_bytes_per_request = per_request
+            result.retained_blocks_per_request = blocks
+        return result
+
+    return asyncio.run(main())
@@ -108,5 +108,65 @@ uvicorn[standard]>=0.24.0
     click.echo(f"📁 cd {project_name}")
     click.echo(f"🚀 python app.py")
 
+@cli.command()
+@click.argument('app_path')
+@click.option('--requests', '-n', 'total', default=10000, help='Number of measured requests')
+@click.option('--concurrency', '-c', default=10, help='Concurrent in-flight requests')
+@click.option('--request', '-r', 'specs', multiple=True,
+              help="Request in the mix as 'METHOD PATH[*WEIGHT]' (repeatable)")
+@click.option('--mix', 'mix_file', type=click.Path(exists=True),
+              help='JSON file with a list of {method, path, weight, headers, body|json}')
+@click.option('--warmup', default=100, help='Unmeasured warmup requests')
+@click.option('--alloc-requests', default=500, help='Requests traced for allocations (0 to skip)')
+@click.option('--seed', default=0, help='Seed for the weighted request mix')
+def bench(app_path, total, concurrency, specs, mix_file, warmup, alloc_requests, seed):
+    """Benchmark an app in-process, e.g. 'abripy bench calculator_app:app'"""
+    from .bench import BenchRequest, load_app, load_mix, run_bench
+
+    try:
+        app = load_app(app_path)
+        mix = [BenchRequest.parse(spec) for spec in specs]
+        if mix_file:
+            mix.extend(load_mix(mix_file))
+    except (ImportError, ValueError) as e:
+        raise click.ClickException(str(e))
+
+    # One access log line per request would flood the terminal and skew the numbers
+    if getattr(app, "access_log", None) is not None:
+        app.access_log = None
+
+    if not mix:
+        mix = [BenchRequest()]
+
+    click.echo(f"🏁 Benchmarking {app_path}: {total} requests, concurrency {concurrency}")
+    for entry in mix:
+        click.echo(f"   • {entry.method} {entry.path} (weight {entry.weight})")
+    click.echo()
+
+    result = run_bench(
+        app,
+        mix,
+        requests=total,
+        concurrency=concurrency,
+        warmup=warmup,
+        alloc_requests=alloc_requests,
+        seed=seed,
+    )
+    click.echo(result.report())
+
+@cli.command()
+@click.argument('directory', default='static', type=click.Path(exists=True, file_okay=False))
+@click.option('--min-size', default=256, help='Skip files smaller than this many bytes')
+@click.option('--level', default=9, type=click.IntRange(1, 9), help='gzip compression level')
+def precompress(directory, min_size, level):
+    """Write .gz siblings for static files ahead of time"""
+    from web.staticfiles import precompress_directory
+    
+    written = precompress_directory(directory, min_size=min_size, level=level)
+    for path, original, compressed in written:
+        click.echo(f"   • {path}: {original} → {compressed} bytes")
+    
+    click.echo(f"✅ Precompressed {len(written)} file(s) in {directory}")
+
 if __name__ == '__main__':
     cli()
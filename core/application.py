@@ -1,13 +1,20 @@
 # Fixed imports (complete)
+import time
 from typing import Dict, List, Any, Optional, Callable
 from .config import Config
+from .exceptions import AbriPyException
+from .log import LogManager, logger
+from .validation import compile_handler
 from .security import SecurityConfig
-from web.websockets import WebSocketManager
+from web.websockets import ASGIWebSocket, WebSocketConnection, WebSocketDisconnect, WebSocketManager
 from web.request import Request
-from web.response import Response
+from web.response import ConstantResponse, Response
+from web.json_codec import activate_json_codec, create_codec, reset_json_codec
 from core.routing import Router
 from core.middleware import MiddlewareManager
 
+_NOT_FOUND = ConstantResponse("Not Found", status_code=404)
+
 
 class AbriPy:
     """AbriPy Framework - Modern, secure web framework"""
@@ -16,11 +23,27 @@ class AbriPy:
         self.config = config or Config()
         self.routes: Dict[str, Dict[str, Callable]] = {}
         self.middleware_stack = MiddlewareManager()
-        self.websocket_manager = WebSocketManager()
+        # Current while this app handles a request (see get_json_codec)
+        self.json_codec = create_codec(self.config.json_codec)
+        websocket_config = self.config.websocket
+        self.websocket_manager = WebSocketManager(
+            overflow=websocket_config.overflow,
+            ping_interval=websocket_config.ping_interval,
+            idle_timeout=websocket_config.idle_timeout,
+            heartbeat_tick=websocket_config.heartbeat_tick,
+            codecs=websocket_config.codecs
+        )
         self.security = SecurityConfig()
         self.before_request_handlers: List[Callable] = []
         self.after_request_handlers: List[Callable] = []
         self.router = Router()  # Initialize router
+        self._error_responses: Dict[type, ConstantResponse] = {}
+        
+        # Logging is formatted and written on a background thread, started
+        # by start_logging() rather than here
+        self.log_manager = LogManager(self.config.logging)
+        self.access_log = self.log_manager.access
+        self._logging_started = False
         
         # Initialize security
         if self.config.security.secret_key:
@@ -35,8 +58,10 @@ class AbriPy:
             methods = ['GET']
             
         def decorator(func: Callable):
+            # Body models in the signature are compiled once, here
+            handler = compile_handler(func)
             for method in methods:
-                self.router.add_route(method, path, func)
+                self.router.add_route(method, path, handler)
             return func
         return decorator
     
@@ -59,10 +84,22 @@ class AbriPy:
     def websocket(self, path: str):
         """WebSocket route decorator"""
         def decorator(func: Callable):
-            # WebSocket handling logic here
+            self.router.add_route('WEBSOCKET', path, func)
             return func
         return decorator
     
+    def static(self, path: str, directory: str, **options):
+        """Serve files from directory under the path prefix
+        
+        Returns the StaticFiles instance; use its url_for() to build
+        fingerprinted, long-cacheable URLs (await its load_fingerprints()
+        at startup to hash the files off the event loop).
+        """
+        from web.staticfiles import StaticFiles
+        static_files = StaticFiles(directory, prefix=path, **options)
+        self.router.add_mount(path, static_files)
+        return static_files
+    
     def middleware(self, middleware_class):
         """Add middleware"""
         self.middleware_stack.add(middleware_class)
@@ -78,29 +115,70 @@ class AbriPy:
         self.after_request_handlers.append(func)
         return func
     
+    def start_logging(self):
+        """Apply config.logging and start the log writer thread
+        
+        Runs on ASGI lifespan startup, or on the first request if the
+        server doesn't send lifespan events.
+        """
+        self._logging_started = True
+        self.log_manager.start()
+    
     async def __call__(self, scope, receive, send):
         """ASGI interface"""
-        if scope['type'] == 'http':
-            await self.handle_http(scope, receive, send)
-        elif scope['type'] == 'websocket':
-            await self.handle_websocket(scope, receive, send)
+        if not self._logging_started:
+            self.start_logging()
+        token = activate_json_codec(self.json_codec)
+        try:
+            if scope['type'] == 'http':
+                await self.handle_http(scope, receive, send)
+            elif scope['type'] == 'websocket':
+                await self.handle_websocket(scope, receive, send)
+            elif scope['type'] == 'lifespan':
+                await self.handle_lifespan(scope, receive, send)
+        finally:
+            reset_json_codec(token)
+    
+    async def handle_lifespan(self, scope, receive, send):
+        """Handle ASGI lifespan events: stop the log writer on shutdown"""
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.log_manager.stop()
+                self._logging_started = False
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
 
     async def handle_http(self, scope, receive, send):
         """Handle HTTP requests"""
+        started = time.perf_counter()
+        
         # Create request object with proper ASGI parameters
-        request = Request(scope, receive)
+        server_config = self.config.server
+        request = Request(
+            scope,
+            receive,
+            server_config.max_body_size,
+            server_config.max_query_params,
+            server_config.max_query_length
+        )
         
         # Get the path and method
         path = scope["path"]
         method = scope["method"]
         
         try:
+            # Reject oversized bodies before any handler runs
+            request.check_content_length()
+            
             # Find matching route
             handler = self.router.match(path, method)
             
             if handler is None:
                 # 404 Not Found
-                response = Response("Not Found", status_code=404)
+                response = _NOT_FOUND
             else:
                 # Call the handler
                 result = await handler(request)
@@ -115,20 +193,84 @@ class AbriPy:
                 else:
                     response = result
                     
+        except AbriPyException as e:
+            response = self.error_response(e)
         except Exception as e:
             # 500 Internal Server Error
             response = Response(f"Internal Server Error: {str(e)}", status_code=500)
-            print(f"Error handling request: {e}")  # Debug logging
+            logger.exception("Error handling request %s %s", method, path)
         
         # Send the response
-        await response(scope, receive, send)
+        try:
+            await response(scope, receive, send)
+        finally:
+            await request.close()
+        
+        if self.access_log is not None:
+            client = scope.get("client")
+            self.access_log.log(
+                client[0] if client else "-",
+                method,
+                path,
+                response.status_code,
+                time.perf_counter() - started
+            )
+
+    def error_response(self, exc: AbriPyException) -> Response:
+        """Build the response for a framework exception
+        
+        Exceptions carrying only their class-level message share one cached
+        response per exception type.
+        """
+        errors = getattr(exc, "errors", None)
+        if errors:
+            return Response.json({"error": exc.message, "errors": errors}, status_code=exc.status_code)
+        if exc.message is not type(exc).message:
+            return Response(exc.message, status_code=exc.status_code)
+        
+        response = self._error_responses.get(type(exc))
+        if response is None:
+            response = ConstantResponse(exc.message, status_code=exc.status_code)
+            self._error_responses[type(exc)] = response
+        return response
 
     async def handle_websocket(self, scope, receive, send):
-        """Handle WebSocket connections"""
-        # Basic WebSocket handler - you can expand this
-        await send({
-            'type': 'websocket.accept'
-        })
+        """Handle WebSocket connections
+        
+        The route handler is called with the accepted, registered
+        WebSocketConnection (to join rooms, greet the client, ...); incoming
+        JSON messages are then dispatched to the manager's on_message
+        handlers until the client disconnects. A handler may instead close
+        the connection or run its own receive loop.
+        """
+        websocket = ASGIWebSocket(scope, receive, send)
+        handler = self.router.match(scope["path"], 'WEBSOCKET')
+        if handler is None:
+            # Closing before accept rejects the handshake (HTTP 403)
+            await websocket.close(code=1008)
+            return
+        
+        manager = self.websocket_manager
+        subprotocol, codec = manager.negotiate(websocket.subprotocols)
+        try:
+            await websocket.accept(subprotocol)
+        except WebSocketDisconnect:
+            return
+        
+        connection = WebSocketConnection(websocket, max_queue=self.config.websocket.send_queue_size, codec=codec)
+        manager.add_connection(connection)
+        try:
+            await handler(connection)
+            if not websocket.closed:
+                await manager.serve(connection)
+        except WebSocketDisconnect:
+            pass
+        except Exception:
+            logger.exception("Error in WebSocket handler for %s", scope["path"])
+            await websocket.close(code=1011)
+        finally:
+            connection.is_connected = False
+            manager.remove_connection(connection.connection_id)
     
     def run(self, host: str = None, port: int = None, debug: bool = None):
         """Run the application"""
@@ -1,6 +1,6 @@
 # core/config.py
 import os
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 from dataclasses import dataclass, field
 import json
 
@@ -10,6 +10,13 @@ class DatabaseConfig:
     url: str = "sqlite://app.db"
     pool_size: int = 10
     max_overflow: int = 20
+    pool_timeout: Optional[float] = 30.0  # seconds to wait for a connection, None = forever
+    pool_min_size: int = 1  # connections opened on connect
+    pool_recycle_uses: Optional[int] = None  # replace a connection after this many uses, None = never
+    pool_health_check_interval: float = 30.0  # idle seconds before a connection is checked on checkout
+    profile: str = "default"  # default, or production: WAL and tuned pragmas
+    pragmas: Dict[str, Any] = field(default_factory=dict)  # overrides for the profile's pragmas
+    autocommit: bool = False  # let execute() outside a transaction commit per statement
     echo: bool = False
 
 @dataclass
@@ -29,6 +36,9 @@ class ServerConfig:
     workers: int = 1
     debug: bool = False
     auto_reload: bool = False
+    max_body_size: Optional[int] = 10 * 1024 * 1024  # bytes, None = unlimited
+    max_query_params: Optional[int] = 1000
+    max_query_length: Optional[int] = 8192  # bytes
 
 @dataclass
 class LoggingConfig:
@@ -36,16 +46,35 @@ class LoggingConfig:
     level: str = "INFO"
     format: str = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
     file: Optional[str] = None
+    json_format: bool = False
+    queue_size: int = 10000
+    access_log: bool = True
+    access_log_sample_rate: float = 1.0
+    access_log_rate_limit: int = 0  # entries per second, 0 = unlimited
+    access_log_batch_size: int = 100
+    access_log_flush_interval: float = 1.0
+
+@dataclass
+class WebSocketConfig:
+    """WebSocket configuration"""
+    send_queue_size: int = 256  # outbound frames buffered per connection
+    overflow: str = "drop_oldest"  # drop_oldest, disconnect or coalesce
+    ping_interval: Optional[float] = None  # seconds of silence before a ping, None = no pings
+    idle_timeout: Optional[float] = None  # seconds of silence before closing, None = never
+    heartbeat_tick: float = 1.0
+    codecs: Optional[List[str]] = None  # subprotocols to offer (json, msgpack, abripy.compact), None = all available
 
 @dataclass
 class Config:
     """Main application configuration"""
     app_name: str = "AbriPy App"
     environment: str = "development"
+    json_codec: str = "auto"  # auto, orjson, msgspec or json
     database: DatabaseConfig = field(default_factory=DatabaseConfig)
     security: SecurityConfig = field(default_factory=SecurityConfig)
     server: ServerConfig = field(default_factory=ServerConfig)
     logging: LoggingConfig = field(default_factory=LoggingConfig)
+    websocket: WebSocketConfig = field(default_factory=WebSocketConfig)
     custom: Dict[str, Any] = field(default_factory=dict)
     
     @classmethod
@@ -77,7 +106,7 @@ class Config:
         # Update config with file data
         for key, value in data.items():
             if hasattr(config, key):
-                if isinstance(getattr(config, key), (DatabaseConfig, SecurityConfig, ServerConfig, LoggingConfig)):
+                if isinstance(getattr(config, key), (DatabaseConfig, SecurityConfig, ServerConfig, LoggingConfig, WebSocketConfig)):
                     # Update nested config
                     nested_config = getattr(config, key)
                     for nested_key, nested_value in value.items():
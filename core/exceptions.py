@@ -3,10 +3,17 @@
 AbriPy Framework Exceptions
 """
 
+from typing import Any, Dict, List, Optional
+
 class AbriPyException(Exception):
     """Base AbriPy framework exception"""
     status_code = 500
     message = "Internal server error"
+    
+    def __init__(self, message: Optional[str] = None):
+        if message is not None:
+            self.message = message
+        super().__init__(self.message)
 
 class RouteNotFound(AbriPyException):
     """Raised when a route is not found"""
@@ -17,6 +24,10 @@ class ValidationError(AbriPyException):
     """Raised when validation fails"""
     status_code = 400
     message = "Validation error"
+    
+    def __init__(self, message: Optional[str] = None, errors: Optional[List[Dict[str, Any]]] = None):
+        super().__init__(message)
+        self.errors = errors or []
 
 class AuthenticationError(AbriPyException):
     """Raised when authentication fails"""
@@ -32,3 +43,13 @@ class MethodNotAllowed(AbriPyException):
     """Raised when HTTP method is not allowed"""
     status_code = 405
     message = "Method not allowed"
+
+class RequestEntityTooLarge(AbriPyException):
+    """Raised when a request body exceeds the configured size limit"""
+    status_code = 413
+    message = "Request entity too large"
+
+class ClientDisconnect(AbriPyException):
+    """Raised when the client disconnects while the body is being read"""
+    status_code = 400
+    message = "Client disconnected"
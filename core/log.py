@@ -0,0 +1,268 @@
+# core/log.py
+"""
+Non-blocking logging for AbriPy Framework
+
+Records are handed to a bounded queue on the event loop and formatted and
+written by a background thread. Access log entries are buffered as plain
+tuples and shipped to that thread in batches, after sampling and rate
+limiting, so the request path never touches a formatter or a file.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import threading
+import time
+from typing import Dict, List, Any, Optional, Tuple
+
+from .config import LoggingConfig
+
+LOGGER_NAME = "abripy"
+ACCESS_LOGGER_NAME = "abripy.access"
+
+logger = logging.getLogger(LOGGER_NAME)
+access_logger = logging.getLogger(ACCESS_LOGGER_NAME)
+
+ACCESS_FORMAT = '%s - "%s %s" %d %.2fms'
+
+# Attributes every LogRecord has; anything else was passed via ``extra``
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JSONFormatter(logging.Formatter):
+    """Format records as one JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data: Dict[str, Any] = {
+            "time": self.formatTime(record, self.datefmt),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                data[key] = value
+
+        if record.exc_info:
+            data["exc_info"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            data["stack_info"] = self.formatStack(record.stack_info)
+
+        return json.dumps(data, default=str)
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that never blocks or formats on the calling thread"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The listener runs in-process, so the record (including exc_info)
+        # can be passed through untouched and formatted on the writer thread
+        return record
+
+    def enqueue(self, record) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LogListener(logging.handlers.QueueListener):
+    """Background writer that also expands batched access log entries"""
+
+    def __init__(self, log_queue: queue.Queue, *handlers, flush_interval: float = 1.0):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.flush_interval = flush_interval
+        self.idle_callbacks: List[Any] = []
+
+    def dequeue(self, block: bool):
+        while True:
+            try:
+                return self.queue.get(block, self.flush_interval)
+            except queue.Empty:
+                if not block:
+                    raise
+                for callback in self.idle_callbacks:
+                    callback()
+
+    def handle(self, record) -> None:
+        if isinstance(record, list):
+            for entry in record:
+                super().handle(AccessLogger.make_record(entry))
+        else:
+            super().handle(record)
+
+
+class AccessLogger:
+    """Sampled, rate-limited and batched access log"""
+
+    def __init__(self, log_queue: queue.Queue, sample_rate: float = 1.0,
+                 rate_limit: int = 0, batch_size: int = 100, flush_interval: float = 1.0):
+        self.queue = log_queue
+        self.sample_rate = sample_rate
+        self.rate_limit = rate_limit
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.dropped = 0
+
+        self._buffer: List[Tuple] = []
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._tokens = float(rate_limit)
+        self._last_refill = self._last_flush
+        self._random = random.random
+
+    def log(self, client: str, method: str, path: str, status: int, duration: float):
+        """Record one request; cheap enough to call on the event loop"""
+        if not access_logger.isEnabledFor(logging.INFO):
+            return
+        # Server errors are always kept, everything else is sampled
+        if status < 500 and self.sample_rate < 1.0 and self._random() >= self.sample_rate:
+            return
+
+        now = time.monotonic()
+        if self.rate_limit:
+            self._tokens = min(
+                float(self.rate_limit),
+                self._tokens + (now - self._last_refill) * self.rate_limit
+            )
+            self._last_refill = now
+            if self._tokens < 1.0:
+                self.dropped += 1
+                return
+            self._tokens -= 1.0
+
+        with self._lock:
+            self._buffer.append((time.time(), client, method, path, status, duration * 1000.0))
+            if len(self._buffer) < self.batch_size and now - self._last_flush < self.flush_interval:
+                return
+            batch, self._buffer = self._buffer, []
+            self._last_flush = now
+        self._enqueue(batch)
+
+    def flush(self):
+        """Ship whatever is buffered to the writer thread"""
+        with self._lock:
+            if not self._buffer:
+                return
+            batch, self._buffer = self._buffer, []
+            self._last_flush = time.monotonic()
+        self._enqueue(batch)
+
+    def _enqueue(self, batch: List[Tuple]):
+        try:
+            self.queue.put_nowait(batch)
+        except queue.Full:
+            self.dropped += len(batch)
+
+    @staticmethod
+    def make_record(entry: Tuple) -> logging.LogRecord:
+        """Build a LogRecord from a buffered access entry (writer thread only)"""
+        created, client, method, path, status, duration_ms = entry
+        record = access_logger.makeRecord(
+            ACCESS_LOGGER_NAME, logging.INFO, __file__, 0, ACCESS_FORMAT,
+            (client, method, path, status, duration_ms), None,
+            extra={
+                "client": client,
+                "method": method,
+                "path": path,
+                "status": status,
+                "duration_ms": round(duration_ms, 3),
+            },
+        )
+        record.created = created
+        record.msecs = (created - int(created)) * 1000
+        return record
+
+
+class LogManager:
+    """Owns the queue, writer thread and access logger built from a LoggingConfig"""
+
+    def __init__(self, config: LoggingConfig):
+        self.config = config
+        self.queue: queue.Queue = queue.Queue(config.queue_size)
+
+        if config.json_format:
+            formatter = JSONFormatter()
+        else:
+            formatter = logging.Formatter(config.format)
+
+        if config.file:
+            output = logging.FileHandler(config.file)
+        else:
+            output = logging.StreamHandler(sys.stderr)
+        output.setFormatter(formatter)
+
+        self.handler = NonBlockingQueueHandler(self.queue)
+        self.listener = LogListener(self.queue, output, flush_interval=config.access_log_flush_interval)
+        self.access = AccessLogger(
+            self.queue,
+            sample_rate=config.access_log_sample_rate,
+            rate_limit=config.access_log_rate_limit,
+            batch_size=config.access_log_batch_size,
+            flush_interval=config.access_log_flush_interval,
+        ) if config.access_log else None
+
+        if self.access:
+            self.listener.idle_callbacks.append(self.access.flush)
+
+    @property
+    def started(self) -> bool:
+        return self.listener._thread is not None
+
+    def start(self):
+        """Attach the queue handler and start the writer thread
+
+        Replaces the manager started before this one, if any. Records
+        still propagate to the root logger's handlers.
+        """
+        global _active_manager
+
+        if self.started:
+            return
+        if _active_manager is not None:
+            _active_manager.stop()
+        _active_manager = self
+        logger.setLevel(self.config.level.upper())
+        logger.addHandler(self.handler)
+        self.listener.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        """Flush pending records and stop the writer thread"""
+        global _active_manager
+
+        if not self.started:
+            return
+        if _active_manager is self:
+            _active_manager = None
+        if self.access:
+            self.access.flush()
+        self.listener.stop()
+        logger.removeHandler(self.handler)
+        for handler in self.listener.handlers:
+            handler.close()
+        atexit.unregister(self.stop)
+
+    @property
+    def dropped(self) -> int:
+        """Records dropped because the queue was full or rate limits applied"""
+        return self.handler.dropped + (self.access.dropped if self.access else 0)
+
+
+_active_manager: Optional[LogManager] = None
+
+
+def setup_logging(config: LoggingConfig) -> LogManager:
+    """Apply a LoggingConfig, replacing any previously applied one"""
+    manager = LogManager(config)
+    manager.start()
+    return manager
@@ -7,6 +7,7 @@ class Router:
     def __init__(self):
         self.routes: List[Tuple[str, str, Callable]] = []  # (method, pattern, handler)
         self.static_routes: Dict[str, Dict[str, Callable]] = {}  # {path: {method: handler}}
+        self.mounts: List[Tuple[str, Callable]] = []  # (prefix, handler) for GET/HEAD
     
     def add_route(self, method: str, path: str, handler: Callable):
         """Add a route to the router"""
@@ -22,6 +23,10 @@ class Router:
             pattern = self._path_to_pattern(path)
             self.routes.append((method, pattern, handler))
     
+    def add_mount(self, prefix: str, handler: Callable):
+        """Route every GET/HEAD request below prefix to handler"""
+        self.mounts.append((prefix.rstrip('/') + '/', handler))
+    
     def match(self, path: str, method: str) -> Optional[Callable]:
         """Find a matching route handler"""
         method = method.upper()
@@ -30,6 +35,12 @@ class Router:
         if path in self.static_routes:
             return self.static_routes[path].get(method)
         
+        # Then mounted prefixes (static files)
+        if method in ('GET', 'HEAD'):
+            for prefix, handler in self.mounts:
+                if path.startswith(prefix):
+                    return handler
+        
         # Check dynamic routes
         for route_method, pattern, handler in self.routes:
             if route_method == method:
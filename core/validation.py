@@ -0,0 +1,315 @@
+# core/validation.py
+"""
+Compiled request body validation for AbriPy Framework
+
+Handlers can declare a dataclass or TypedDict parameter after ``request``::
+
+    @dataclass
+    class CalculationInput:
+        expression: str
+        precision: int = 10
+
+    @app.post('/api/calculate')
+    async def calculate(request, body: CalculationInput):
+        ...
+
+When the route is registered the model is compiled into a specialized
+Python function (generated source, one per model) so each request runs
+straight-line type checks instead of walking type hints.
+"""
+
+import dataclasses
+import functools
+import inspect
+import types
+import typing
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .exceptions import ValidationError
+from web.json_codec import get_json_codec
+
+Loc = Tuple[Any, ...]
+
+_NONE_TYPE = type(None)
+_MISSING = object()
+
+_SCALAR_CHECKS = {
+    str: ("type({src}) is not str", "must be a string"),
+    int: ("type({src}) is not int", "must be an integer"),
+    bool: ("type({src}) is not bool", "must be a boolean"),
+}
+
+
+class InvalidData(Exception):
+    """Raised by compiled validators with a list of (loc, message) pairs"""
+
+    def __init__(self, errors: List[Tuple[Loc, str]]):
+        super().__init__(errors)
+        self.errors = errors
+
+    def to_validation_error(self) -> ValidationError:
+        """Convert to the framework's ValidationError (400)"""
+        return ValidationError(errors=[
+            {"loc": list(loc), "msg": message} for loc, message in self.errors
+        ])
+
+
+def is_model(tp: Any) -> bool:
+    """True for dataclass types and TypedDicts"""
+    if not isinstance(tp, type):
+        return False
+    if dataclasses.is_dataclass(tp):
+        return True
+    return issubclass(tp, dict) and hasattr(tp, "__total__")
+
+
+class _Compiler:
+    """Generates validator source for a model and its nested types"""
+
+    def __init__(self):
+        self.namespace: Dict[str, Any] = {"InvalidData": InvalidData, "_MISSING": _MISSING}
+        self.functions: List[str] = []
+        self.models: Dict[type, str] = {}
+        self._counter = 0
+
+    def bind(self, value: Any, prefix: str) -> str:
+        """Expose value to the generated code under a fresh name"""
+        self._counter += 1
+        name = f"_{prefix}{self._counter}"
+        self.namespace[name] = value
+        return name
+
+    def fresh(self, prefix: str) -> str:
+        self._counter += 1
+        return f"_{prefix}{self._counter}"
+
+    def check_lines(self, tp: Any, src: str, loc: str, indent: str) -> List[str]:
+        """Lines that validate src in place, converting it when needed"""
+        if tp is Any or tp is object:
+            return []
+
+        if tp in _SCALAR_CHECKS:
+            condition, message = _SCALAR_CHECKS[tp]
+            return [
+                f"{indent}if {condition.format(src=src)}:",
+                f"{indent}    raise InvalidData([({loc}, {message!r})])",
+            ]
+
+        if tp is float:
+            return [
+                f"{indent}if type({src}) is not float:",
+                f"{indent}    if type({src}) is int:",
+                f"{indent}        {src} = float({src})",
+                f"{indent}    else:",
+                f"{indent}        raise InvalidData([({loc}, 'must be a number')])",
+            ]
+
+        if is_model(tp):
+            validator = self.compile_model(tp)
+            return [f"{indent}{src} = {validator}({src}, {loc})"]
+
+        origin = typing.get_origin(tp)
+        args = typing.get_args(tp)
+
+        if origin is typing.Union:
+            members = [arg for arg in args if arg is not _NONE_TYPE]
+            if len(members) != 1 or len(members) == len(args):
+                raise TypeError(f"Unsupported union type for validation: {tp!r}")
+            inner = self.check_lines(members[0], src, loc, indent + "    ")
+            if not inner:
+                return []
+            return [f"{indent}if {src} is not None:"] + inner
+
+        if tp is list or origin is list or origin is List:
+            lines = [
+                f"{indent}if type({src}) is not list:",
+                f"{indent}    raise InvalidData([({loc}, 'must be a list')])",
+            ]
+            if args and args[0] is not Any:
+                item = self.compile_item(args[0])
+                lines.append(f"{indent}_loc = {loc}")
+                lines.append(
+                    f"{indent}{src} = [{item}(_v, _loc, _i) for _i, _v in enumerate({src})]"
+                )
+            return lines
+
+        if tp is dict or origin is dict or origin is Dict:
+            lines = [
+                f"{indent}if type({src}) is not dict:",
+                f"{indent}    raise InvalidData([({loc}, 'must be an object')])",
+            ]
+            if args and args[1] is not Any:
+                item = self.compile_item(args[1])
+                lines.append(f"{indent}_loc = {loc}")
+                lines.append(
+                    f"{indent}{src} = {{_k: {item}(_v, _loc, _k) for _k, _v in {src}.items()}}"
+                )
+            return lines
+
+        raise TypeError(f"Unsupported type for validation: {tp!r}")
+
+    def compile_item(self, tp: Any) -> str:
+        """Compile a validator for one list item / dict value"""
+        name = self.fresh("item")
+        lines = [f"def {name}(value, parent, key):"]
+        body = self.check_lines(tp, "value", "parent + (key,)", "    ")
+        lines.extend(body)
+        lines.append("    return value")
+        self.functions.append("\n".join(lines))
+        return name
+
+    def compile_model(self, model: type) -> str:
+        """Compile a validator for a dataclass or TypedDict; returns its name"""
+        if model in self.models:
+            return self.models[model]
+
+        name = self.fresh(f"validate_{model.__name__}_")
+        self.models[model] = name
+        hints = typing.get_type_hints(model)
+        model_ref = self.bind(model, "model")
+
+        lines = [
+            f"def {name}(data, loc):",
+            "    if type(data) is not dict:",
+            "        raise InvalidData([(loc, 'must be an object')])",
+            "    errors = None",
+        ]
+
+        if dataclasses.is_dataclass(model):
+            fields = [
+                (field.name, hints[field.name], field)
+                for field in dataclasses.fields(model) if field.init
+            ]
+        else:
+            required = getattr(model, "__required_keys__", set(hints) if model.__total__ else set())
+            fields = [(key, hints[key], key in required) for key in hints]
+
+        assigned = []
+        for index, (field_name, field_type, info) in enumerate(fields):
+            var = f"f{index}"
+            loc = f"loc + ({field_name!r},)"
+            lines.append(f"    {var} = data.get({field_name!r}, _MISSING)")
+            lines.append(f"    if {var} is _MISSING:")
+
+            if dataclasses.is_dataclass(model):
+                if info.default is not dataclasses.MISSING:
+                    lines.append(f"        {var} = {self.bind(info.default, 'default')}")
+                elif info.default_factory is not dataclasses.MISSING:
+                    lines.append(f"        {var} = {self.bind(info.default_factory, 'factory')}()")
+                else:
+                    lines.append(f"        errors = (errors or []) + [({loc}, 'field required')]")
+            elif info:
+                lines.append(f"        errors = (errors or []) + [({loc}, 'field required')]")
+            else:
+                lines.append("        pass")
+
+            checks = self.check_lines(field_type, var, loc, "            ")
+            if checks:
+                lines.append("    else:")
+                lines.append("        try:")
+                lines.extend(checks)
+                lines.append("        except InvalidData as e:")
+                lines.append("            errors = (errors or []) + e.errors")
+            assigned.append((field_name, var))
+
+        lines.append("    if errors:")
+        lines.append("        raise InvalidData(errors)")
+
+        if dataclasses.is_dataclass(model):
+            arguments = ", ".join(f"{field_name}={var}" for field_name, var in assigned)
+            lines.append(f"    return {model_ref}({arguments})")
+        else:
+            lines.append("    result = {}")
+            for field_name, var in assigned:
+                lines.append(f"    if {var} is not _MISSING:")
+                lines.append(f"        result[{field_name!r}] = {var}")
+            lines.append("    return result")
+
+        self.functions.append("\n".join(lines))
+        return name
+
+    def build(self, model: type) -> Callable[[Any, Loc], Any]:
+        name = self.compile_model(model)
+        source = "\n\n".join(self.functions)
+        exec(compile(source, f"<validator {model.__qualname__}>", "exec"), self.namespace)
+        validator = self.namespace[name]
+        validator.__source__ = source
+        return validator
+
+
+_validators: Dict[type, Callable[[Any, Loc], Any]] = {}
+
+
+def compile_model(model: type) -> Callable[[Any, Loc], Any]:
+    """Get the compiled validator for a model: validator(data, loc) -> instance"""
+    validator = _validators.get(model)
+    if validator is None:
+        if not is_model(model):
+            raise TypeError(f"{model!r} is not a dataclass or TypedDict")
+        validator = _Compiler().build(model)
+        _validators[model] = validator
+    return validator
+
+
+def validate(model: type, data: Any) -> Any:
+    """Validate data against model, raising ValidationError on failure"""
+    try:
+        return compile_model(model)(data, ("body",))
+    except InvalidData as e:
+        raise e.to_validation_error()
+
+
+def _parameter_hints(func: Callable, names: List[str]) -> Dict[str, Any]:
+    """Resolve the annotations of the named parameters only"""
+    target = inspect.unwrap(func)
+    annotations = getattr(target, "__annotations__", {})
+    selected = types.SimpleNamespace(
+        __annotations__={name: annotations[name] for name in names if name in annotations}
+    )
+    return typing.get_type_hints(selected, globalns=getattr(target, "__globals__", None))
+
+
+def compile_handler(func: Callable) -> Callable:
+    """Wrap a handler whose signature declares a body model
+
+    Handlers without a model parameter, or whose parameter annotations
+    can't be resolved at runtime, are returned unchanged.
+    """
+    parameters = list(inspect.signature(func).parameters.values())[1:]
+    if not parameters:
+        return func
+
+    # The request's own annotation is often only importable for type checkers
+    try:
+        hints = _parameter_hints(func, [param.name for param in parameters])
+    except (NameError, TypeError):
+        return func
+    body_params = [param.name for param in parameters if is_model(hints.get(param.name))]
+    if not body_params:
+        return func
+    if len(body_params) > 1:
+        raise TypeError(f"{func.__qualname__} declares more than one body model")
+
+    param_name = body_params[0]
+    validator = compile_model(hints[param_name])
+    loc = ("body",)
+
+    @functools.wraps(func)
+    async def handler(request, **kwargs):
+        body = await request.body()
+        if body:
+            codec = get_json_codec()
+            try:
+                data = codec.loads(body)
+            except codec.decode_errors:
+                raise ValidationError("Invalid JSON body")
+        else:
+            data = {}
+
+        try:
+            kwargs[param_name] = validator(data, loc)
+        except InvalidData as e:
+            raise e.to_validation_error()
+        return await func(request, **kwargs)
+
+    return handler
@@ -1,10 +1,19 @@
 # database/__init__.py
-from .orm import Model, Field, DatabaseManager
+from .orm import Model, Field, DatabaseManager, SQLITE_PROFILES
 from .migrations import MigrationManager
+from .pool import ConnectionPool, PoolTimeout, PoolClosed
+from .transactions import Transaction, TransactionError, UnitOfWork
 
 __all__ = [
     'Model',
     'Field', 
     'DatabaseManager',
-    'MigrationManager'
+    'SQLITE_PROFILES',
+    'MigrationManager',
+    'ConnectionPool',
+    'PoolTimeout',
+    'PoolClosed',
+    'Transaction',
+    'TransactionError',
+    'UnitOfWork'
 ]
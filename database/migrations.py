@@ -38,7 +38,8 @@ class MigrationManager:
             applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
         )
         """
-        await self.db_manager.execute(sql)
+        async with self.db_manager.ensure_transaction() as transaction:
+            await transaction.execute(sql)
     
     async def get_applied_migrations(self) -> List[int]:
         """Get list of applied migration versions"""
@@ -54,11 +55,13 @@ class MigrationManager:
         print(f"Applying migration: {migration.name}")
         
         try:
-            await migration.up(self.db_manager)
-            
-            # Record migration
-            sql = "INSERT INTO migrations (name, version) VALUES (?, ?)"
-            await self.db_manager.execute(sql, (migration.name, migration.version))
+            # A failed migration leaves no partial changes behind
+            async with self.db_manager.transaction():
+                await migration.up(self.db_manager)
+                
+                # Record migration
+                sql = "INSERT INTO migrations (name, version) VALUES (?, ?)"
+                await self.db_manager.execute(sql, (migration.name, migration.version))
             
             print(f"✓ Applied migration: {migration.name}")
         except Exception as e:
@@ -70,11 +73,12 @@ class MigrationManager:
         print(f"Rolling back migration: {migration.name}")
         
         try:
-            await migration.down(self.db_manager)
-            
-            # Remove migration record
-            sql = "DELETE FROM migrations WHERE version = ?"
-            await self.db_manager.execute(sql, (migration.version,))
+            async with self.db_manager.transaction():
+                await migration.down(self.db_manager)
+                
+                # Remove migration record
+                sql = "DELETE FROM migrations WHERE version = ?"
+                await self.db_manager.execute(sql, (migration.version,))
             
             print(f"✓ Rolled back migration: {migration.name}")
         except Exception as e:
@@ -1,10 +1,16 @@
 # database/orm.py
 import asyncio
 import json
-from typing import Dict, List, Any, Optional, Type, TypeVar
+from typing import AsyncIterator, Dict, List, Any, Optional, Type, TypeVar
 from dataclasses import dataclass, field
 import sqlite3
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from urllib.parse import quote
 import aiosqlite
+
+from .pool import ConnectionPool
+from .transactions import Transaction, TransactionError
 from abc import ABC, abstractmethod
 
 T = TypeVar('T', bound='Model')
@@ -31,6 +37,10 @@ class Model(ABC):
             value = kwargs.get(field_name, field.default)
             setattr(self, field_name, value)
     
+    def to_dict(self) -> Dict[str, Any]:
+        """Get field values as a dictionary (used for JSON serialization)"""
+        return {field_name: getattr(self, field_name, None) for field_name in self._fields}
+    
     @classmethod
     def set_db_manager(cls, db_manager: 'DatabaseManager'):
         """Set database manager"""
@@ -58,7 +68,8 @@ class Model(ABC):
             fields_sql.append(field_sql)
         
         sql = f"CREATE TABLE IF NOT EXISTS {cls._table_name} ({', '.join(fields_sql)})"
-        await cls._db_manager.execute(sql)
+        async with cls._db_manager.ensure_transaction() as transaction:
+            await transaction.execute(sql)
     
     @classmethod
     async def find_by_id(cls: Type[T], id_value: Any) -> Optional[T]:
@@ -87,20 +98,37 @@ class Model(ABC):
         
         return [cls(**dict(row)) for row in results]
     
+    @classmethod
+    async def iterate_all(cls: Type[T], batch_size: int = 500) -> AsyncIterator[T]:
+        """Yield all records, fetching batch_size rows at a time"""
+        sql = f"SELECT * FROM {cls._table_name}"
+        async for row in cls._db_manager.iterate(sql, batch_size=batch_size):
+            yield cls(**dict(row))
+    
     async def save(self):
-        """Save record to database"""
+        """Save record to database
+        
+        Inside a transaction the record is only marked dirty; it is written
+        with the other dirty records before the transaction's next statement
+        or commit. Outside one, it is written and committed immediately.
+        """
         if not self._db_manager:
             raise ValueError("Database manager not set")
         
-        # Check if record exists (has primary key value)
-        primary_key_field = None
-        primary_key_value = None
-        
-        for field_name, field in self._fields.items():
+        async with self._db_manager.ensure_transaction() as transaction:
+            await transaction.add(self)
+    
+    @classmethod
+    def _primary_key_field(cls) -> Optional[str]:
+        for field_name, field in cls._fields.items():
             if field.primary_key:
-                primary_key_field = field_name
-                primary_key_value = getattr(self, field_name, None)
-                break
+                return field_name
+        return None
+    
+    def _save_statement(self):
+        """SQL and values that save this record, and whether the database assigns its key"""
+        primary_key_field = self._primary_key_field()
+        primary_key_value = getattr(self, primary_key_field, None) if primary_key_field else None
         
         if primary_key_value:
             # Update existing record
@@ -114,15 +142,21 @@ class Model(ABC):
             
             values.append(primary_key_value)
             sql = f"UPDATE {self._table_name} SET {', '.join(set_clauses)} WHERE {primary_key_field} = ?"
-        else:
-            # Insert new record
-            field_names = [name for name in self._fields if name != primary_key_field or getattr(self, name, None) is not None]
-            placeholders = ', '.join(['?' for _ in field_names])
-            values = [getattr(self, name) for name in field_names]
-            
-            sql = f"INSERT INTO {self._table_name} ({', '.join(field_names)}) VALUES ({placeholders})"
+            return sql, values, False
+        
+        # Insert new record
+        field_names = [name for name in self._fields if name != primary_key_field or getattr(self, name, None) is not None]
+        placeholders = ', '.join(['?' for _ in field_names])
+        values = [getattr(self, name) for name in field_names]
         
-        await self._db_manager.execute(sql, values)
+        sql = f"INSERT INTO {self._table_name} ({', '.join(field_names)}) VALUES ({placeholders})"
+        return sql, values, primary_key_field is not None and primary_key_field not in field_names
+    
+    def _set_primary_key(self, row_id: Any):
+        """Record the id the database assigned to a newly inserted record"""
+        primary_key_field = self._primary_key_field()
+        if primary_key_field and getattr(self, primary_key_field, None) is None:
+            setattr(self, primary_key_field, row_id)
     
     async def delete(self):
         """Delete record"""
@@ -139,52 +173,292 @@ class Model(ABC):
             raise ValueError("Cannot delete record without primary key")
         
         sql = f"DELETE FROM {self._table_name} WHERE {primary_key_field} = ?"
-        await self._db_manager.execute(sql, (primary_key_value,))
+        async with self._db_manager.ensure_transaction() as transaction:
+            transaction.unit_of_work.discard(self)
+            await transaction.execute(sql, (primary_key_value,))
+
+# Pragmas applied to every connection of a profile. "production" suits a
+# web server: WAL lets readers run alongside the writer, synchronous=NORMAL
+# stays crash-safe in WAL mode (only a power loss can drop the last commits),
+# and reads are served from memory-mapped pages and a larger page cache.
+SQLITE_PROFILES: Dict[str, Dict[str, Any]] = {
+    "default": {},
+    "production": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -64000,  # negative = KiB, so 64 MB per connection
+        "busy_timeout": 5000,  # milliseconds
+        "temp_store": "MEMORY",
+    },
+}
+
+# Database-wide settings that only the writer may change
+WRITER_ONLY_PRAGMAS = ("journal_mode",)
 
 class DatabaseManager:
-    """Database connection manager"""
+    """Database connection manager
+
+    Statements run on connections borrowed from a ``ConnectionPool``:
+    ``pool_size`` connections are kept open and up to ``max_overflow``
+    more are opened under load. An in-memory SQLite database exists only
+    inside the connection that created it, so it always gets a single
+    connection.
+
+    For a database file, ``pool`` holds read-only connections for
+    ``fetch_*``/``iterate`` and writes are serialized through ``writer``,
+    a single read-write connection. SQLite allows one writer at a time
+    anyway; queuing writes in the pool instead of on the file lock avoids
+    ``database is locked`` errors and busy-wait retries. With
+    ``profile="production"`` every connection also gets the tuned pragmas
+    in ``SQLITE_PROFILES`` (plus any ``pragmas`` overrides).
+
+    Outside WAL mode a reader blocks the writer's commit for as long as
+    its statement is open, and an in-memory database has only the one
+    connection, so there ``iterate`` reads all rows and releases its
+    connection before yielding the first one. In WAL mode it streams.
+
+    Writes happen in explicit transactions (``async with db.transaction():``)
+    that commit once for any number of statements. ``execute`` outside a
+    transaction raises ``TransactionError`` unless the manager was created
+    with ``autocommit=True``, in which case each call commits on its own.
+    ``Model.save()``/``delete()`` open a transaction themselves when none
+    is running.
+    """
     
-    def __init__(self, database_url: str):
+    def __init__(
+        self,
+        database_url: str,
+        pool_size: int = 10,
+        max_overflow: int = 20,
+        pool_timeout: Optional[float] = 30.0,
+        pool_min_size: int = 1,
+        pool_recycle_uses: Optional[int] = None,
+        pool_health_check_interval: float = 30.0,
+        profile: str = "default",
+        pragmas: Optional[Dict[str, Any]] = None,
+        autocommit: bool = False
+    ):
         self.database_url = database_url
-        self.connection = None
+        self.autocommit = autocommit
+        if not database_url.startswith('sqlite'):
+            raise ValueError("Only SQLite supported currently")
+        if profile not in SQLITE_PROFILES:
+            raise ValueError(f"Unknown database profile '{profile}' (choose from {', '.join(SQLITE_PROFILES)})")
+        self.profile = profile
+        self.pragmas = {**SQLITE_PROFILES[profile], **(pragmas or {})}
+        
+        self.database_path = database_url.replace('sqlite://', '', 1)
+        in_memory = self.database_path in (':memory:', '/:memory:', '')
+        if in_memory:
+            self.database_path = ':memory:'
+            pool_size, max_overflow, pool_min_size, pool_recycle_uses = 1, 0, 1, None
+        split = not in_memory
+        # Only WAL readers can keep a statement open while the writer commits
+        self.streaming_reads = split and str(self.pragmas.get("journal_mode", "")).upper() == "WAL"
+        
+        self.pool = ConnectionPool(
+            self._open_reader if split else self._open_connection,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            min_size=pool_min_size,
+            acquire_timeout=pool_timeout,
+            recycle_after=pool_recycle_uses,
+            health_check_interval=pool_health_check_interval
+        )
+        self.writer = self.pool
+        if split:
+            self.writer = ConnectionPool(
+                self._open_connection,
+                pool_size=1,
+                max_overflow=0,
+                min_size=1,
+                acquire_timeout=pool_timeout,
+                health_check_interval=pool_health_check_interval
+            )
+        self._connected = False
+        # The transaction open in each task; tasks created inside one inherit it
+        self._transaction: ContextVar[Optional[Transaction]] = ContextVar(f"abripy_transaction_{id(self)}", default=None)
+    
+    @classmethod
+    def from_config(cls, config) -> 'DatabaseManager':
+        """Create a manager from a ``DatabaseConfig``"""
+        return cls(
+            config.url,
+            pool_size=config.pool_size,
+            max_overflow=config.max_overflow,
+            pool_timeout=config.pool_timeout,
+            pool_min_size=config.pool_min_size,
+            pool_recycle_uses=config.pool_recycle_uses,
+            pool_health_check_interval=config.pool_health_check_interval,
+            profile=config.profile,
+            pragmas=config.pragmas,
+            autocommit=config.autocommit
+        )
+    
+    async def _open_connection(self, read_only: bool = False) -> aiosqlite.Connection:
+        if read_only:
+            connection = await aiosqlite.connect(f"file:{quote(self.database_path)}?mode=ro", uri=True)
+        else:
+            connection = await aiosqlite.connect(self.database_path)
+        connection.row_factory = aiosqlite.Row
+        for name, value in self.pragmas.items():
+            if read_only and name in WRITER_ONLY_PRAGMAS:
+                continue
+            await connection.execute(f"PRAGMA {name}={value}")
+        return connection
+    
+    async def _open_reader(self) -> aiosqlite.Connection:
+        return await self._open_connection(read_only=True)
     
     async def connect(self):
         """Connect to database"""
-        if self.database_url.startswith('sqlite'):
-            db_path = self.database_url.replace('sqlite://', '')
-            self.connection = await aiosqlite.connect(db_path)
-        else:
-            raise ValueError("Only SQLite supported currently")
+        if not self._connected:
+            self._connected = True
+            # The writer goes first: it creates the file and switches it to WAL
+            await self.writer.open()
+            if self.pool is not self.writer:
+                await self.pool.open()
     
     async def disconnect(self):
         """Disconnect from database"""
-        if self.connection:
-            await self.connection.close()
+        if self._connected:
+            self._connected = False
+            if self.pool is not self.writer:
+                await self.pool.close()
+            await self.writer.close()
+    
+    def metrics(self) -> Dict[str, Any]:
+        """Connection pool metrics (see ``ConnectionPool.metrics``)
+        
+        With a separate writer: ``{"readers": ..., "writer": ...}``.
+        """
+        if self.writer is self.pool:
+            return self.pool.metrics()
+        return {"readers": self.pool.metrics(), "writer": self.writer.metrics()}
+    
+    @property
+    def current_transaction(self) -> Optional[Transaction]:
+        """The transaction open in the current task, if any"""
+        return self._transaction.get()
+    
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[Transaction]:
+        """Run a block in a transaction: commit on success, roll back on error
+        
+        Nested blocks become savepoints. The transaction holds a writer
+        connection until the block ends.
+        """
+        current = self._transaction.get()
+        if current is not None:
+            async with current.savepoint():
+                yield current
+            return
+        
+        if not self._connected:
+            await self.connect()
+        
+        async with self.writer.acquire() as connection:
+            transaction = Transaction(connection)
+            token = self._transaction.set(transaction)
+            try:
+                # Take the write lock up front instead of failing to upgrade later
+                await connection.execute("BEGIN IMMEDIATE")
+                try:
+                    yield transaction
+                    await transaction.flush()
+                except BaseException:
+                    transaction.unit_of_work.clear()
+                    await connection.rollback()
+                    raise
+                await connection.commit()
+            finally:
+                self._transaction.reset(token)
+    
+    @asynccontextmanager
+    async def ensure_transaction(self) -> AsyncIterator[Transaction]:
+        """Join the current transaction, or run one of its own if there is none"""
+        current = self._transaction.get()
+        if current is not None:
+            yield current
+        else:
+            async with self.transaction() as transaction:
+                yield transaction
     
     async def execute(self, sql: str, params: tuple = None):
-        """Execute SQL statement"""
-        if not self.connection:
+        """Execute SQL statement
+        
+        Runs in the current transaction; outside one, only in autocommit mode.
+        """
+        transaction = self._transaction.get()
+        if transaction is not None:
+            return await transaction.execute(sql, params)
+        if not self.autocommit:
+            raise TransactionError(
+                "execute() outside a transaction: use 'async with db.transaction():' "
+                "or create the DatabaseManager with autocommit=True"
+            )
+        
+        if not self._connected:
             await self.connect()
         
-        async with self.connection.execute(sql, params or ()) as cursor:
-            await self.connection.commit()
-            return cursor.lastrowid
+        async with self.writer.acquire() as connection:
+            async with connection.execute(sql, params or ()) as cursor:
+                await connection.commit()
+                return cursor.lastrowid
     
     async def fetch_one(self, sql: str, params: tuple = None):
         """Fetch one record"""
-        if not self.connection:
+        transaction = self._transaction.get()
+        if transaction is not None:
+            return await transaction.fetch_one(sql, params)
+        if not self._connected:
             await self.connect()
         
-        async with self.connection.execute(sql, params or ()) as cursor:
-            return await cursor.fetchone()
+        async with self.pool.acquire() as connection:
+            async with connection.execute(sql, params or ()) as cursor:
+                return await cursor.fetchone()
     
     async def fetch_all(self, sql: str, params: tuple = None):
         """Fetch all records"""
-        if not self.connection:
+        transaction = self._transaction.get()
+        if transaction is not None:
+            return await transaction.fetch_all(sql, params)
+        if not self._connected:
+            await self.connect()
+        
+        async with self.pool.acquire() as connection:
+            async with connection.execute(sql, params or ()) as cursor:
+                return await cursor.fetchall()
+    
+    async def iterate(self, sql: str, params: tuple = None, batch_size: int = 500) -> AsyncIterator[Any]:
+        """Yield records one by one, fetching batch_size rows at a time
+        
+        With streaming reads (WAL mode) the connection stays checked out
+        until iteration finishes; otherwise every row is fetched and the
+        connection released before the first one is yielded.
+        """
+        transaction = self._transaction.get()
+        if transaction is not None:
+            async for row in transaction.iterate(sql, params, batch_size):
+                yield row
+            return
+        if not self._connected:
             await self.connect()
         
-        async with self.connection.execute(sql, params or ()) as cursor:
-            return await cursor.fetchall()
+        if not self.streaming_reads:
+            for row in await self.fetch_all(sql, params):
+                yield row
+            return
+        
+        async with self.pool.acquire() as connection:
+            async with connection.execute(sql, params or ()) as cursor:
+                while True:
+                    rows = await cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    for row in rows:
+                        yield row
 
 # Example model usage
 class User(Model):
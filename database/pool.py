@@ -0,0 +1,327 @@
+# database/pool.py
+"""
+Async connection pool for AbriPy Framework
+
+``DatabaseManager`` borrows a connection per statement instead of sharing
+one connection between every request, so concurrent queries don't queue
+behind each other and a slow query holds up only its own connection::
+
+    pool = ConnectionPool(lambda: aiosqlite.connect("app.db"), pool_size=10, max_overflow=20)
+    async with pool.acquire() as connection:
+        ...
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Optional, Set
+
+
+class PoolTimeout(Exception):
+    """No connection became available within the acquire timeout"""
+
+
+class PoolClosed(Exception):
+    """The pool was closed"""
+
+
+class PooledConnection:
+    """A raw connection plus the bookkeeping the pool needs"""
+
+    __slots__ = ("connection", "uses", "created_at", "last_used")
+
+    def __init__(self, connection: Any):
+        self.connection = connection
+        self.uses = 0
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+
+async def _ping(connection: Any) -> bool:
+    """Default health check: a trivial query must succeed"""
+    async with connection.execute("SELECT 1") as cursor:
+        await cursor.fetchone()
+    return True
+
+
+class ConnectionPool:
+    """Async connection pool
+
+    Keeps up to ``pool_size`` connections open and opens up to
+    ``max_overflow`` more under load; overflow connections are closed
+    when released if nobody is waiting. ``acquire()`` waits at most
+    ``acquire_timeout`` seconds (waiters are served first come, first
+    served) and raises ``PoolTimeout`` after that. Connections idle for
+    longer than ``health_check_interval`` are health-checked before being
+    handed out, and a connection is replaced after ``recycle_after`` uses.
+
+    ``metrics()`` reports pool size, utilization, and acquire wait times.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Awaitable[Any]],
+        pool_size: int = 10,
+        max_overflow: int = 20,
+        min_size: int = 1,
+        acquire_timeout: Optional[float] = 30.0,
+        recycle_after: Optional[int] = None,
+        health_check: Optional[Callable[[Any], Awaitable[bool]]] = _ping,
+        health_check_interval: float = 30.0,
+        close: Optional[Callable[[Any], Awaitable[None]]] = None,
+        max_samples: int = 1024
+    ):
+        if pool_size < 1:
+            raise ValueError("pool_size must be at least 1")
+        self._connect = connect
+        self._close = close or (lambda connection: connection.close())
+        self.pool_size = pool_size
+        self.max_overflow = max(max_overflow, 0)
+        self.min_size = min(max(min_size, 0), pool_size)
+        self.acquire_timeout = acquire_timeout
+        self.recycle_after = recycle_after
+        self.health_check = health_check
+        self.health_check_interval = health_check_interval
+
+        self._idle: Deque[PooledConnection] = deque()
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._size = 0  # open connections, including ones being opened
+        self._in_use = 0
+        self._closed = False
+        self._replacements: Set[asyncio.Task] = set()
+
+        # Metrics
+        self.acquisitions = 0
+        self.timeouts = 0
+        self.created = 0
+        self.recycled = 0
+        self.health_check_failures = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.wait_samples: Deque[float] = deque(maxlen=max_samples)
+        self.peak_in_use = 0
+
+    @property
+    def max_size(self) -> int:
+        return self.pool_size + self.max_overflow
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def in_use(self) -> int:
+        return self._in_use
+
+    @property
+    def idle(self) -> int:
+        return len(self._idle)
+
+    async def open(self):
+        """Open min_size connections up front"""
+        while self._size < self.min_size:
+            self._idle.append(await self._create())
+
+    async def close(self):
+        """Close idle connections now and in-use ones when they are released"""
+        self._closed = True
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_exception(PoolClosed("Connection pool closed"))
+        # Replacements still connecting would otherwise leak their connection
+        for task in list(self._replacements):
+            task.cancel()
+        await asyncio.gather(*self._replacements, return_exceptions=True)
+        while self._idle:
+            await self._discard(self._idle.pop())
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[Any]:
+        """Borrow a connection: ``async with pool.acquire() as connection:``"""
+        pooled = await self._acquire()
+        try:
+            yield pooled.connection
+        except BaseException:
+            await self._release(pooled, failed=True)
+            raise
+        await self._release(pooled)
+
+    async def _acquire(self) -> PooledConnection:
+        if self._closed:
+            raise PoolClosed("Connection pool closed")
+        started = time.monotonic()
+
+        while True:
+            pooled = await self._get_or_wait(started)
+            try:
+                healthy = await self._healthy(pooled)
+            except BaseException:
+                # Cancelled mid-check: the connection's state is unknown
+                self._in_use -= 1
+                await self._discard(pooled)
+                raise
+            if healthy:
+                break
+            # Replace the broken connection and try again
+            self.health_check_failures += 1
+            self._in_use -= 1
+            await self._discard(pooled)
+
+        waited = time.monotonic() - started
+        self.acquisitions += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+        self.wait_samples.append(waited)
+        return pooled
+
+    async def _get_or_wait(self, started: float) -> PooledConnection:
+        if self._idle and not self._waiters:
+            pooled = self._idle.pop()  # most recently used first: warmest caches
+        elif self._size < self.max_size and not self._waiters:
+            pooled = await self._create()
+        else:
+            pooled = await self._wait(started)
+        self._in_use += 1
+        self.peak_in_use = max(self.peak_in_use, self._in_use)
+        return pooled
+
+    async def _wait(self, started: float) -> PooledConnection:
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        timeout = None
+        if self.acquire_timeout is not None:
+            timeout = max(self.acquire_timeout - (time.monotonic() - started), 0)
+        try:
+            return await asyncio.wait_for(waiter, timeout)
+        except BaseException as e:
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+            if waiter.done() and not waiter.cancelled() and waiter.exception() is None:
+                # Handed a connection just as we timed out or were cancelled
+                self._put_back(waiter.result())
+            if isinstance(e, asyncio.TimeoutError):
+                self.timeouts += 1
+                raise PoolTimeout(
+                    f"No connection available within {self.acquire_timeout}s "
+                    f"(size={self._size}, in_use={self._in_use}, waiting={len(self._waiters)})"
+                ) from None
+            raise
+
+    async def _create(self) -> PooledConnection:
+        self._size += 1
+        try:
+            connection = await self._connect()
+        except BaseException:
+            self._size -= 1
+            raise
+        self.created += 1
+        return PooledConnection(connection)
+
+    async def _healthy(self, pooled: PooledConnection) -> bool:
+        if self.health_check is None:
+            return True
+        if time.monotonic() - pooled.last_used < self.health_check_interval:
+            return True
+        try:
+            return bool(await self.health_check(pooled.connection))
+        except Exception:
+            return False
+
+    async def _release(self, pooled: PooledConnection, failed: bool = False):
+        self._in_use -= 1
+        pooled.uses += 1
+        pooled.last_used = time.monotonic()
+
+        if failed:
+            # Leave no half-finished transaction behind for the next borrower
+            try:
+                if getattr(pooled.connection, "in_transaction", False):
+                    await pooled.connection.rollback()
+            except Exception:
+                await self._discard(pooled)
+                return
+
+        if self._closed:
+            await self._discard(pooled)
+        elif self.recycle_after and pooled.uses >= self.recycle_after:
+            self.recycled += 1
+            await self._discard(pooled)
+        elif self._size > self.pool_size and not self._has_waiters():
+            # Overflow connections don't outlive the burst that needed them
+            await self._discard(pooled)
+        else:
+            self._put_back(pooled)
+
+    def _has_waiters(self) -> bool:
+        return any(not waiter.done() for waiter in self._waiters)
+
+    def _put_back(self, pooled: PooledConnection):
+        """Hand a connection to the longest waiter, or return it to the idle set"""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(pooled)
+                return
+        self._idle.append(pooled)
+
+    async def _discard(self, pooled: PooledConnection):
+        self._size -= 1
+        try:
+            await self._close(pooled.connection)
+        except Exception:
+            pass
+        if self._has_waiters() and not self._closed:
+            # Open a replacement for whoever is waiting
+            task = asyncio.ensure_future(self._replace())
+            self._replacements.add(task)
+            task.add_done_callback(self._replacements.discard)
+
+    async def _replace(self):
+        if self._size >= self.max_size or not self._has_waiters():
+            return
+        try:
+            pooled = await self._create()
+        except Exception as e:
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                if not waiter.done():
+                    waiter.set_exception(e)
+                    break
+            return
+        if self._closed:
+            await self._discard(pooled)
+            return
+        self._put_back(pooled)
+
+    @staticmethod
+    def _percentile(samples, fraction: float) -> float:
+        if not samples:
+            return 0.0
+        ordered = sorted(samples)
+        return ordered[max(math.ceil(fraction * len(ordered)) - 1, 0)]
+
+    def metrics(self) -> Dict[str, Any]:
+        """Size, utilization and acquire wait statistics (times in milliseconds)"""
+        return {
+            "size": self._size,
+            "idle": len(self._idle),
+            "in_use": self._in_use,
+            "waiting": len(self._waiters),
+            "max_size": self.max_size,
+            "utilization": self._in_use / self.max_size,
+            "peak_in_use": self.peak_in_use,
+            "acquisitions": self.acquisitions,
+            "timeouts": self.timeouts,
+            "created": self.created,
+            "recycled": self.recycled,
+            "health_check_failures": self.health_check_failures,
+            "wait_avg_ms": (self.total_wait / self.acquisitions * 1000) if self.acquisitions else 0.0,
+            "wait_p50_ms": self._percentile(self.wait_samples, 0.50) * 1000,
+            "wait_p99_ms": self._percentile(self.wait_samples, 0.99) * 1000,
+            "wait_max_ms": self.max_wait * 1000,
+        }
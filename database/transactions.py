@@ -0,0 +1,199 @@
+# database/transactions.py
+"""
+Explicit transactions for AbriPy Framework
+
+``async with db.transaction():`` runs every statement issued by the
+current task on one writer connection and commits once at the end (or
+rolls back if the block raises). Nested ``transaction()`` blocks become
+savepoints, so an inner failure undoes only the inner block::
+
+    async with db.transaction():
+        for row in rows:
+            await Reading(**row).save()      # queued, not written yet
+        async with db.transaction():         # SAVEPOINT
+            await audit.save()
+    # all readings and the audit row are written and committed together
+
+Inside a transaction, ``Model.save()`` only marks the model dirty in the
+transaction's ``UnitOfWork``; dirty models are written just before the
+next statement, savepoint boundary or commit.
+
+Tasks started inside a transaction share it. Their statements are
+serialized on its connection, and a savepoint is exclusive: other tasks
+working at the same level wait until it ends, so rolling it back never
+undoes their work. Tasks started inside a savepoint work within it.
+"""
+
+import asyncio
+import itertools
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+
+class TransactionError(Exception):
+    """A statement needs a transaction, or a transaction was misused"""
+
+
+class UnitOfWork:
+    """Models saved in a transaction, written together when flushed
+
+    Saving a model twice writes it once, with its latest values.
+    Consecutive statements with the same SQL (updates of one model class,
+    inserts that carry their own primary key) are sent with executemany.
+    """
+
+    __slots__ = ("_dirty",)
+
+    def __init__(self):
+        self._dirty: Dict[int, Any] = {}
+
+    def __len__(self) -> int:
+        return len(self._dirty)
+
+    def add(self, model: Any):
+        self._dirty[id(model)] = model
+
+    def discard(self, model: Any):
+        self._dirty.pop(id(model), None)
+
+    def clear(self):
+        self._dirty.clear()
+
+    async def flush(self, connection) -> int:
+        """Write every dirty model on connection; returns how many were written"""
+        if not self._dirty:
+            return 0
+        dirty, self._dirty = list(self._dirty.values()), {}
+
+        batch_sql: Optional[str] = None
+        batch: List[Tuple] = []
+        for model in dirty:
+            sql, values, needs_key = model._save_statement()
+            if sql != batch_sql or needs_key:
+                if batch:
+                    await connection.executemany(batch_sql, batch)
+                batch_sql, batch = None, []
+            if needs_key:
+                # The new row's id is only known from this statement's cursor
+                async with connection.execute(sql, values) as cursor:
+                    model._set_primary_key(cursor.lastrowid)
+            else:
+                batch_sql = sql
+                batch.append(tuple(values))
+        if batch:
+            await connection.executemany(batch_sql, batch)
+        return len(dirty)
+
+
+class _Scope:
+    """A transaction or one of its savepoints
+
+    The lock is held for each statement issued at this level and for the
+    whole of each savepoint opened directly inside it.
+    """
+
+    __slots__ = ("transaction", "name", "lock")
+
+    def __init__(self, transaction: "Transaction", name: Optional[str]):
+        self.transaction = transaction
+        self.name = name
+        self.lock = asyncio.Lock()
+
+
+# The savepoint the current task is working in, inherited by tasks it starts
+_current_scope: ContextVar[Optional[_Scope]] = ContextVar("abripy_savepoint", default=None)
+
+
+class Transaction:
+    """A transaction, shared by the task that opened it and the tasks it starts
+
+    Statements go through the transaction's connection, after any dirty
+    models have been flushed so they see everything saved so far.
+    """
+
+    __slots__ = ("connection", "unit_of_work", "_root", "_savepoint_ids")
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.unit_of_work = UnitOfWork()
+        self._root = _Scope(self, None)
+        self._savepoint_ids = itertools.count(1)
+
+    def _scope(self) -> _Scope:
+        scope = _current_scope.get()
+        if scope is None or scope.transaction is not self:
+            return self._root
+        return scope
+
+    async def add(self, model: Any):
+        """Mark a model dirty, to be written at the next flush"""
+        async with self._scope().lock:
+            self.unit_of_work.add(model)
+
+    async def flush(self) -> int:
+        return await self.unit_of_work.flush(self.connection)
+
+    async def execute(self, sql: str, params: tuple = None):
+        async with self._scope().lock:
+            await self.flush()
+            async with self.connection.execute(sql, params or ()) as cursor:
+                return cursor.lastrowid
+
+    async def executemany(self, sql: str, params_seq):
+        async with self._scope().lock:
+            await self.flush()
+            await self.connection.executemany(sql, params_seq)
+
+    async def fetch_one(self, sql: str, params: tuple = None):
+        async with self._scope().lock:
+            await self.flush()
+            async with self.connection.execute(sql, params or ()) as cursor:
+                return await cursor.fetchone()
+
+    async def fetch_all(self, sql: str, params: tuple = None):
+        async with self._scope().lock:
+            await self.flush()
+            async with self.connection.execute(sql, params or ()) as cursor:
+                return await cursor.fetchall()
+
+    async def iterate(self, sql: str, params: tuple = None, batch_size: int = 500) -> AsyncIterator[Any]:
+        # Locked per batch, so the loop body may issue statements of its own
+        lock = self._scope().lock
+        async with lock:
+            await self.flush()
+            cursor = await self.connection.execute(sql, params or ())
+        try:
+            while True:
+                async with lock:
+                    rows = await cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield row
+        finally:
+            await cursor.close()
+
+    @asynccontextmanager
+    async def savepoint(self) -> AsyncIterator["Transaction"]:
+        """Nested block that can roll back without aborting the whole transaction"""
+        parent = self._scope()
+        async with parent.lock:
+            # Models saved before the savepoint belong outside it
+            await self.flush()
+            scope = _Scope(self, f"abripy_sp_{next(self._savepoint_ids)}")
+            await self.connection.execute(f"SAVEPOINT {scope.name}")
+            token = _current_scope.set(scope)
+            try:
+                yield self
+                async with scope.lock:
+                    await self.flush()
+            except BaseException:
+                self.unit_of_work.clear()
+                await self.connection.execute(f"ROLLBACK TO SAVEPOINT {scope.name}")
+                await self.connection.execute(f"RELEASE SAVEPOINT {scope.name}")
+                raise
+            else:
+                await self.connection.execute(f"RELEASE SAVEPOINT {scope.name}")
+            finally:
+                _current_scope.reset(token)
@@ -1,9 +1,12 @@
 # testing/__init__.py
 from .client import TestClient
 from .fixtures import create_test_app, create_test_user
+from .transport import InMemoryTransport, TransportResponse
 
 __all__ = [
     'TestClient',
     'create_test_app', 
-    'create_test_user'
+    'create_test_user',
+    'InMemoryTransport',
+    'TransportResponse'
 ]
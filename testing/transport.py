@@ -0,0 +1,86 @@
+# testing/transport.py
+import asyncio
+from typing import Dict, Any, List, Optional, Tuple, Callable
+
+
+class TransportResponse:
+    """Response captured from an in-memory ASGI call"""
+
+    def __init__(self):
+        self.status_code: Optional[int] = None
+        self.headers: List[Tuple[bytes, bytes]] = []
+        self.body_parts: List[bytes] = []
+
+    @property
+    def body(self) -> bytes:
+        """Get the full response body"""
+        return b"".join(self.body_parts)
+
+    def __repr__(self) -> str:
+        return f"<TransportResponse {self.status_code}>"
+
+
+class InMemoryTransport:
+    """Drive an ASGI app in-process without any network I/O"""
+
+    def __init__(self, app: Callable, host: str = "testserver", port: int = 80):
+        self.app = app
+        self.server = (host, port)
+        self.client = ("127.0.0.1", 50000)
+
+    def build_scope(self, method: str, path: str, headers: Dict[str, str] = None,
+                    body: bytes = b"") -> Dict[str, Any]:
+        """Build an HTTP scope for a single request"""
+        path, _, query_string = path.partition("?")
+        raw_headers = [(b"host", self.server[0].encode("latin1"))]
+        for name, value in (headers or {}).items():
+            raw_headers.append((name.lower().encode("latin1"), value.encode("latin1")))
+        if body:
+            raw_headers.append((b"content-length", str(len(body)).encode("latin1")))
+
+        return {
+            "type": "http",
+            "asgi": {"version": "3.0", "spec_version": "2.3"},
+            "http_version": "1.1",
+            "method": method.upper(),
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode("latin1"),
+            "query_string": query_string.encode("latin1"),
+            "root_path": "",
+            "headers": raw_headers,
+            "client": self.client,
+            "server": self.server,
+        }
+
+    async def request(self, method: str, path: str, headers: Dict[str, str] = None,
+                      body: bytes = b"") -> TransportResponse:
+        """Send one request through the app and collect the response"""
+        scope = self.build_scope(method, path, headers, body)
+        response = TransportResponse()
+        request_sent = False
+        response_complete = asyncio.Event()
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            # Like a real server, only report a disconnect once the response is done
+            await response_complete.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                response.status_code = message["status"]
+                response.headers = [tuple(header) for header in message.get("headers", [])]
+            elif message["type"] == "http.response.body":
+                response.body_parts.append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    response_complete.set()
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            response_complete.set()
+        return response
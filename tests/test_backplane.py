@@ -0,0 +1,209 @@
+# tests/test_backplane.py
+import asyncio
+import fcntl
+import os
+import subprocess
+import sys
+import uuid
+
+import pytest
+
+from web.backplane import MemoryBackplane, MemoryHub, SharedMemoryBackplane, UnixSocketBackplane, UnixSocketBroker
+from web.websockets import WebSocketConnection, WebSocketManager
+
+
+class RecordingWebSocket:
+    """Just enough of ASGIWebSocket for outbound frames"""
+
+    def __init__(self):
+        self.sent = []
+
+    async def send_text(self, data):
+        self.sent.append(data)
+
+    async def send_bytes(self, data):
+        self.sent.append(data)
+
+    async def close(self, code=1000, reason=""):
+        pass
+
+
+def member(manager, room="lobby"):
+    websocket = RecordingWebSocket()
+    connection = WebSocketConnection(websocket)
+    manager.add_connection(connection)
+    manager.join_room(connection.connection_id, room)
+    return websocket
+
+
+async def eventually(condition, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("condition not met in time")
+        await asyncio.sleep(0.005)
+
+
+async def test_memory_backplane_fans_out_across_managers():
+    hub = MemoryHub()
+    managers = [WebSocketManager() for _ in range(3)]
+    for manager in managers:
+        await manager.attach_backplane(MemoryBackplane(hub))
+    sockets = [member(manager) for manager in managers]
+    outsider = member(managers[1], room="other")
+
+    for index in range(5):
+        await managers[0].broadcast_to_room("lobby", {"type": "tick", "n": index})
+    await eventually(lambda: all(len(websocket.sent) == 5 for websocket in sockets))
+
+    # Same-iteration broadcasts travel as one batch, and nobody gets their own twice
+    assert len(hub.payloads) == 1
+    assert sockets[0].sent == sockets[2].sent
+    assert outsider.sent == []
+    for manager in managers:
+        await manager.detach_backplane()
+
+
+async def test_worker_that_lost_the_race_joins_the_elected_broker(tmp_path, monkeypatch):
+    path = str(tmp_path / "backplane.sock")
+    first, second = UnixSocketBackplane(path), UnixSocketBackplane(path)
+    received = []
+    await first.start(lambda room, frame, key: None)
+
+    # second looked for the broker just before first had bound its socket
+    open_unix_connection = asyncio.open_unix_connection
+    attempts = []
+
+    async def missed_once(*args, **kwargs):
+        attempts.append(args)
+        if len(attempts) == 1:
+            raise FileNotFoundError(path)
+        return await open_unix_connection(*args, **kwargs)
+
+    monkeypatch.setattr(asyncio, "open_unix_connection", missed_once)
+    await second.start(lambda room, frame, key: received.append(frame))
+    monkeypatch.undo()
+    assert first.broker is not None and second.broker is None
+
+    first.publish("lobby", "hello")
+    first.flush()
+    await eventually(lambda: received == ["hello"])
+
+    await second.stop()
+    await first.stop()
+    assert not os.path.exists(path)
+
+
+async def test_second_broker_does_not_take_over_the_path(tmp_path):
+    path = str(tmp_path / "broker.sock")
+    first, second = UnixSocketBroker(path), UnixSocketBroker(path)
+    await first.start()
+    with pytest.raises(BlockingIOError):
+        await second.start()
+    await second.close()
+    reader, writer = await asyncio.open_unix_connection(path)
+    writer.close()
+    await first.close()
+
+
+async def test_broker_close_is_quiet_with_peers_connected(tmp_path):
+    path = str(tmp_path / "broker.sock")
+    errors = []
+    asyncio.get_running_loop().set_exception_handler(lambda loop, context: errors.append(context))
+    broker = UnixSocketBroker(path)
+    await broker.start()
+    peers = [await asyncio.open_unix_connection(path) for _ in range(3)]
+    await eventually(lambda: len(broker._peer_tasks) == 3)
+
+    await broker.close()
+    await asyncio.sleep(0.01)
+    assert errors == []
+    assert not broker._peer_tasks
+    for _, writer in peers:
+        writer.close()
+
+
+@pytest.fixture
+def transport(request, tmp_path):
+    if request.param == "unix":
+        path = str(tmp_path / "backplane.sock")
+        yield lambda: UnixSocketBackplane(path, reconnect_delay=0.01)
+    else:
+        name = f"abripy-test-{uuid.uuid4().hex[:12]}"
+        yield lambda: SharedMemoryBackplane(name, size=64 * 1024, poll_interval=0.001)
+        SharedMemoryBackplane(name).unlink()
+
+
+@pytest.mark.parametrize("transport", ["unix", "shared_memory"], indirect=True)
+async def test_backplane_survives_malformed_batch(transport):
+    sender, receiver = transport(), transport()
+    received = []
+    await sender.start(lambda room, frame, key: None)
+    await receiver.start(lambda room, frame, key: received.append(frame))
+
+    sender.publish("lobby", "before")
+    sender.flush()
+    await eventually(lambda: received == ["before"])
+
+    sender.send_batch(b"\xffnot a batch")
+    sender.send_batch(b'["someone-else", [["lobby"]]]')
+    sender.publish("lobby", "after")
+    sender.flush()
+    await eventually(lambda: received == ["before", "after"])
+    assert receiver.dropped == 2
+
+    await sender.stop()
+    await receiver.stop()
+
+
+@pytest.mark.skipif(not os.path.isdir("/dev/shm"), reason="segments are not visible as files")
+def test_shared_memory_segment_outlives_the_worker_that_created_it():
+    name = f"abripy-test-{uuid.uuid4().hex[:12]}"
+    script = (
+        "import asyncio, sys\n"
+        "from web.backplane import SharedMemoryBackplane\n"
+        "backplane = SharedMemoryBackplane(sys.argv[1], size=4096)\n"
+        "async def main():\n"
+        "    await backplane.start(lambda room, frame, key: None)\n"
+        "    backplane.publish('lobby', 'kept')\n"
+        "    await backplane.stop()\n"
+        "asyncio.run(main())\n"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        result = subprocess.run([sys.executable, "-c", script, name], cwd=root, capture_output=True, text=True, timeout=30)
+        assert result.returncode == 0, result.stderr
+        assert "leaked" not in result.stderr
+        assert os.path.exists(f"/dev/shm/{name}")
+    finally:
+        SharedMemoryBackplane(name).unlink()
+
+
+async def test_shared_memory_send_does_not_block_on_held_lock():
+    name = f"abripy-test-{uuid.uuid4().hex[:12]}"
+    sender = SharedMemoryBackplane(name, size=64 * 1024, poll_interval=0.001)
+    receiver = SharedMemoryBackplane(name, size=64 * 1024, poll_interval=0.001)
+    received = []
+    try:
+        await sender.start(lambda room, frame, key: None)
+        await receiver.start(lambda room, frame, key: received.append(frame))
+
+        # Another process holding the lock (a separate open file description)
+        other = os.open(sender.lock_path, os.O_RDWR)
+        fcntl.flock(other, fcntl.LOCK_EX)
+        try:
+            sender.publish("lobby", "first")
+            sender.flush()
+            sender.publish("lobby", "second")
+            sender.flush()
+            await asyncio.sleep(0.02)
+            assert received == []
+        finally:
+            fcntl.flock(other, fcntl.LOCK_UN)
+            os.close(other)
+
+        await eventually(lambda: received == ["first", "second"])
+        await sender.stop()
+        await receiver.stop()
+    finally:
+        sender.unlink()
@@ -0,0 +1,39 @@
+# tests/test_bench.py
+import tracemalloc
+
+import pytest
+
+from cli.bench import BenchRequest, BenchRunner, run_bench
+from core.application import AbriPy
+from core.config import Config
+
+
+@pytest.fixture
+def app():
+    config = Config()
+    config.logging.access_log = False
+    app = AbriPy(config)
+
+    @app.get("/")
+    async def index(request):
+        return {"items": list(range(100))}
+
+    return app
+
+
+def test_report_labels_retained_blocks(app):
+    result = run_bench(app, [BenchRequest()], requests=20, concurrency=2, warmup=2, alloc_requests=10)
+    assert result.status_counts == {200: 20}
+    assert result.alloc_bytes_per_request > 0
+    report = result.report()
+    assert "retained blocks" in report
+    assert "net blocks" not in report
+
+
+async def test_allocation_pass_works_without_reset_peak(app, monkeypatch):
+    # tracemalloc.reset_peak() only exists on Python 3.9+
+    monkeypatch.delattr(tracemalloc, "reset_peak", raising=False)
+    runner = BenchRunner(app, [BenchRequest()])
+    peak, retained = await runner.measure_allocations(10)
+    assert peak > 0
+    assert isinstance(retained, float)
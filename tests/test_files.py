@@ -0,0 +1,143 @@
+# tests/test_files.py
+import os
+
+import pytest
+
+from web.files import MAX_RANGES, FileResponse, make_etag, parse_range_header
+
+CONTENT = bytes(range(256)) * 40  # 10240 bytes
+
+
+@pytest.fixture
+def path(tmp_path):
+    file_path = tmp_path / "data.bin"
+    file_path.write_bytes(CONTENT)
+    return str(file_path)
+
+
+async def call(response, headers=None, method="GET", extensions=None):
+    scope = {
+        "type": "http",
+        "method": method,
+        "headers": [(name.encode("latin1"), value.encode("latin1")) for name, value in (headers or {}).items()],
+    }
+    if extensions is not None:
+        scope["extensions"] = extensions
+    messages = []
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        messages.append(message)
+
+    await response(scope, receive, send)
+    start = messages[0]
+    body = b"".join(message.get("body", b"") for message in messages[1:])
+    return start["status"], {name.decode(): value.decode() for name, value in start["headers"]}, body, messages
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("bytes=0-99", [(0, 100)]),
+    ("bytes=100-", [(100, 1000)]),
+    ("bytes=-100", [(900, 1000)]),
+    ("bytes=0-10,5-20,50-60", [(0, 21), (50, 61)]),
+    ("bytes=900-5000", [(900, 1000)]),
+    ("bytes=1000-1100", []),
+    ("bytes=-0", []),
+    ("items=0-10", None),
+    ("bytes=abc-def", None),
+    ("bytes=" + ",".join(["0-1"] * (MAX_RANGES + 1)), None),
+])
+def test_parse_range_header(value, expected):
+    assert parse_range_header(value, 1000) == expected
+
+
+async def test_full_file(path):
+    status, headers, body, _ = await call(FileResponse(path))
+    assert status == 200
+    assert body == CONTENT
+    assert headers["content-length"] == str(len(CONTENT))
+    assert headers["accept-ranges"] == "bytes"
+    assert headers["etag"] == make_etag(os.stat(path))
+
+
+@pytest.mark.parametrize("use_mmap", [False, True])
+async def test_single_range(path, use_mmap):
+    response = FileResponse(path, chunk_size=1000, use_mmap=use_mmap)
+    status, headers, body, _ = await call(response, {"range": "bytes=100-2599"})
+    assert status == 206
+    assert body == CONTENT[100:2600]
+    assert headers["content-range"] == f"bytes 100-2599/{len(CONTENT)}"
+    assert headers["content-length"] == "2500"
+
+
+async def test_suffix_range(path):
+    status, headers, body, _ = await call(FileResponse(path), {"range": "bytes=-10"})
+    assert status == 206
+    assert body == CONTENT[-10:]
+
+
+async def test_multiple_ranges_are_multipart(path):
+    status, headers, body, _ = await call(FileResponse(path), {"range": "bytes=0-9,100-109"})
+    assert status == 206
+    content_type = headers["content-type"]
+    assert content_type.startswith("multipart/byteranges; boundary=")
+    boundary = content_type.split("boundary=")[1].encode()
+    assert int(headers["content-length"]) == len(body)
+    parts = body.split(b"--" + boundary)
+    assert parts[-1] == b"--\r\n"
+    assert parts[1].endswith(CONTENT[0:10] + b"\r\n")
+    assert b"content-range: bytes 100-109/" in parts[2]
+    assert parts[2].endswith(CONTENT[100:110] + b"\r\n")
+
+
+@pytest.mark.parametrize("range_value", ["bytes=20000-", "bytes=10240-10300"])
+async def test_unsatisfiable_range_is_416(path, range_value):
+    status, headers, body, _ = await call(FileResponse(path), {"range": range_value})
+    assert status == 416
+    assert headers["content-range"] == f"bytes */{len(CONTENT)}"
+    assert body == b""
+
+
+async def test_malformed_range_is_ignored(path):
+    status, _, body, _ = await call(FileResponse(path), {"range": "pages=1-2"})
+    assert status == 200
+    assert body == CONTENT
+
+
+async def test_if_range_mismatch_sends_whole_file(path):
+    status, _, body, _ = await call(FileResponse(path), {"range": "bytes=0-9", "if-range": '"stale"'})
+    assert status == 200
+    assert body == CONTENT
+
+    etag = make_etag(os.stat(path))
+    status, _, body, _ = await call(FileResponse(path), {"range": "bytes=0-9", "if-range": etag})
+    assert status == 206
+    assert body == CONTENT[:10]
+
+
+async def test_if_none_match_is_304(path):
+    etag = make_etag(os.stat(path))
+    status, headers, body, _ = await call(FileResponse(path), {"if-none-match": etag})
+    assert status == 304
+    assert body == b""
+    assert "content-type" not in headers
+
+
+async def test_head_range_sends_headers_only(path):
+    status, headers, body, _ = await call(FileResponse(path), {"range": "bytes=0-9"}, method="HEAD")
+    assert status == 206
+    assert headers["content-length"] == "10"
+    assert body == b""
+
+
+async def test_pathsend_extension_used_for_whole_file(path):
+    status, _, _, messages = await call(FileResponse(path), extensions={"http.response.pathsend": {}})
+    assert status == 200
+    assert messages[1] == {"type": "http.response.pathsend", "path": path}
+
+
+async def test_missing_file_is_404(tmp_path):
+    status, _, _, _ = await call(FileResponse(str(tmp_path / "missing.bin")))
+    assert status == 404
@@ -0,0 +1,124 @@
+# tests/test_forms.py
+import pytest
+
+from core.application import AbriPy
+from core.config import Config
+from core.exceptions import RequestEntityTooLarge, ValidationError
+from testing import InMemoryTransport
+from web.datastructures import UploadFile
+from web.forms import MultiPartParser
+
+BOUNDARY = b"----abripyboundary"
+CONTENT_TYPE = b"multipart/form-data; boundary=" + BOUNDARY
+
+
+def multipart(*parts):
+    body = b""
+    for name, value, filename in parts:
+        disposition = b'form-data; name="' + name.encode() + b'"'
+        if filename is not None:
+            disposition += b'; filename="' + filename.encode() + b'"'
+        body += b"--" + BOUNDARY + b"\r\ncontent-disposition: " + disposition + b"\r\n"
+        if filename is not None:
+            body += b"content-type: text/plain\r\n"
+        body += b"\r\n" + value + b"\r\n"
+    return body + b"--" + BOUNDARY + b"--\r\n"
+
+
+async def chunked(body, size=7):
+    for start in range(0, len(body), size):
+        yield body[start:start + size]
+
+
+def parser(body, **limits):
+    return MultiPartParser(CONTENT_TYPE, chunked(body), **limits)
+
+
+async def test_parses_fields_and_files_across_chunk_boundaries():
+    payload = b"x" * 5000
+    form = await parser(multipart(
+        ("title", b"hello", None),
+        ("tag", b"a", None),
+        ("tag", b"b", None),
+        ("upload", payload, "data.txt"),
+    )).parse()
+    try:
+        assert form["title"] == "hello"
+        assert form.getlist("tag") == ["a", "b"]
+        upload = form["upload"]
+        assert upload.filename == "data.txt"
+        assert upload.content_type == "text/plain"
+        assert upload.size == len(payload)
+        assert await upload.read() == payload
+    finally:
+        await form.close()
+
+
+@pytest.mark.parametrize("cut", [10, 60, -30, -3])
+async def test_truncated_body_is_rejected(cut):
+    body = multipart(("title", b"hello", None), ("upload", b"y" * 100, "data.txt"))
+    with pytest.raises(ValidationError):
+        await parser(body[:cut]).parse()
+
+
+async def test_missing_boundary_is_rejected():
+    with pytest.raises(ValidationError):
+        await MultiPartParser(b"multipart/form-data", chunked(b"")).parse()
+
+
+async def test_size_limits_raise_413():
+    body = multipart(("upload", b"z" * 100, "data.txt"))
+    with pytest.raises(RequestEntityTooLarge):
+        await parser(body, max_file_size=50).parse()
+    body = multipart(("title", b"z" * 100, None))
+    with pytest.raises(RequestEntityTooLarge):
+        await parser(body, max_field_size=50).parse()
+
+
+async def test_truncated_upload_gets_400_from_the_app():
+    config = Config()
+    config.logging.access_log = False
+    app = AbriPy(config)
+
+    @app.post("/upload")
+    async def upload(request):
+        form = await request.form()
+        return {"size": form["upload"].size}
+
+    transport = InMemoryTransport(app)
+    headers = {"content-type": CONTENT_TYPE.decode()}
+    body = multipart(("upload", b"q" * 1000, "data.txt"))
+
+    response = await transport.request("POST", "/upload", headers, body)
+    assert response.status_code == 200
+    assert response.body == b'{"size":1000}'
+
+    response = await transport.request("POST", "/upload", headers, body[:-40])
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("size", [100, 5000])
+async def test_upload_file_save_and_rollover(tmp_path, size):
+    upload = UploadFile("data.bin", spool_max_size=1024)
+    data = bytes(range(256)) * (size // 256) + b"!" * (size % 256)
+    for start in range(0, len(data), 300):
+        await upload.write(data[start:start + 300])
+    assert upload.size == len(data)
+    assert upload.in_memory == (size <= 1024)
+
+    target = tmp_path / "saved.bin"
+    await upload.save(target)
+    assert target.read_bytes() == data
+    assert b"".join([chunk async for chunk in upload.chunks(100)]) == data
+    await upload.close()
+
+
+async def test_upload_file_rolls_over_once_past_the_spool_size():
+    upload = UploadFile("data.bin", spool_max_size=10)
+    await upload.write(b"0123456789")
+    assert upload.in_memory
+    upload.write_sync(b"a")
+    assert not upload.in_memory
+    await upload.seek(0)
+    assert await upload.read() == b"0123456789a"
+    await upload.close()
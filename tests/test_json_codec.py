@@ -0,0 +1,70 @@
+# tests/test_json_codec.py
+import pytest
+
+from core.application import AbriPy
+from core.config import Config
+from testing import InMemoryTransport
+from web.json_codec import JSONCodec, get_json_codec, set_json_codec
+from web.response import Response
+
+
+class Point:
+    def __init__(self, x, y):
+        self.x, self.y = x, y
+
+
+def make_app(codec_name):
+    config = Config()
+    config.logging.access_log = False
+    config.json_codec = codec_name
+    app = AbriPy(config)
+
+    @app.post("/echo")
+    async def echo(request):
+        return Response.json({"codec": get_json_codec().name, "body": await request.json()})
+
+    @app.get("/point")
+    async def point(request):
+        return Response.json({"point": Point(1, 2)})
+
+    return app
+
+
+@pytest.fixture(autouse=True)
+def restore_default_codec():
+    default = get_json_codec()
+    yield
+    set_json_codec(default)
+
+
+async def test_each_app_keeps_its_own_codec():
+    pytest.importorskip("orjson")
+    first, second = make_app("json"), make_app("orjson")
+    assert first.json_codec is not second.json_codec
+
+    for app, name in ((first, "json"), (second, "orjson")):
+        response = await InMemoryTransport(app).request(
+            "POST", "/echo", {"content-type": "application/json"}, b'{"n": 1}'
+        )
+        assert response.status_code == 200
+        assert get_json_codec().loads(response.body) == {"codec": name, "body": {"n": 1}}
+
+
+async def test_encoders_registered_on_one_app_do_not_leak_into_another():
+    first, second = make_app("json"), make_app("json")
+    first.json_codec.register(Point, lambda point: [point.x, point.y])
+
+    response = await InMemoryTransport(first).request("GET", "/point")
+    assert response.status_code == 200
+    assert response.body == b'{"point":[1,2]}'
+
+    response = await InMemoryTransport(second).request("GET", "/point")
+    assert response.status_code == 500
+
+
+def test_creating_an_app_leaves_the_default_codec_alone():
+    default = JSONCodec()
+    set_json_codec(default)
+    app = make_app("json")
+    assert get_json_codec() is default
+    assert app.json_codec is not default
@@ -0,0 +1,104 @@
+# tests/test_log.py
+import logging
+import sys
+
+import pytest
+from click.testing import CliRunner
+
+from cli.commands import cli
+from core.application import AbriPy
+from core.config import Config
+from core.log import logger
+from testing import InMemoryTransport
+
+
+@pytest.fixture
+def config():
+    config = Config()
+    config.logging.access_log = False
+    return config
+
+
+@pytest.fixture(autouse=True)
+def restore_logger():
+    handlers, level, propagate = list(logger.handlers), logger.level, logger.propagate
+    yield
+    logger.handlers[:] = handlers
+    logger.setLevel(level)
+    logger.propagate = propagate
+
+
+def test_creating_an_app_leaves_logging_alone(config):
+    handlers = list(logger.handlers)
+    app = AbriPy(config)
+    assert logger.handlers == handlers
+    assert logger.propagate
+    assert not app.log_manager.started
+
+
+async def test_first_request_starts_logging_and_records_still_propagate(config, caplog):
+    app = AbriPy(config)
+
+    @app.get("/boom")
+    async def boom(request):
+        raise RuntimeError("boom")
+
+    response = await InMemoryTransport(app).request("GET", "/boom")
+    try:
+        assert response.status_code == 500
+        assert app.log_manager.started
+        assert app.log_manager.handler in logger.handlers
+        assert logger.propagate
+        assert any("Error handling request GET /boom" in record.getMessage() for record in caplog.records)
+    finally:
+        app.log_manager.stop()
+    assert app.log_manager.handler not in logger.handlers
+
+
+async def test_lifespan_starts_and_stops_logging(config):
+    app = AbriPy(config)
+    messages = iter([{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}])
+    sent = []
+
+    async def receive():
+        return next(messages)
+
+    async def send(message):
+        sent.append(message["type"])
+
+    await app({"type": "lifespan"}, receive, send)
+    assert sent == ["lifespan.startup.complete", "lifespan.shutdown.complete"]
+    assert not app.log_manager.started
+
+
+def test_access_log_follows_configured_level():
+    config = Config()
+    config.logging.level = "WARNING"
+    app = AbriPy(config)
+    app.start_logging()
+    try:
+        app.access_log.log("127.0.0.1", "GET", "/", 200, 0.001)
+        app.access_log.log("127.0.0.1", "GET", "/", 500, 0.001)
+        assert app.access_log._buffer == []
+    finally:
+        app.log_manager.stop()
+
+
+def test_bench_turns_off_the_access_log(tmp_path, monkeypatch):
+    (tmp_path / "bench_target.py").write_text(
+        "from core.application import AbriPy\n"
+        "app = AbriPy()\n"
+        "@app.get('/')\n"
+        "async def index(request):\n"
+        "    return 'ok'\n"
+    )
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    result = CliRunner().invoke(cli, ["bench", "bench_target:app", "-n", "5", "--warmup", "0", "--alloc-requests", "0"])
+    assert result.exit_code == 0, result.output
+    app = sys.modules["bench_target"].app
+    try:
+        assert app.access_log is None
+        assert app.log_manager.access._buffer == []
+    finally:
+        app.log_manager.stop()
@@ -0,0 +1,198 @@
+# tests/test_pool.py
+import asyncio
+
+import pytest
+
+from database import ConnectionPool, DatabaseManager, PoolClosed, PoolTimeout
+
+
+class FakeConnection:
+    opened = 0
+
+    def __init__(self):
+        FakeConnection.opened += 1
+        self.id = FakeConnection.opened
+        self.closed = False
+        self.healthy = True
+
+    async def close(self):
+        self.closed = True
+
+
+async def connect():
+    return FakeConnection()
+
+
+async def check(connection):
+    return connection.healthy
+
+
+def make_pool(**options):
+    options.setdefault("health_check", None)
+    return ConnectionPool(connect, **options)
+
+
+async def test_acquire_times_out_when_pool_and_overflow_are_exhausted():
+    pool = make_pool(pool_size=1, max_overflow=1, acquire_timeout=0.05)
+    async with pool.acquire():
+        async with pool.acquire():
+            with pytest.raises(PoolTimeout):
+                async with pool.acquire():
+                    pass
+    metrics = pool.metrics()
+    assert metrics["timeouts"] == 1
+    assert metrics["waiting"] == 0
+    assert metrics["peak_in_use"] == 2
+
+
+async def test_overflow_connections_close_after_the_burst():
+    pool = make_pool(pool_size=2, max_overflow=3)
+    held = []
+
+    async def borrow():
+        async with pool.acquire() as connection:
+            held.append(connection)
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(*(borrow() for _ in range(5)))
+    assert pool.size == 2 and pool.idle == 2
+    assert sum(connection.closed for connection in held) == 3
+    assert pool.metrics()["utilization"] == 0.0
+
+
+async def test_waiters_are_served_in_order():
+    pool = make_pool(pool_size=1, max_overflow=0)
+    order = []
+
+    async def borrow(index):
+        async with pool.acquire():
+            order.append(index)
+            await asyncio.sleep(0.001)
+
+    await asyncio.gather(*(borrow(index) for index in range(8)))
+    assert order == list(range(8))
+    assert pool.metrics()["acquisitions"] == 8
+
+
+async def test_failed_health_check_replaces_connection():
+    pool = make_pool(pool_size=1, max_overflow=0, health_check=check, health_check_interval=0)
+    async with pool.acquire() as first:
+        pass
+    first.healthy = False
+
+    async with pool.acquire() as second:
+        assert second is not first
+    assert first.closed
+    assert pool.health_check_failures == 1
+    assert pool.size == 1
+
+
+async def test_cancelled_health_check_does_not_leak_the_connection():
+    started = asyncio.Event()
+
+    async def hang(connection):
+        started.set()
+        await asyncio.sleep(10)
+
+    pool = make_pool(pool_size=1, max_overflow=0, health_check=hang, health_check_interval=0)
+    await pool.open()
+    task = asyncio.ensure_future(pool._acquire())
+    await started.wait()
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert pool.size == 0 and pool.in_use == 0
+
+    pool.health_check = None
+    async with pool.acquire():
+        assert pool.size == 1
+
+
+async def test_connections_are_recycled_after_n_uses():
+    pool = make_pool(pool_size=1, max_overflow=0, recycle_after=2)
+    seen = []
+    for _ in range(5):
+        async with pool.acquire() as connection:
+            seen.append(connection.id)
+    assert seen[0] == seen[1] != seen[2] == seen[3] != seen[4]
+    assert pool.recycled == 2
+
+
+async def test_discarded_connection_is_replaced_for_a_waiter():
+    pool = make_pool(pool_size=1, max_overflow=0, recycle_after=1, acquire_timeout=1)
+    first = await pool._acquire()
+    waiter = asyncio.ensure_future(pool._acquire())
+    await asyncio.sleep(0)
+    await pool._release(first)
+    replacement = await asyncio.wait_for(waiter, 1)
+    assert replacement.connection is not first.connection
+    assert not pool._replacements
+    await pool._release(replacement)
+
+
+async def test_close_cancels_pending_replacements():
+    gate = asyncio.Event()
+
+    async def slow_connect():
+        await gate.wait()
+        return FakeConnection()
+
+    pool = ConnectionPool(slow_connect, pool_size=1, max_overflow=0, recycle_after=1, health_check=None)
+    gate.set()
+    first = await pool._acquire()
+    gate.clear()
+    waiter = asyncio.ensure_future(pool._acquire())
+    await asyncio.sleep(0)
+    await pool._release(first)
+    assert len(pool._replacements) == 1
+
+    await pool.close()
+    assert not pool._replacements
+    with pytest.raises(PoolClosed):
+        await waiter
+    assert pool.size == 0
+
+
+async def test_database_manager_reads_and_writes_through_pool(tmp_path):
+    db = DatabaseManager(f"sqlite://{tmp_path / 'pool.db'}", pool_size=2, max_overflow=2, autocommit=True)
+    await db.execute("CREATE TABLE t (v INTEGER)")
+    async with db.transaction():
+        for value in range(10):
+            await db.execute("INSERT INTO t (v) VALUES (?)", (value,))
+    rows = await asyncio.gather(*(db.fetch_one("SELECT sum(v) AS total FROM t") for _ in range(20)))
+    assert {row["total"] for row in rows} == {45}
+    metrics = db.metrics()
+    assert metrics["readers"]["in_use"] == metrics["writer"]["in_use"] == 0
+    assert metrics["writer"]["max_size"] == 1
+    await db.disconnect()
+
+
+@pytest.mark.parametrize("profile", ["default", "production"])
+async def test_writes_commit_while_a_read_is_streaming(tmp_path, profile):
+    db = DatabaseManager(f"sqlite://{tmp_path / 'stream.db'}", profile=profile, autocommit=True)
+    await db.execute("CREATE TABLE t (v INTEGER)")
+    async with db.transaction():
+        for value in range(50):
+            await db.execute("INSERT INTO t (v) VALUES (?)", (value,))
+
+    seen = 0
+    async for _ in db.iterate("SELECT v FROM t", batch_size=10):
+        seen += 1
+        if seen == 5:
+            await asyncio.wait_for(db.execute("INSERT INTO t (v) VALUES (?)", (100,)), 2)
+    assert (await db.fetch_one("SELECT count(*) FROM t"))[0] == 51
+    await db.disconnect()
+
+
+async def test_in_memory_database_writes_while_iterating():
+    db = DatabaseManager("sqlite://:memory:", pool_timeout=2, autocommit=True)
+    await db.execute("CREATE TABLE t (v INTEGER)")
+    async with db.transaction():
+        for value in range(20):
+            await db.execute("INSERT INTO t (v) VALUES (?)", (value,))
+
+    async for row in db.iterate("SELECT v FROM t", batch_size=5):
+        if row["v"] == 3:
+            await db.execute("INSERT INTO t (v) VALUES (?)", (100,))
+    assert (await db.fetch_one("SELECT count(*) FROM t"))[0] == 21
+    await db.disconnect()
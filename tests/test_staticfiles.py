@@ -0,0 +1,72 @@
+# tests/test_staticfiles.py
+import os
+
+import pytest
+
+from core.application import AbriPy
+from core.config import Config
+from testing import InMemoryTransport
+from web import staticfiles
+from web.staticfiles import StaticFiles
+
+
+@pytest.fixture
+def directory(tmp_path):
+    (tmp_path / "css").mkdir()
+    (tmp_path / "css" / "app.css").write_text("body { color: red }")
+    (tmp_path / "app.js").write_text("console.log(1)")
+    return tmp_path
+
+
+def test_url_for_does_not_touch_the_file_within_check_interval(directory, monkeypatch):
+    static = StaticFiles(str(directory), check_interval=60)
+    url = static.url_for("css/app.css")
+    assert url.startswith("/static/css/app.") and url.endswith(".css")
+
+    stat, calls = os.stat, []
+
+    def counting_stat(path, *args, **kwargs):
+        if str(path).startswith(str(directory)):
+            calls.append(path)
+        return stat(path, *args, **kwargs)
+
+    monkeypatch.setattr(os, "stat", counting_stat)
+    assert static.url_for("css/app.css") == url
+    monkeypatch.undo()
+    assert calls == []
+
+
+def test_url_for_rehashes_a_changed_file_after_check_interval(directory):
+    static = StaticFiles(str(directory), check_interval=0)
+    before = static.url_for("app.js")
+    path = directory / "app.js"
+    path.write_text("console.log(2)")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert static.url_for("app.js") != before
+    assert static.url_for("missing.js") == "/static/missing.js"
+
+
+async def test_load_fingerprints_hashes_every_file_up_front(directory, monkeypatch):
+    static = StaticFiles(str(directory), check_interval=60)
+    assert await static.load_fingerprints() == 2
+
+    monkeypatch.setattr(staticfiles.hashlib, "sha256", None)
+    assert static.url_for("app.js").startswith("/static/app.")
+
+
+async def test_fingerprinted_url_is_served_immutable(directory):
+    config = Config()
+    config.logging.access_log = False
+    app = AbriPy(config)
+    static = app.static("/static", str(directory))
+    transport = InMemoryTransport(app)
+
+    response = await transport.request("GET", static.url_for("css/app.css"))
+    headers = dict(response.headers)
+    assert response.status_code == 200
+    assert response.body == b"body { color: red }"
+    assert b"immutable" in headers[b"cache-control"]
+
+    response = await transport.request("GET", "/static/css/app.css")
+    assert dict(response.headers)[b"cache-control"] == b"no-cache"
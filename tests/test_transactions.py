@@ -0,0 +1,122 @@
+# tests/test_transactions.py
+import asyncio
+
+import pytest
+
+from database import DatabaseManager, TransactionError
+from database.orm import Field, Model
+
+
+class Reading(Model):
+    _table_name = "readings"
+    _fields = {
+        'id': Field('INTEGER', primary_key=True),
+        'sensor': Field('TEXT'),
+        'value': Field('REAL'),
+    }
+
+
+@pytest.fixture(params=["default", "production"])
+async def db(request, tmp_path):
+    manager = DatabaseManager(f"sqlite://{tmp_path / 'test.db'}", profile=request.param)
+    Reading.set_db_manager(manager)
+    await Reading.create_table()
+    yield manager
+    await manager.disconnect()
+
+
+async def sensors(db):
+    return sorted(row["sensor"] for row in await db.fetch_all("SELECT sensor FROM readings"))
+
+
+async def test_execute_outside_transaction_requires_autocommit(db):
+    with pytest.raises(TransactionError):
+        await db.execute("DELETE FROM readings")
+
+
+async def test_save_outside_transaction_commits_and_sets_primary_key(db):
+    reading = Reading(sensor="a", value=1.0)
+    await reading.save()
+    assert reading.id == 1
+
+    reading.value = 2.0
+    await reading.save()
+    row = await db.fetch_one("SELECT * FROM readings")
+    assert dict(row) == {"id": 1, "sensor": "a", "value": 2.0}
+
+
+async def test_transaction_commits_once_and_rolls_back_on_error(db):
+    async with db.transaction():
+        await Reading(sensor="a", value=1).save()
+        # Dirty models are flushed before reads in the transaction
+        assert (await db.fetch_one("SELECT count(*) FROM readings"))[0] == 1
+
+    with pytest.raises(RuntimeError):
+        async with db.transaction():
+            await Reading(sensor="b", value=1).save()
+            raise RuntimeError
+
+    assert await sensors(db) == ["a"]
+
+
+async def test_nested_savepoint_rolls_back_only_inner_block(db):
+    async with db.transaction():
+        await Reading(sensor="outer", value=1).save()
+        with pytest.raises(RuntimeError):
+            async with db.transaction():
+                await Reading(sensor="inner", value=1).save()
+                await db.execute("INSERT INTO readings (sensor, value) VALUES ('raw', 1)")
+                raise RuntimeError
+        async with db.transaction():
+            async with db.transaction():
+                await Reading(sensor="deep", value=1).save()
+
+    assert await sensors(db) == ["deep", "outer"]
+
+
+async def test_concurrent_savepoints_in_child_tasks(db):
+    async def worker(name, fail):
+        async with db.transaction():
+            await Reading(sensor=f"{name}-1", value=1).save()
+            await asyncio.sleep(0)
+            await Reading(sensor=f"{name}-2", value=1).save()
+            await db.fetch_all("SELECT * FROM readings")
+            if fail:
+                raise RuntimeError(name)
+
+    async with db.transaction():
+        results = await asyncio.gather(
+            *(worker(f"w{index}", fail=index % 2 == 1) for index in range(6)),
+            return_exceptions=True,
+        )
+        await Reading(sensor="parent", value=1).save()
+
+    assert [type(result) for result in results] == [type(None), RuntimeError] * 3
+    assert await sensors(db) == ["parent", "w0-1", "w0-2", "w2-1", "w2-2", "w4-1", "w4-2"]
+
+
+async def test_tasks_started_inside_savepoint_work_within_it(db):
+    async def child(name):
+        await Reading(sensor=name, value=1).save()
+        async with db.transaction():
+            await Reading(sensor=f"{name}-nested", value=1).save()
+
+    async with db.transaction():
+        with pytest.raises(RuntimeError):
+            async with db.transaction():
+                await asyncio.gather(child("a"), child("b"))
+                raise RuntimeError
+        await asyncio.gather(child("c"), child("d"))
+
+    assert await sensors(db) == ["c", "c-nested", "d", "d-nested"]
+
+
+async def test_iterate_inside_transaction_allows_statements_in_loop(db):
+    async with db.transaction():
+        for index in range(5):
+            await Reading(sensor=f"s{index}", value=index).save()
+        async for row in db.iterate("SELECT id, value FROM readings", batch_size=2):
+            await db.execute("UPDATE readings SET value = ? WHERE id = ?", (row["value"] * 10, row["id"]))
+
+    values = [row["value"] for row in await db.fetch_all("SELECT value FROM readings ORDER BY id")]
+    assert values == [0, 10, 20, 30, 40]
@@ -0,0 +1,93 @@
+# tests/test_validation.py
+import json
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, List, Optional
+
+import pytest
+
+from core.application import AbriPy
+from core.config import Config
+from core.exceptions import ValidationError
+from core.validation import compile_handler, compile_model, validate
+from testing import InMemoryTransport
+from web.response import json_response
+
+if TYPE_CHECKING:
+    from web.request import Request
+
+
+@dataclass
+class Item:
+    name: str
+    quantity: int = 1
+
+
+@dataclass
+class Order:
+    customer: str
+    items: List[Item]
+    note: Optional[str] = None
+    tags: List[str] = field(default_factory=list)
+
+
+def test_compiled_model_builds_nested_instances():
+    order = validate(Order, {"customer": "ada", "items": [{"name": "tea"}, {"name": "cake", "quantity": 2}]})
+    assert order == Order("ada", [Item("tea"), Item("cake", 2)])
+    assert compile_model(Order) is compile_model(Order)
+
+
+def test_compiled_model_reports_every_error_location():
+    with pytest.raises(ValidationError) as exc_info:
+        validate(Order, {"items": [{"name": 3, "quantity": "x"}]})
+    locations = [tuple(error["loc"]) for error in exc_info.value.errors]
+    assert ("body", "customer") in locations
+    assert ("body", "items", 0, "name") in locations and ("body", "items", 0, "quantity") in locations
+
+
+def test_handler_without_model_is_returned_unchanged():
+    async def handler(request, item_id: int):
+        return item_id
+
+    assert compile_handler(handler) is handler
+
+
+def test_unresolvable_annotations_do_not_break_registration():
+    async def typed_request(request: "Request"):
+        return None
+
+    async def unknown_name(request, item: "NotImportedAnywhere"):  # noqa: F821
+        return None
+
+    assert compile_handler(typed_request) is typed_request
+    assert compile_handler(unknown_name) is unknown_name
+
+
+@pytest.fixture
+def transport():
+    config = Config()
+    config.logging.access_log = False
+    app = AbriPy(config=config)
+
+    @app.post('/orders')
+    async def create_order(request: "Request", order: Order):
+        return json_response({"customer": order.customer, "items": len(order.items)})
+
+    return InMemoryTransport(app)
+
+
+async def test_valid_body_reaches_handler(transport):
+    body = json.dumps({"customer": "ada", "items": [{"name": "tea"}]}).encode()
+    response = await transport.request("POST", "/orders", {"content-type": "application/json"}, body)
+    assert response.status_code == 200
+    assert json.loads(response.body) == {"customer": "ada", "items": 1}
+
+
+@pytest.mark.parametrize("body", [
+    b"{not json",
+    json.dumps({"customer": 1, "items": []}).encode(),
+    json.dumps({"customer": "ada", "items": [{"quantity": 2}]}).encode(),
+    json.dumps([1, 2]).encode(),
+])
+async def test_invalid_body_is_rejected_with_400(transport, body):
+    response = await transport.request("POST", "/orders", {"content-type": "application/json"}, body)
+    assert response.status_code == 400
@@ -0,0 +1,50 @@
+# tests/test_websockets.py
+import asyncio
+
+from web.websockets import WebSocketConnection, WebSocketManager
+
+
+class ScriptedWebSocket:
+    """Client that sends a frame every interval, then stays silent"""
+
+    def __init__(self, frames, interval):
+        self.frames = list(frames)
+        self.interval = interval
+        self.closed_with = None
+        self.sent = []
+
+    async def receive(self):
+        await asyncio.sleep(self.interval)
+        if self.frames:
+            return self.frames.pop(0)
+        await asyncio.Event().wait()
+
+    async def send_text(self, data):
+        self.sent.append(data)
+
+    async def send_bytes(self, data):
+        self.sent.append(data)
+
+    async def close(self, code=1000, reason=""):
+        self.closed_with = code
+
+
+async def test_handler_receive_loop_keeps_connection_alive():
+    manager = WebSocketManager(idle_timeout=0.08, heartbeat_tick=0.01)
+    websocket = ScriptedWebSocket(['{"n": %d}' % index for index in range(10)], interval=0.03)
+    connection = WebSocketConnection(websocket)
+    manager.add_connection(connection)
+
+    # A route handler running its own loop instead of manager.serve()
+    received = [await connection.receive_json() for _ in range(10)]
+    assert [message["n"] for message in received] == list(range(10))
+    assert websocket.closed_with is None
+    assert manager.idle_evictions == 0
+
+    # Once the client goes quiet it is evicted as idle
+    reader = asyncio.ensure_future(connection.receive_text())
+    await asyncio.sleep(0.2)
+    assert websocket.closed_with == 1001
+    assert manager.idle_evictions == 1
+    reader.cancel()
+    manager.stop_heartbeat()
@@ -1,23 +1,44 @@
 """Web components for AbriPy Framework"""
 
 from .request import Request
-from .response import Response  # ✅ Only import Response class
-from .websockets import WebSocketManager
-
-# Create convenience functions that match the old interface
-def json_response(data, status_code=200, headers=None):
-    """Convenience function for creating JSON responses"""
-    return Response.json(data, status_code, headers)
-
-def html_response(content, status_code=200, headers=None):
-    """Convenience function for creating HTML responses"""  
-    return Response.html(content, status_code, headers)
+from .datastructures import Headers, FormData, QueryParams, UploadFile
+from .response import (
+    Response, ConstantResponse, StreamingResponse, JSONStreamResponse, NDJSONResponse,
+    json_response, html_response
+)
+from .files import FileResponse
+from .sse import EventChannel, EventSourceResponse, ServerSentEvent
+from .websockets import ASGIWebSocket, WebSocketConnection, WebSocketDisconnect, WebSocketManager
+from .backplane import Backplane, MemoryBackplane, SharedMemoryBackplane, UnixSocketBackplane
+from .json_codec import JSONCodec, get_json_codec, set_json_codec
 
 # Export everything
 __all__ = [
     'Request',
     'Response', 
+    'ConstantResponse',
+    'StreamingResponse',
+    'JSONStreamResponse',
+    'NDJSONResponse',
+    'FileResponse',
+    'EventSourceResponse',
+    'EventChannel',
+    'ServerSentEvent',
+    'Headers',
+    'FormData',
+    'QueryParams',
+    'UploadFile',
     'WebSocketManager',
+    'WebSocketConnection',
+    'WebSocketDisconnect',
+    'ASGIWebSocket',
+    'Backplane',
+    'MemoryBackplane',
+    'UnixSocketBackplane',
+    'SharedMemoryBackplane',
+    'JSONCodec',
+    'get_json_codec',
+    'set_json_codec',
     'json_response',
     'html_response'
 ]
@@ -0,0 +1,508 @@
+# web/backplane.py
+"""
+Cross-worker pub/sub for WebSocket room broadcasts
+
+With several worker processes, ``WebSocketManager.broadcast_to_room`` only
+reaches sockets held by the local process. A backplane carries the
+encoded frame to every other worker, which delivers it to its own room
+members. Each worker publishes a broadcast once; messages published in
+the same event-loop iteration travel together as one batch::
+
+    backplane = UnixSocketBackplane("/tmp/myapp.sock")
+    await app.websocket_manager.attach_backplane(backplane)
+
+Implementations:
+
+* ``UnixSocketBackplane`` - workers connect to a small broker over a Unix
+  domain socket; the first worker to start hosts the broker.
+* ``SharedMemoryBackplane`` - a ring buffer in named shared memory that
+  workers poll; no broker process, but messages are lost if a worker
+  falls a whole buffer behind.
+* ``MemoryBackplane`` - in-process fake connecting several managers
+  through a ``MemoryHub``, for tests.
+"""
+
+import asyncio
+import fcntl
+import logging
+import os
+import struct
+import tempfile
+import uuid
+from typing import Any, Callable, List, Optional, Set, Tuple
+
+from .json_codec import get_json_codec
+
+logger = logging.getLogger("abripy")
+
+# (room name, encoded frame, coalesce key)
+BackplaneMessage = Tuple[str, Any, Any]
+DeliverCallback = Callable[[str, Any, Any], None]
+
+_LENGTH = struct.Struct(">I")
+
+
+class Backplane:
+    """Base class: batches outgoing messages and filters out our own
+
+    Subclasses implement ``send_batch(payload)`` and call
+    ``receive_batch(payload)`` for every batch that arrives, plus
+    ``connect``/``close`` for their transport.
+    """
+
+    def __init__(self, max_batch: int = 256):
+        self.worker_id = uuid.uuid4().hex
+        self.max_batch = max_batch
+        self.batches_sent = 0
+        self.batches_received = 0
+        self.messages_sent = 0
+        self.messages_received = 0
+        self.dropped = 0
+        self._deliver: Optional[DeliverCallback] = None
+        self._outbox: List[BackplaneMessage] = []
+        self._flush_handle: Optional[asyncio.Handle] = None
+
+    async def start(self, deliver: DeliverCallback):
+        """Start delivering remote messages to deliver(room, frame, key)"""
+        self._deliver = deliver
+        await self.connect()
+
+    async def stop(self):
+        """Flush pending messages and disconnect"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+        self.flush()
+        await self.close()
+        self._deliver = None
+
+    def publish(self, room_name: str, frame: Any, key: Any = None):
+        """Queue a frame for the other workers; sent at the end of this loop iteration"""
+        self._outbox.append((room_name, frame, key))
+        if len(self._outbox) >= self.max_batch:
+            self.flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_soon(self.flush)
+
+    def flush(self):
+        """Send everything queued by publish() as one batch"""
+        self._flush_handle = None
+        if not self._outbox:
+            return
+        batch, self._outbox = self._outbox, []
+        payload = get_json_codec().dumps([self.worker_id, batch])
+        self.batches_sent += 1
+        self.messages_sent += len(batch)
+        self.send_batch(payload)
+
+    def receive_batch(self, payload: bytes):
+        """Deliver a batch from another worker to the local room members"""
+        origin, batch = get_json_codec().loads(payload)
+        if origin == self.worker_id or self._deliver is None:
+            return
+        self.batches_received += 1
+        self.messages_received += len(batch)
+        deliver = self._deliver
+        for room_name, frame, key in batch:
+            deliver(room_name, frame, key)
+
+    def _receive(self, payload: bytes):
+        """receive_batch() for transport read loops: a bad batch must not stop the loop"""
+        try:
+            self.receive_batch(payload)
+        except Exception:
+            self.dropped += 1
+            logger.exception("Failed to deliver backplane batch")
+
+    async def connect(self):
+        raise NotImplementedError
+
+    async def close(self):
+        raise NotImplementedError
+
+    def send_batch(self, payload: bytes):
+        raise NotImplementedError
+
+
+class MemoryHub:
+    """Connects MemoryBackplanes in one process, standing in for a broker"""
+
+    def __init__(self):
+        self.members: Set["MemoryBackplane"] = set()
+        self.payloads: List[bytes] = []
+
+
+class MemoryBackplane(Backplane):
+    """In-process backplane for tests; every batch is also recorded on the hub"""
+
+    def __init__(self, hub: MemoryHub, max_batch: int = 256):
+        super().__init__(max_batch)
+        self.hub = hub
+
+    async def connect(self):
+        self.hub.members.add(self)
+
+    async def close(self):
+        self.hub.members.discard(self)
+
+    def send_batch(self, payload: bytes):
+        self.hub.payloads.append(payload)
+        loop = asyncio.get_running_loop()
+        for member in self.hub.members:
+            if member is not self:
+                loop.call_soon(member._receive, payload)
+
+
+async def _read_frames(reader: asyncio.StreamReader, on_frame: Callable[[bytes], None]):
+    """Call on_frame for each length-prefixed frame until EOF"""
+    try:
+        while True:
+            header = await reader.readexactly(_LENGTH.size)
+            on_frame(await reader.readexactly(_LENGTH.unpack(header)[0]))
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+
+
+class UnixSocketBroker:
+    """Relays each length-prefixed frame to every other connected worker
+
+    Only one broker per ``path`` runs at a time: ``start()`` takes an
+    exclusive ``flock`` on ``path + ".lock"`` (held until ``close()``) and
+    raises ``BlockingIOError`` if another broker has it. Peers whose
+    socket buffer is over ``max_buffer`` bytes miss frames rather than
+    growing the broker's memory.
+    """
+
+    def __init__(self, path: str, max_buffer: int = 4 * 1024 * 1024):
+        self.path = path
+        self.lock_path = f"{path}.lock"
+        self.max_buffer = max_buffer
+        self.dropped = 0
+        self._peers: Set[asyncio.StreamWriter] = set()
+        self._peer_tasks: Set[asyncio.Task] = set()
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._lock_fd: Optional[int] = None
+        self._inode: Optional[int] = None
+
+    async def start(self):
+        lock_fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            # Holding the lock means no other broker is bound: a socket file is stale
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+            self._server = await asyncio.start_unix_server(self._handle_peer, path=self.path)
+            self._inode = os.stat(self.path).st_ino
+        except BaseException:
+            os.close(lock_fd)
+            raise
+        self._lock_fd = lock_fd
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+        for task in list(self._peer_tasks):
+            task.cancel()
+        await asyncio.gather(*self._peer_tasks, return_exceptions=True)
+        if self._server is not None:
+            await self._server.wait_closed()
+            self._server = None
+        if self._lock_fd is not None:
+            # Leave the path alone if a broker elected after us has bound it
+            try:
+                if os.stat(self.path).st_ino == self._inode:
+                    os.unlink(self.path)
+            except OSError:
+                pass
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    async def serve_forever(self):
+        """Run a standalone broker (start() must have been awaited)"""
+        await self._server.serve_forever()
+
+    async def _handle_peer(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        task = asyncio.current_task()
+        self._peer_tasks.add(task)
+        self._peers.add(writer)
+
+        def relay(frame: bytes):
+            data = _LENGTH.pack(len(frame)) + frame
+            for peer in self._peers:
+                if peer is writer:
+                    continue
+                if peer.transport.get_write_buffer_size() > self.max_buffer:
+                    self.dropped += 1
+                    continue
+                peer.write(data)
+
+        try:
+            await _read_frames(reader, relay)
+        except asyncio.CancelledError:
+            # close() stopping the broker; asyncio would report a cancelled
+            # client_connected_cb task as an unhandled exception
+            pass
+        finally:
+            self._peers.discard(writer)
+            self._peer_tasks.discard(task)
+            writer.close()
+
+
+class UnixSocketBackplane(Backplane):
+    """Backplane through a broker on a Unix domain socket
+
+    On start the worker connects to the broker at ``path``; if none is
+    running (and ``host_broker`` is true) it tries to start one
+    in-process. Of several workers starting at once, the one holding the
+    broker's lock file hosts it and the others wait up to
+    ``connect_timeout`` seconds for it to accept connections. Workers
+    reconnect, possibly hosting a new broker, if the connection drops.
+    """
+
+    def __init__(self, path: str, host_broker: bool = True, max_batch: int = 256,
+                 max_buffer: int = 4 * 1024 * 1024, reconnect_delay: float = 0.5,
+                 connect_timeout: float = 5.0):
+        super().__init__(max_batch)
+        self.path = path
+        self.host_broker = host_broker
+        self.max_buffer = max_buffer
+        self.reconnect_delay = reconnect_delay
+        self.connect_timeout = connect_timeout
+        self.broker: Optional[UnixSocketBroker] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._closing = False
+
+    async def connect(self):
+        self._closing = False
+        reader, self._writer = await self._open()
+        self._reader_task = asyncio.ensure_future(self._read_loop(reader))
+
+    async def _open(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.connect_timeout
+        while True:
+            try:
+                return await asyncio.open_unix_connection(self.path)
+            except (FileNotFoundError, ConnectionRefusedError):
+                if not self.host_broker or loop.time() > deadline:
+                    raise
+
+            # Nobody is listening: host the broker unless another worker was elected
+            broker = UnixSocketBroker(self.path, self.max_buffer)
+            try:
+                await broker.start()
+            except BlockingIOError:
+                await asyncio.sleep(0.01)
+                continue
+            self.broker = broker
+            return await asyncio.open_unix_connection(self.path)
+
+    async def _read_loop(self, reader: asyncio.StreamReader):
+        while True:
+            await _read_frames(reader, self._receive)
+            if self._closing:
+                return
+            self._writer = None
+            await asyncio.sleep(self.reconnect_delay)
+            try:
+                reader, self._writer = await self._open()
+            except OSError:
+                continue
+
+    async def close(self):
+        self._closing = True
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            await asyncio.gather(self._reader_task, return_exceptions=True)
+            self._reader_task = None
+        if self.broker is not None:
+            await self.broker.close()
+            self.broker = None
+
+    def send_batch(self, payload: bytes):
+        writer = self._writer
+        if writer is None or writer.transport.get_write_buffer_size() > self.max_buffer:
+            self.dropped += 1
+            return
+        writer.write(_LENGTH.pack(len(payload)) + payload)
+
+
+try:
+    from multiprocessing import resource_tracker, shared_memory
+except ImportError:  # pragma: no cover - platforms without shared memory
+    shared_memory = None
+
+
+class SharedMemoryBackplane(Backplane):
+    """Backplane over a ring buffer in named shared memory
+
+    Writers append length-prefixed batches under an ``flock`` on a lock
+    file, queuing them and retrying from a task while another process
+    holds the lock, so the event loop never blocks on it. Each worker
+    polls the shared write position every ``poll_interval`` seconds and
+    reads what is new. A worker that falls more than ``size`` bytes
+    behind skips ahead and counts the lost data in ``dropped``. All workers must use the same ``name`` and ``size``.
+    The segment outlives the workers; call ``unlink()`` to remove it.
+    """
+
+    HEADER = struct.Struct("<Q")  # total bytes ever written
+
+    def __init__(self, name: str = "abripy-backplane", size: int = 1024 * 1024,
+                 poll_interval: float = 0.002, max_batch: int = 256):
+        super().__init__(max_batch)
+        if shared_memory is None:
+            raise RuntimeError("multiprocessing.shared_memory is not available")
+        self.name = name
+        self.size = size
+        self.poll_interval = poll_interval
+        self.lock_path = os.path.join(tempfile.gettempdir(), f"{name}.lock")
+        self._shm = None
+        self._lock_fd: Optional[int] = None
+        self._read_pos = 0
+        self._poller: Optional[asyncio.Task] = None
+        self._unsent: List[bytes] = []
+        self._unsent_bytes = 0
+        self._sender: Optional[asyncio.Task] = None
+
+    async def connect(self):
+        total = self.HEADER.size + self.size
+        try:
+            self._shm = shared_memory.SharedMemory(self.name, create=True, size=total)
+        except FileExistsError:
+            self._shm = shared_memory.SharedMemory(self.name)
+        # The segment outlives this worker: its resource tracker must not
+        # unlink it when the process exits, whether it created it or not
+        try:
+            resource_tracker.unregister(self._shm._name, "shared_memory")
+        except Exception:
+            pass
+        if self._shm.size < total:
+            raise ValueError(f"Shared memory segment '{self.name}' is smaller than size={self.size}")
+        self._lock_fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        self._read_pos = self._write_pos()
+        self._poller = asyncio.ensure_future(self._poll())
+
+    async def close(self):
+        if self._poller is not None:
+            self._poller.cancel()
+            await asyncio.gather(self._poller, return_exceptions=True)
+            self._poller = None
+        if self._sender is not None:
+            self._sender.cancel()
+            await asyncio.gather(self._sender, return_exceptions=True)
+            self._sender = None
+        if self._unsent and not self._write_unsent():
+            self.dropped += len(self._unsent)
+            self._unsent.clear()
+            self._unsent_bytes = 0
+        if self._shm is not None:
+            self._shm.close()
+            self._shm = None
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    def unlink(self):
+        """Remove the shared memory segment and lock file"""
+        try:
+            segment = shared_memory.SharedMemory(self.name)
+        except FileNotFoundError:
+            return
+        segment.close()
+        segment.unlink()
+        try:
+            os.unlink(self.lock_path)
+        except OSError:
+            pass
+
+    def _write_pos(self) -> int:
+        return self.HEADER.unpack_from(self._shm.buf, 0)[0]
+
+    def _copy_in(self, position: int, data: bytes):
+        buf, size, base = self._shm.buf, self.size, self.HEADER.size
+        start = position % size
+        first = min(len(data), size - start)
+        buf[base + start:base + start + first] = data[:first]
+        if first < len(data):
+            buf[base:base + len(data) - first] = data[first:]
+
+    def _copy_out(self, position: int, length: int) -> bytes:
+        buf, size, base = self._shm.buf, self.size, self.HEADER.size
+        start = position % size
+        first = min(length, size - start)
+        data = bytes(buf[base + start:base + start + first])
+        if first < length:
+            data += bytes(buf[base:base + length - first])
+        return data
+
+    def send_batch(self, payload: bytes):
+        record = _LENGTH.pack(len(payload)) + payload
+        if self._shm is None or self._unsent_bytes + len(record) > self.size // 2:
+            self.dropped += 1
+            return
+        self._unsent.append(record)
+        self._unsent_bytes += len(record)
+        if self._sender is None and not self._write_unsent():
+            self._sender = asyncio.ensure_future(self._send_when_unlocked())
+
+    def _write_unsent(self) -> bool:
+        """Append the queued records if the lock is free right now"""
+        try:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        try:
+            position = self._write_pos()
+            for record in self._unsent:
+                self._copy_in(position, record)
+                position += len(record)
+            # Publish the new end only once the records are in place
+            self.HEADER.pack_into(self._shm.buf, 0, position)
+        finally:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+        self._unsent.clear()
+        self._unsent_bytes = 0
+        return True
+
+    async def _send_when_unlocked(self):
+        try:
+            while not self._write_unsent():
+                await asyncio.sleep(self.poll_interval)
+        finally:
+            self._sender = None
+
+    def _drain(self):
+        end = self._write_pos()
+        position = self._read_pos
+        while position < end:
+            if end - position > self.size:
+                # Lapped by the writers: skip to the live end
+                self.dropped += 1
+                position = end
+                break
+            length = _LENGTH.unpack(self._copy_out(position, _LENGTH.size))[0]
+            if length > self.size:
+                # Torn header from a concurrent overwrite
+                self.dropped += 1
+                position = self._write_pos()
+                break
+            payload = self._copy_out(position + _LENGTH.size, length)
+            if self._write_pos() - position > self.size:
+                # Overwritten while we were copying it
+                self.dropped += 1
+                position = self._write_pos()
+                break
+            position += _LENGTH.size + length
+            self._receive(payload)
+        self._read_pos = position
+
+    async def _poll(self):
+        while True:
+            if self._write_pos() != self._read_pos:
+                self._drain()
+            await asyncio.sleep(self.poll_interval)
@@ -0,0 +1,342 @@
+# web/datastructures.py
+import asyncio
+import os
+import shutil
+import urllib.parse
+from tempfile import SpooledTemporaryFile
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union, Mapping
+
+RawHeaders = Sequence[Tuple[bytes, bytes]]
+
+DEFAULT_SPOOL_SIZE = 1024 * 1024
+DEFAULT_MAX_QUERY_PARAMS = 1000
+DEFAULT_MAX_QUERY_LENGTH = 8192
+
+_TRUE_VALUES = frozenset(("1", "true", "yes", "on"))
+_FALSE_VALUES = frozenset(("0", "false", "no", "off"))
+
+
+def _encode_name(name: Union[str, bytes]) -> bytes:
+    if isinstance(name, bytes):
+        return name.lower()
+    return name.lower().encode("latin1")
+
+
+class Headers(Mapping[str, str]):
+    """Immutable, case-insensitive header multidict over raw ASGI headers
+
+    Nothing is decoded up front: the name index is built on first lookup and
+    values are decoded only when they are read. ``get``/``[]`` return the
+    first value for a name; use ``getlist`` for repeated headers such as
+    ``Set-Cookie`` or ``Accept``, and ``get_raw`` to compare bytes directly.
+    """
+
+    __slots__ = ("_raw", "_index", "_multi")
+
+    def __init__(self, raw: RawHeaders = ()):
+        self._raw = raw
+        self._index: Optional[Dict[bytes, bytes]] = None
+        # Every value of names that occur more than once, built with the index
+        self._multi: Optional[Dict[bytes, List[bytes]]] = None
+
+    @classmethod
+    def from_dict(cls, headers: Dict[str, str]) -> 'Headers':
+        """Build headers from a plain str dictionary"""
+        return cls([
+            (name.lower().encode("latin1"), value.encode("latin1"))
+            for name, value in headers.items()
+        ])
+
+    @property
+    def raw(self) -> RawHeaders:
+        """The underlying (name, value) byte pairs"""
+        return self._raw
+
+    def _get_index(self) -> Dict[bytes, bytes]:
+        # name -> first value; repeated names also get every value in _multi
+        if self._index is None:
+            index: Dict[bytes, bytes] = {}
+            multi: Optional[Dict[bytes, List[bytes]]] = None
+            for name, value in self._raw:
+                # ASGI servers send lowercased names; only pay for lower() otherwise
+                if not name.islower():
+                    name = name.lower()
+                if name not in index:
+                    index[name] = value
+                else:
+                    if multi is None:
+                        multi = {}
+                    multi.setdefault(name, [index[name]]).append(value)
+            self._multi = multi
+            self._index = index
+        return self._index
+
+    def _values(self, name: bytes) -> List[bytes]:
+        index = self._get_index()
+        multi = self._multi
+        if multi is not None and name in multi:
+            return multi[name]
+        value = index.get(name)
+        return [] if value is None else [value]
+
+    def get_raw(self, name: Union[str, bytes], default: Optional[bytes] = None) -> Optional[bytes]:
+        """Get the first raw value of a header without decoding it"""
+        return self._get_index().get(_encode_name(name), default)
+
+    def getlist_raw(self, name: Union[str, bytes]) -> List[bytes]:
+        """Get every raw value of a header, in order"""
+        return list(self._values(_encode_name(name)))
+
+    def getlist(self, name: str) -> List[str]:
+        """Get every value of a header, in order"""
+        return [value.decode("latin1") for value in self._values(_encode_name(name))]
+
+    def get(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        """Get the first value of a header"""
+        value = self._get_index().get(_encode_name(name))
+        if value is None:
+            return default
+        return value.decode("latin1")
+
+    def __getitem__(self, name: str) -> str:
+        value = self._get_index().get(_encode_name(name))
+        if value is None:
+            raise KeyError(name)
+        return value.decode("latin1")
+
+    def __contains__(self, name: object) -> bool:
+        if not isinstance(name, (str, bytes)):
+            return False
+        return _encode_name(name) in self._get_index()
+
+    def __iter__(self) -> Iterator[str]:
+        return (name.decode("latin1") for name in self._get_index())
+
+    def __len__(self) -> int:
+        return len(self._get_index())
+
+    def multi_items(self) -> List[Tuple[str, str]]:
+        """All (name, value) pairs, including repeated names"""
+        return [(name.lower().decode("latin1"), value.decode("latin1")) for name, value in self._raw]
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Headers):
+            return sorted(self.multi_items()) == sorted(other.multi_items())
+        return super().__eq__(other)
+
+    def __repr__(self) -> str:
+        return f"Headers({self.multi_items()!r})"
+
+
+class ImmutableMultiDict(Mapping[str, Any]):
+    """Read-only multidict; ``[]``/``get`` return the last value for a key"""
+
+    __slots__ = ("_list", "_dict")
+
+    def __init__(self, items: Iterable[Tuple[str, Any]] = ()):
+        self._list: List[Tuple[str, Any]] = list(items)
+        self._dict: Dict[str, Any] = dict(self._list)
+
+    def getlist(self, key: str) -> List[Any]:
+        """Get every value for a key, in order"""
+        return [value for item_key, value in self._list if item_key == key]
+
+    def multi_items(self) -> List[Tuple[str, Any]]:
+        """All (key, value) pairs, including repeated keys"""
+        return list(self._list)
+
+    def __getitem__(self, key: str) -> Any:
+        return self._dict[key]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._dict
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._dict)
+
+    def __len__(self) -> int:
+        return len(self._dict)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, ImmutableMultiDict):
+            return sorted(self._list, key=repr) == sorted(other._list, key=repr)
+        return super().__eq__(other)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self._list!r})"
+
+
+
+class QueryParams(ImmutableMultiDict):
+    """Parsed query string with typed getters"""
+
+    __slots__ = ()
+
+    @classmethod
+    def parse(cls, query_string: bytes, max_params: Optional[int] = DEFAULT_MAX_QUERY_PARAMS,
+              max_length: Optional[int] = DEFAULT_MAX_QUERY_LENGTH) -> 'QueryParams':
+        """Parse a raw query string, rejecting oversized ones before any hashing"""
+        if not query_string:
+            return cls()
+        if max_length is not None and len(query_string) > max_length:
+            from core.exceptions import ValidationError
+            raise ValidationError(f"Query string too long (limit {max_length} bytes)")
+        if max_params is not None and query_string.count(b"&") >= max_params:
+            from core.exceptions import ValidationError
+            raise ValidationError(f"Too many query parameters (limit {max_params})")
+
+        return cls(urllib.parse.parse_qsl(query_string.decode("utf-8", "replace")))
+
+    def _convert(self, key: str, default: Any, convert: Callable[[str], Any], type_name: str) -> Any:
+        value = self._dict.get(key)
+        if value is None:
+            return default
+        try:
+            return convert(value)
+        except ValueError:
+            from core.exceptions import ValidationError
+            raise ValidationError(f"Query parameter '{key}' must be {type_name}")
+
+    def get_int(self, key: str, default: Optional[int] = None) -> Optional[int]:
+        """Get a parameter as int; malformed values raise ValidationError"""
+        return self._convert(key, default, int, "an integer")
+
+    def get_float(self, key: str, default: Optional[float] = None) -> Optional[float]:
+        """Get a parameter as float; malformed values raise ValidationError"""
+        return self._convert(key, default, float, "a number")
+
+    def get_bool(self, key: str, default: Optional[bool] = None) -> Optional[bool]:
+        """Get a parameter as bool (1/true/yes/on, 0/false/no/off)"""
+        return self._convert(key, default, _parse_bool, "a boolean")
+
+
+def _parse_bool(value: str) -> bool:
+    value = value.lower()
+    if value in _TRUE_VALUES:
+        return True
+    if value in _FALSE_VALUES:
+        return False
+    raise ValueError(value)
+
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+async def _run_sync(func, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, func, *args)
+
+
+class UploadFile:
+    """An uploaded file, kept in memory until it outgrows the spool size"""
+
+    def __init__(self, filename: Optional[str], content_type: str = "application/octet-stream",
+                 headers: Headers = None, spool_max_size: int = DEFAULT_SPOOL_SIZE):
+        self.filename = filename
+        self.content_type = content_type
+        self.headers = headers or Headers()
+        self.size = 0
+        self.spool_max_size = spool_max_size
+        self.file = SpooledTemporaryFile(max_size=spool_max_size)
+        self._rolled = False
+
+    @property
+    def in_memory(self) -> bool:
+        """True while the upload has not been rolled over to disk"""
+        return not self._rolled
+
+    def write_sync(self, data: bytes):
+        """Append data (used by the parser)"""
+        if not self._rolled and self.size + len(data) > self.spool_max_size:
+            # Roll over ourselves so in_memory never disagrees with the file
+            self.file.rollover()
+            self._rolled = True
+        self.file.write(data)
+        self.size += len(data)
+
+    async def write(self, data: bytes):
+        """Append data without blocking the loop on disk writes"""
+        if not self._rolled and self.size + len(data) <= self.spool_max_size:
+            self.write_sync(data)
+        else:
+            await _run_sync(self.write_sync, data)
+
+    async def read(self, size: int = -1) -> bytes:
+        """Read from the current position"""
+        if self.in_memory:
+            return self.file.read(size)
+        return await _run_sync(self.file.read, size)
+
+    async def seek(self, offset: int):
+        """Move the current position"""
+        if self.in_memory:
+            self.file.seek(offset)
+        else:
+            await _run_sync(self.file.seek, offset)
+
+    async def chunks(self, chunk_size: int = COPY_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        """Iterate over the whole upload from the start"""
+        await self.seek(0)
+        while True:
+            chunk = await self.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+    async def save(self, path: Union[str, os.PathLike]):
+        """Write the whole upload to path"""
+        if self.in_memory:
+            # At most spool_max_size bytes: read them here, write off the loop
+            position = self.file.tell()
+            self.file.seek(0)
+            data = self.file.read()
+            self.file.seek(position)
+            await _run_sync(self._write_bytes, path, data)
+        else:
+            await _run_sync(self._copy_file, path)
+
+    @staticmethod
+    def _write_bytes(path, data: bytes):
+        with open(path, "wb") as dst:
+            dst.write(data)
+
+    def _copy_file(self, path):
+        self.file.flush()
+        src_fd = self.file.fileno()
+        with open(path, "wb") as dst:
+            if hasattr(os, "sendfile"):
+                # Kernel-side copy between file descriptors
+                offset = 0
+                try:
+                    while offset < self.size:
+                        sent = os.sendfile(dst.fileno(), src_fd, offset, self.size - offset)
+                        if sent == 0:
+                            break
+                        offset += sent
+                    return
+                except OSError:
+                    dst.seek(0)
+                    dst.truncate()
+            self.file.seek(0)
+            shutil.copyfileobj(self.file, dst, COPY_CHUNK_SIZE)
+
+    async def close(self):
+        """Release the spooled file"""
+        if self.in_memory:
+            self.file.close()
+        else:
+            await _run_sync(self.file.close)
+
+    def __repr__(self) -> str:
+        return f"<UploadFile {self.filename!r} {self.size} bytes>"
+
+
+class FormData(ImmutableMultiDict):
+    """Parsed form fields; file fields are UploadFile instances"""
+
+    __slots__ = ()
+
+    async def close(self):
+        """Close every uploaded file"""
+        for _, value in self._list:
+            if isinstance(value, UploadFile):
+                await value.close()
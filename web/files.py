@@ -0,0 +1,291 @@
+# web/files.py
+import asyncio
+import email.utils
+import mimetypes
+import mmap
+import os
+import secrets
+import stat
+from typing import Dict, List, Optional, Tuple, Union
+
+from .datastructures import Headers
+from .response import Response, RawHeaderList, content_type_header
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+MAX_RANGES = 16
+
+_PATHSEND = "http.response.pathsend"
+_ZEROCOPY = "http.response.zerocopysend"
+
+Range = Tuple[int, int]  # inclusive start, exclusive end
+
+
+def make_etag(stat_result: os.stat_result) -> str:
+    """Strong ETag derived from mtime and size (no file read)"""
+    return f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+
+
+def parse_range_header(value: str, size: int) -> Optional[List[Range]]:
+    """Parse a 'bytes=' Range header into sorted, merged ranges
+
+    Returns None when the header should be ignored (wrong unit, malformed,
+    too many ranges) and an empty list when nothing is satisfiable.
+    """
+    unit, _, spec = value.partition("=")
+    if unit.strip().lower() != "bytes" or not spec:
+        return None
+
+    parts = spec.split(",")
+    if len(parts) > MAX_RANGES:
+        return None
+
+    ranges: List[Range] = []
+    for part in parts:
+        start_str, sep, end_str = part.strip().partition("-")
+        if not sep:
+            return None
+        try:
+            if not start_str:
+                # Suffix range: the last N bytes
+                length = int(end_str)
+                if length <= 0:
+                    continue
+                ranges.append((max(size - length, 0), size))
+                continue
+            start = int(start_str)
+            end = int(end_str) + 1 if end_str else size
+        except ValueError:
+            return None
+        if start >= size or end <= start:
+            continue
+        ranges.append((start, min(end, size)))
+
+    ranges.sort()
+    merged: List[Range] = []
+    for start, end in ranges:
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class FileResponse(Response):
+    """Serve a file from disk
+
+    Content-Length, Last-Modified and ETag come from ``os.stat``.
+    ``Range``/``If-Range`` requests get 206 responses (multipart/byteranges
+    for several ranges) and ``If-None-Match`` gets 304. The body is sent
+    with the server's ``http.response.pathsend`` or ``zerocopysend``
+    extension when available, otherwise in chunks read in a worker thread
+    (or sliced from an mmap with ``use_mmap=True``).
+    """
+
+    __slots__ = ("path", "filename", "stat_result", "chunk_size", "use_mmap")
+
+    def __init__(
+        self,
+        path: Union[str, os.PathLike],
+        status_code: int = 200,
+        headers: Optional[Dict[str, str]] = None,
+        media_type: Optional[str] = None,
+        filename: Optional[str] = None,
+        stat_result: Optional[os.stat_result] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        use_mmap: bool = False,
+        content_disposition_type: str = "attachment"
+    ):
+        self.path = os.fspath(path)
+        self.filename = filename
+        self.stat_result = stat_result
+        self.chunk_size = chunk_size
+        self.use_mmap = use_mmap
+        self.status_code = status_code
+        self.body = b""
+
+        if media_type is None:
+            media_type = mimetypes.guess_type(filename or self.path)[0] or "application/octet-stream"
+        self.media_type = media_type
+
+        if filename is not None:
+            headers = dict(headers or {})
+            quoted = filename.replace("\\", "\\\\").replace('"', '\\"')
+            headers.setdefault("content-disposition", f'{content_disposition_type}; filename="{quoted}"')
+        self.raw_headers = self.build_headers(headers, media_type)
+
+    async def __call__(self, scope, receive, send):
+        """ASGI interface"""
+        loop = asyncio.get_running_loop()
+        stat_result = self.stat_result
+        if stat_result is None:
+            try:
+                stat_result = await loop.run_in_executor(None, os.stat, self.path)
+            except FileNotFoundError:
+                await Response("Not Found", status_code=404)(scope, receive, send)
+                return
+        if not stat.S_ISREG(stat_result.st_mode):
+            await Response("Not Found", status_code=404)(scope, receive, send)
+            return
+
+        size = stat_result.st_size
+        etag = make_etag(stat_result).encode("latin1")
+        last_modified = email.utils.formatdate(stat_result.st_mtime, usegmt=True).encode("latin1")
+        headers = self.raw_headers + [
+            (b"accept-ranges", b"bytes"),
+            (b"last-modified", last_modified),
+            (b"etag", etag),
+        ]
+        request_headers = Headers(scope.get("headers", []))
+        send_body = scope.get("method", "GET") != "HEAD"
+
+        # Conditional GET
+        if_none_match = request_headers.get_raw(b"if-none-match")
+        if self.status_code == 200 and if_none_match is not None:
+            if if_none_match.strip() == b"*" or etag in [tag.strip() for tag in if_none_match.split(b",")]:
+                await send({
+                    "type": "http.response.start",
+                    "status": 304,
+                    "headers": [header for header in headers if header[0] != b"content-type"]
+                })
+                await send({"type": "http.response.body", "body": b""})
+                return
+
+        ranges = None
+        range_header = request_headers.get("range")
+        if_range = request_headers.get_raw(b"if-range")
+        if (self.status_code == 200 and range_header
+                and (if_range is None or if_range.strip() in (etag, last_modified))):
+            ranges = parse_range_header(range_header, size)
+
+        if ranges is None:
+            headers.append((b"content-length", str(size).encode("latin1")))
+            await send({"type": "http.response.start", "status": self.status_code, "headers": headers})
+            if send_body:
+                await self.send_ranges(scope, send, [(0, size)], whole_file=True)
+            else:
+                await send({"type": "http.response.body", "body": b""})
+            return
+
+        if not ranges:
+            await send({
+                "type": "http.response.start",
+                "status": 416,
+                "headers": [(b"content-range", f"bytes */{size}".encode("latin1"))]
+            })
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        if len(ranges) == 1:
+            start, end = ranges[0]
+            headers.append((b"content-range", f"bytes {start}-{end - 1}/{size}".encode("latin1")))
+            headers.append((b"content-length", str(end - start).encode("latin1")))
+            await send({"type": "http.response.start", "status": 206, "headers": headers})
+            if send_body:
+                await self.send_ranges(scope, send, ranges)
+            else:
+                await send({"type": "http.response.body", "body": b""})
+            return
+
+        await self.send_multipart(scope, send, headers, ranges, size, send_body)
+
+    async def send_multipart(self, scope, send, headers: RawHeaderList, ranges: List[Range],
+                             size: int, send_body: bool):
+        """Send several ranges as multipart/byteranges"""
+        boundary = secrets.token_hex(16)
+        part_type = content_type_header(self.media_type)[1]
+        part_headers = [
+            (
+                f"--{boundary}\r\n".encode("latin1")
+                + b"content-type: " + part_type + b"\r\n"
+                + f"content-range: bytes {start}-{end - 1}/{size}\r\n\r\n".encode("latin1")
+            )
+            for start, end in ranges
+        ]
+        closing = f"\r\n--{boundary}--\r\n".encode("latin1")
+        length = sum(len(part) for part in part_headers) + sum(end - start for start, end in ranges)
+        length += 2 * (len(ranges) - 1) + len(closing)
+
+        headers = [header for header in headers if header[0] != b"content-type"]
+        headers.append(content_type_header(f"multipart/byteranges; boundary={boundary}"))
+        headers.append((b"content-length", str(length).encode("latin1")))
+        await send({"type": "http.response.start", "status": 206, "headers": headers})
+        if not send_body:
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        for index, (part_range, part_header) in enumerate(zip(ranges, part_headers)):
+            prefix = part_header if index == 0 else b"\r\n" + part_header
+            await send({"type": "http.response.body", "body": prefix, "more_body": True})
+            await self.send_ranges(scope, send, [part_range], more_body=True)
+        await send({"type": "http.response.body", "body": closing})
+
+    async def send_ranges(self, scope, send, ranges: List[Range], whole_file: bool = False,
+                          more_body: bool = False):
+        """Send byte ranges of the file using the cheapest method available"""
+        extensions = scope.get("extensions") or {}
+
+        if whole_file and _PATHSEND in extensions:
+            await send({"type": _PATHSEND, "path": self.path})
+            return
+
+        loop = asyncio.get_running_loop()
+        fileobj = await loop.run_in_executor(None, open, self.path, "rb")
+        try:
+            if _ZEROCOPY in extensions:
+                for index, (start, end) in enumerate(ranges):
+                    await send({
+                        "type": _ZEROCOPY,
+                        "file": fileobj,
+                        "offset": start,
+                        "count": end - start,
+                        "more_body": more_body or index < len(ranges) - 1,
+                    })
+            elif self.use_mmap:
+                await self._send_mmap(fileobj, send, ranges, more_body)
+            else:
+                await self._send_reads(fileobj, send, ranges, more_body)
+        finally:
+            await loop.run_in_executor(None, fileobj.close)
+
+    async def _send_reads(self, fileobj, send, ranges: List[Range], more_body: bool):
+        loop = asyncio.get_running_loop()
+        chunk_size = self.chunk_size
+        last = len(ranges) - 1
+        for index, (start, end) in enumerate(ranges):
+            position = start
+            if position:
+                await loop.run_in_executor(None, fileobj.seek, position)
+            while True:
+                chunk = await loop.run_in_executor(None, fileobj.read, min(chunk_size, end - position))
+                position += len(chunk)
+                done = not chunk or position >= end
+                await send({
+                    "type": "http.response.body",
+                    "body": chunk,
+                    "more_body": more_body or index < last or not done,
+                })
+                if done:
+                    break
+
+    async def _send_mmap(self, fileobj, send, ranges: List[Range], more_body: bool):
+        size = os.fstat(fileobj.fileno()).st_size
+        if size == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": more_body})
+            return
+
+        chunk_size = self.chunk_size
+        last = len(ranges) - 1
+        with mmap.mmap(fileobj.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            for index, (start, end) in enumerate(ranges):
+                end = min(end, size)
+                position = start
+                while position < end:
+                    chunk_end = min(position + chunk_size, end)
+                    await send({
+                        "type": "http.response.body",
+                        "body": mapped[position:chunk_end],
+                        "more_body": more_body or index < last or chunk_end < end,
+                    })
+                    position = chunk_end
+                if start >= end:
+                    await send({"type": "http.response.body", "body": b"", "more_body": more_body or index < last})
@@ -0,0 +1,161 @@
+# web/forms.py
+from typing import Any, List, Optional, Tuple, AsyncIterator
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+from core.exceptions import AbriPyException, RequestEntityTooLarge, ValidationError
+from .datastructures import DEFAULT_SPOOL_SIZE, FormData, Headers, UploadFile
+
+DEFAULT_MAX_FIELD_SIZE = 1024 * 1024
+DEFAULT_MAX_FILE_SIZE = 100 * 1024 * 1024
+DEFAULT_MAX_PARTS = 1000
+
+
+class MultiPartParser:
+    """Streaming multipart/form-data parser driven by Request.stream()"""
+
+    def __init__(self, content_type_header: bytes, stream: AsyncIterator[bytes],
+                 spool_max_size: int = DEFAULT_SPOOL_SIZE,
+                 max_field_size: int = DEFAULT_MAX_FIELD_SIZE,
+                 max_file_size: int = DEFAULT_MAX_FILE_SIZE,
+                 max_total_size: Optional[int] = None,
+                 max_parts: int = DEFAULT_MAX_PARTS):
+        self.content_type_header = content_type_header
+        self.stream = stream
+        self.spool_max_size = spool_max_size
+        self.max_field_size = max_field_size
+        self.max_file_size = max_file_size
+        self.max_total_size = max_total_size
+        self.max_parts = max_parts
+
+        self.items: List[Tuple[str, Any]] = []
+        self._total_size = 0
+        self._part_count = 0
+        self._header_field = b""
+        self._header_value = b""
+        self._part_headers: List[Tuple[bytes, bytes]] = []
+        self._part_name = ""
+        self._part_file: Optional[UploadFile] = None
+        self._part_size = 0
+        self._field_data = bytearray()
+        self._pending: List[Tuple[UploadFile, bytes]] = []
+        self._complete = False
+
+    # Parser callbacks (synchronous, called from parser.write)
+
+    def on_part_begin(self):
+        self._part_count += 1
+        if self._part_count > self.max_parts:
+            raise ValidationError(f"Too many form parts (limit {self.max_parts})")
+        self._part_headers = []
+        self._part_file = None
+        self._part_size = 0
+        self._field_data = bytearray()
+
+    def on_header_field(self, data: bytes, start: int, end: int):
+        self._header_field += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def on_header_end(self):
+        self._part_headers.append((self._header_field.lower(), self._header_value))
+        self._header_field = b""
+        self._header_value = b""
+
+    def on_headers_finished(self):
+        headers = Headers(self._part_headers)
+        disposition, options = parse_options_header(headers.get_raw(b"content-disposition", b""))
+        if disposition != b"form-data" or b"name" not in options:
+            raise ValidationError("Missing form-data Content-Disposition name")
+
+        self._part_name = options[b"name"].decode("utf-8")
+        if b"filename" in options:
+            self._part_file = UploadFile(
+                filename=options[b"filename"].decode("utf-8"),
+                content_type=headers.get("content-type", "application/octet-stream"),
+                headers=headers,
+                spool_max_size=self.spool_max_size,
+            )
+
+    def on_part_data(self, data: bytes, start: int, end: int):
+        size = end - start
+        self._total_size += size
+        self._part_size += size
+        if self.max_total_size is not None and self._total_size > self.max_total_size:
+            raise RequestEntityTooLarge()
+
+        if self._part_file is not None:
+            if self._part_size > self.max_file_size:
+                raise RequestEntityTooLarge()
+            # Defer the write so disk I/O can happen off the loop; chunks
+            # from the stream are immutable so a view avoids a copy
+            if isinstance(data, bytes):
+                self._pending.append((self._part_file, memoryview(data)[start:end]))
+            else:
+                self._pending.append((self._part_file, data[start:end]))
+        else:
+            if self._part_size > self.max_field_size:
+                raise RequestEntityTooLarge()
+            self._field_data += memoryview(data)[start:end]
+
+    def on_part_end(self):
+        if self._part_file is not None:
+            self.items.append((self._part_name, self._part_file))
+        else:
+            self.items.append((self._part_name, self._field_data.decode("utf-8", "replace")))
+
+    def on_end(self):
+        self._complete = True
+
+    async def _flush_pending(self):
+        for upload, data in self._pending:
+            await upload.write(data)
+        self._pending.clear()
+
+    async def parse(self) -> FormData:
+        """Consume the stream and return the parsed form"""
+        _, options = parse_options_header(self.content_type_header)
+        boundary = options.get(b"boundary")
+        if not boundary:
+            raise ValidationError("Missing multipart boundary")
+
+        parser = MultipartParser(boundary, {
+            "on_part_begin": self.on_part_begin,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_end": self.on_end,
+        })
+
+        try:
+            async for chunk in self.stream:
+                try:
+                    parser.write(chunk)
+                except AbriPyException:
+                    raise
+                except Exception as e:
+                    raise ValidationError(f"Invalid multipart body: {e}")
+                if self._pending:
+                    await self._flush_pending()
+            parser.finalize()
+            if not self._complete:
+                # The parser accepts a body cut off before the closing boundary
+                raise ValidationError("Incomplete multipart body: missing closing boundary")
+        except BaseException:
+            await FormData(self.items).close()
+            if self._part_file is not None:
+                await self._part_file.close()
+            raise
+
+        form = FormData(self.items)
+        for _, value in form.multi_items():
+            if isinstance(value, UploadFile):
+                await value.seek(0)
+        return form
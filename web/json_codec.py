@@ -0,0 +1,179 @@
+# web/json_codec.py
+"""
+Pluggable JSON codecs for AbriPy Framework
+
+Every codec is bytes-in/bytes-out. ``orjson`` or ``msgspec`` is used when
+installed and the stdlib ``json`` module otherwise. datetimes, dataclasses,
+UUIDs, Decimals, enums, sets and objects with a ``to_dict()`` method (such
+as ORM models) are serialized by all codecs; extra types can be added with
+``JSONCodec.register``.
+
+Each ``AbriPy`` app has its own codec, made current while the app
+handles a request or WebSocket; ``get_json_codec()`` returns it there
+and the process-wide default (``set_json_codec``) everywhere else.
+"""
+
+import dataclasses
+import datetime
+import decimal
+import enum
+import json
+import uuid
+from contextvars import ContextVar, Token
+from typing import Any, Callable, Dict, Optional, Tuple, Type, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - optional dependency
+    msgspec = None
+
+
+class JSONCodec:
+    """Base codec: stdlib json with the shared fallback for custom types"""
+
+    name = "json"
+    decode_errors: Tuple[Type[Exception], ...] = (ValueError, UnicodeDecodeError)
+
+    def __init__(self):
+        self.encoders: Dict[type, Callable[[Any], Any]] = {}
+
+    def register(self, type_: type, encoder: Callable[[Any], Any]):
+        """Serialize instances of type_ with encoder(obj)"""
+        self.encoders[type_] = encoder
+
+    def default(self, obj: Any) -> Any:
+        """Convert an object the underlying encoder can't handle natively"""
+        encoder = self.encoders.get(type(obj))
+        if encoder is not None:
+            return encoder(obj)
+
+        to_dict = getattr(obj, "to_dict", None)
+        if callable(to_dict):
+            return to_dict()
+        if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+            return obj.isoformat()
+        if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+            return dataclasses.asdict(obj)
+        if isinstance(obj, (uuid.UUID, decimal.Decimal)):
+            return str(obj)
+        if isinstance(obj, enum.Enum):
+            return obj.value
+        if isinstance(obj, (set, frozenset)):
+            return list(obj)
+
+        for type_, encoder in self.encoders.items():
+            if isinstance(obj, type_):
+                return encoder(obj)
+
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+    def dumps(self, obj: Any) -> bytes:
+        """Serialize obj to UTF-8 JSON bytes"""
+        return json.dumps(
+            obj, default=self.default, ensure_ascii=False, separators=(",", ":")
+        ).encode("utf-8")
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        """Parse JSON from bytes or str"""
+        return json.loads(data)
+
+
+class OrjsonCodec(JSONCodec):
+    """orjson codec (handles datetime, dataclass, UUID and enum natively)"""
+
+    name = "orjson"
+
+    def __init__(self):
+        super().__init__()
+        if orjson is None:
+            raise ImportError("orjson is not installed")
+        self.decode_errors = (orjson.JSONDecodeError, UnicodeDecodeError)
+        self._dumps = orjson.dumps
+        self._loads = orjson.loads
+        self._options = orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, obj: Any) -> bytes:
+        return self._dumps(obj, default=self.default, option=self._options)
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return self._loads(data)
+
+
+class MsgspecCodec(JSONCodec):
+    """msgspec codec with reusable encoder/decoder instances"""
+
+    name = "msgspec"
+
+    def __init__(self):
+        super().__init__()
+        if msgspec is None:
+            raise ImportError("msgspec is not installed")
+        self.decode_errors = (msgspec.DecodeError, UnicodeDecodeError)
+        self._encoder = msgspec.json.Encoder(enc_hook=self.default)
+        self._decoder = msgspec.json.Decoder()
+
+    def dumps(self, obj: Any) -> bytes:
+        return self._encoder.encode(obj)
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return self._decoder.decode(data)
+
+
+CODECS: Dict[str, Type[JSONCodec]] = {
+    "orjson": OrjsonCodec,
+    "msgspec": MsgspecCodec,
+    "json": JSONCodec,
+}
+
+
+def create_codec(name: str = "auto") -> JSONCodec:
+    """Create a codec by name; 'auto' picks the fastest one installed"""
+    if name == "auto":
+        if orjson is not None:
+            return OrjsonCodec()
+        if msgspec is not None:
+            return MsgspecCodec()
+        return JSONCodec()
+
+    if name not in CODECS:
+        raise ValueError(f"Unknown JSON codec '{name}' (choose from auto, {', '.join(CODECS)})")
+    return CODECS[name]()
+
+
+_codec: Optional[JSONCodec] = None
+
+# The codec of the app handling the current request, inherited by tasks it starts
+_current_codec: ContextVar[Optional[JSONCodec]] = ContextVar("abripy_json_codec", default=None)
+
+
+def get_json_codec() -> JSONCodec:
+    """Get the codec used by Request, Response and WebSocket JSON helpers"""
+    global _codec
+    codec = _current_codec.get()
+    if codec is not None:
+        return codec
+    if _codec is None:
+        _codec = create_codec()
+    return _codec
+
+
+def set_json_codec(codec: Union[str, JSONCodec]) -> JSONCodec:
+    """Replace the process-wide default codec (by name or instance)"""
+    global _codec
+    _codec = create_codec(codec) if isinstance(codec, str) else codec
+    return _codec
+
+
+def activate_json_codec(codec: JSONCodec) -> Token:
+    """Make codec current in this context; pass the token to reset_json_codec()"""
+    return _current_codec.set(codec)
+
+
+def reset_json_codec(token: Token):
+    """Undo an activate_json_codec() call"""
+    _current_codec.reset(token)
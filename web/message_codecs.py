@@ -0,0 +1,281 @@
+# web/message_codecs.py
+"""
+WebSocket message codecs for AbriPy Framework
+
+A connection's codec is negotiated from the subprotocols the client
+offers (``Sec-WebSocket-Protocol``); without a match messages are JSON
+text frames. Every codec decodes to the same dicts, so
+``WebSocketManager.handle_message`` dispatches on ``type`` regardless of
+the wire format.
+
+* ``json`` - JSON text frames (the default)
+* ``msgpack`` - MessagePack binary frames, when ``msgpack`` is installed
+* ``abripy.compact`` - built-in struct-based binary format; lists of
+  floats or ints are packed as typed arrays, which suits numeric payloads
+"""
+
+import struct
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type, Union
+
+from .json_codec import get_json_codec
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+Frame = Union[str, bytes]
+
+PING_MESSAGE = {"type": "ping"}
+
+
+class MessageCodec:
+    """Base class: encode messages to frames and frames back to messages"""
+
+    name = ""
+    subprotocol = ""
+    binary = False
+    decode_errors: Tuple[Type[Exception], ...] = (ValueError,)
+
+    def __init__(self):
+        # Heartbeat frame, encoded once per codec
+        self.ping_frame = self.encode(PING_MESSAGE)
+
+    def encode(self, message: Any) -> Frame:
+        raise NotImplementedError
+
+    def decode(self, data: Frame) -> Any:
+        raise NotImplementedError
+
+
+class JSONMessageCodec(MessageCodec):
+    """JSON text frames through the application's JSON codec"""
+
+    name = "json"
+    subprotocol = "json"
+
+    @property
+    def decode_errors(self) -> Tuple[Type[Exception], ...]:
+        return get_json_codec().decode_errors
+
+    def encode(self, message: Any) -> str:
+        return get_json_codec().dumps(message).decode("utf-8")
+
+    def decode(self, data: Frame) -> Any:
+        return get_json_codec().loads(data)
+
+
+class MsgPackCodec(MessageCodec):
+    """MessagePack binary frames"""
+
+    name = "msgpack"
+    subprotocol = "msgpack"
+    binary = True
+
+    def __init__(self):
+        if msgpack is None:
+            raise ImportError("msgpack is not installed")
+        self.decode_errors = (ValueError, TypeError, msgpack.UnpackException)
+        super().__init__()
+
+    def encode(self, message: Any) -> bytes:
+        # The JSON codec's fallback serializer, looked up per call as the codec can be reconfigured
+        return msgpack.packb(message, use_bin_type=True, default=get_json_codec().default)
+
+    def decode(self, data: Frame) -> Any:
+        if isinstance(data, str):
+            raise ValueError("msgpack frames must be binary")
+        return msgpack.unpackb(data, raw=False)
+
+
+# Compact format: a one-byte tag, then a fixed-size or length-prefixed value.
+# Integers and lengths are little-endian.
+_NONE, _FALSE, _TRUE, _INT32, _INT64, _FLOAT, _STR, _BYTES, _LIST, _MAP, _FLOAT_ARRAY, _INT_ARRAY = range(12)
+
+_U32 = struct.Struct("<I")
+_I32 = struct.Struct("<i")
+_I64 = struct.Struct("<q")
+_F64 = struct.Struct("<d")
+_TAGGED_I32 = struct.Struct("<Bi")
+_TAGGED_I64 = struct.Struct("<Bq")
+_TAGGED_F64 = struct.Struct("<Bd")
+_TAGGED_LEN = struct.Struct("<BI")
+_KEY_LEN = struct.Struct("<H")
+
+_INT32_MIN, _INT32_MAX = -2 ** 31, 2 ** 31 - 1
+_INT64_MIN, _INT64_MAX = -2 ** 63, 2 ** 63 - 1
+
+# Lists shorter than this are cheaper to tag item by item
+_MIN_TYPED_ARRAY = 4
+
+
+class CompactCodec(MessageCodec):
+    """Struct-based binary format for dicts, lists, strings and numbers
+
+    Map keys must be strings. Lists made only of floats, or only of ints
+    that fit in 64 bits, are packed as typed arrays (8 bytes per item, no
+    per-item tags), so numeric series cost about the same as raw doubles.
+    """
+
+    name = "compact"
+    subprotocol = "abripy.compact"
+    binary = True
+    decode_errors = (ValueError, TypeError, struct.error, UnicodeDecodeError, IndexError, RecursionError)
+
+    def encode(self, message: Any) -> bytes:
+        parts: List[bytes] = []
+        self._encode(message, parts)
+        return b"".join(parts)
+
+    def _encode(self, value: Any, parts: List[bytes]):
+        kind = type(value)
+        if value is None:
+            parts.append(b"\x00")
+        elif kind is bool:
+            parts.append(b"\x02" if value else b"\x01")
+        elif kind is int:
+            if _INT32_MIN <= value <= _INT32_MAX:
+                parts.append(_TAGGED_I32.pack(_INT32, value))
+            elif _INT64_MIN <= value <= _INT64_MAX:
+                parts.append(_TAGGED_I64.pack(_INT64, value))
+            else:
+                raise ValueError(f"Integer {value} does not fit in 64 bits")
+        elif kind is float:
+            parts.append(_TAGGED_F64.pack(_FLOAT, value))
+        elif kind is str:
+            data = value.encode("utf-8")
+            parts.append(_TAGGED_LEN.pack(_STR, len(data)))
+            parts.append(data)
+        elif kind is bytes:
+            parts.append(_TAGGED_LEN.pack(_BYTES, len(value)))
+            parts.append(value)
+        elif kind is dict:
+            parts.append(_TAGGED_LEN.pack(_MAP, len(value)))
+            for key, item in value.items():
+                if type(key) is not str:
+                    raise TypeError(f"Compact codec map keys must be strings, not {type(key).__name__}")
+                data = key.encode("utf-8")
+                parts.append(_KEY_LEN.pack(len(data)))
+                parts.append(data)
+                self._encode(item, parts)
+        elif kind is list or kind is tuple:
+            self._encode_list(value, parts)
+        else:
+            self._encode(get_json_codec().default(value), parts)
+
+    def _encode_list(self, items, parts: List[bytes]):
+        count = len(items)
+        if count >= _MIN_TYPED_ARRAY:
+            if all(type(item) is float for item in items):
+                parts.append(_TAGGED_LEN.pack(_FLOAT_ARRAY, count))
+                parts.append(struct.pack(f"<{count}d", *items))
+                return
+            if all(type(item) is int for item in items) and \
+                    _INT64_MIN <= min(items) and max(items) <= _INT64_MAX:
+                parts.append(_TAGGED_LEN.pack(_INT_ARRAY, count))
+                parts.append(struct.pack(f"<{count}q", *items))
+                return
+        parts.append(_TAGGED_LEN.pack(_LIST, count))
+        for item in items:
+            self._encode(item, parts)
+
+    def decode(self, data: Frame) -> Any:
+        if isinstance(data, str):
+            raise ValueError("compact frames must be binary")
+        view = memoryview(data)
+        value, offset = self._decode(view, 0)
+        if offset != len(view):
+            raise ValueError("Trailing data after compact message")
+        return value
+
+    def _decode(self, view: memoryview, offset: int) -> Tuple[Any, int]:
+        tag = view[offset]
+        offset += 1
+        if tag == _NONE:
+            return None, offset
+        if tag == _FALSE:
+            return False, offset
+        if tag == _TRUE:
+            return True, offset
+        if tag == _INT32:
+            return _I32.unpack_from(view, offset)[0], offset + 4
+        if tag == _INT64:
+            return _I64.unpack_from(view, offset)[0], offset + 8
+        if tag == _FLOAT:
+            return _F64.unpack_from(view, offset)[0], offset + 8
+
+        length = _U32.unpack_from(view, offset)[0]
+        offset += 4
+        if tag == _STR:
+            end = self._end(view, offset, length)
+            return str(view[offset:end], "utf-8"), end
+        if tag == _BYTES:
+            end = self._end(view, offset, length)
+            return bytes(view[offset:end]), end
+        if tag == _FLOAT_ARRAY:
+            end = self._end(view, offset, length * 8)
+            return list(struct.unpack_from(f"<{length}d", view, offset)), end
+        if tag == _INT_ARRAY:
+            end = self._end(view, offset, length * 8)
+            return list(struct.unpack_from(f"<{length}q", view, offset)), end
+        if tag == _LIST:
+            items = []
+            for _ in range(length):
+                item, offset = self._decode(view, offset)
+                items.append(item)
+            return items, offset
+        if tag == _MAP:
+            result = {}
+            for _ in range(length):
+                key_length = _KEY_LEN.unpack_from(view, offset)[0]
+                offset += 2
+                end = self._end(view, offset, key_length)
+                key = str(view[offset:end], "utf-8")
+                result[key], offset = self._decode(view, end)
+            return result, offset
+        raise ValueError(f"Unknown compact tag {tag}")
+
+    @staticmethod
+    def _end(view: memoryview, offset: int, length: int) -> int:
+        end = offset + length
+        if end > len(view):
+            raise ValueError("Truncated compact message")
+        return end
+
+
+MESSAGE_CODECS: Dict[str, Type[MessageCodec]] = {
+    JSONMessageCodec.subprotocol: JSONMessageCodec,
+    MsgPackCodec.subprotocol: MsgPackCodec,
+    CompactCodec.subprotocol: CompactCodec,
+}
+
+
+def available_codecs(names: Optional[Iterable[str]] = None) -> Dict[str, MessageCodec]:
+    """Instantiate codecs by subprotocol name, skipping ones whose library is missing
+
+    JSON is always included, as the fallback for clients that offer no
+    supported subprotocol.
+    """
+    if names is None:
+        names = MESSAGE_CODECS
+    codecs: Dict[str, MessageCodec] = {}
+    for name in names:
+        if name not in MESSAGE_CODECS:
+            raise ValueError(f"Unknown WebSocket codec '{name}' (choose from {', '.join(MESSAGE_CODECS)})")
+        try:
+            codecs[name] = json_message_codec() if name == JSONMessageCodec.subprotocol else MESSAGE_CODECS[name]()
+        except ImportError:
+            continue
+    codecs.setdefault(JSONMessageCodec.subprotocol, json_message_codec())
+    return codecs
+
+
+_json_message_codec: Optional[JSONMessageCodec] = None
+
+
+def json_message_codec() -> JSONMessageCodec:
+    """Shared JSON codec used by connections that negotiated nothing else"""
+    global _json_message_codec
+    if _json_message_codec is None:
+        _json_message_codec = JSONMessageCodec()
+    return _json_message_codec
@@ -1,17 +1,49 @@
-from typing import Dict, Any, List, Optional
-import json
+from typing import Dict, Any, List, Optional, AsyncIterator
 import urllib.parse
+from .datastructures import (
+    DEFAULT_MAX_QUERY_LENGTH, DEFAULT_MAX_QUERY_PARAMS, FormData, Headers, QueryParams
+)
+from .json_codec import get_json_codec
 
 class Request:
-    """ASGI Request class"""
+    """ASGI Request class
     
-    def __init__(self, scope: Dict[str, Any], receive):
+    Uses ``__slots__``; anything derived from the scope (headers, query
+    params, url) is computed on first access and cached. Use ``user`` or
+    ``state`` to attach per-request data.
+    """
+    
+    __slots__ = (
+        "scope", "receive", "max_body_size", "max_query_params", "max_query_length",
+        "user", "_state", "_stream_consumed", "_body", "_json", "_form",
+        "_headers", "_query_params", "_url",
+    )
+    
+    def __init__(self, scope: Dict[str, Any], receive, max_body_size: Optional[int] = None,
+                 max_query_params: Optional[int] = DEFAULT_MAX_QUERY_PARAMS,
+                 max_query_length: Optional[int] = DEFAULT_MAX_QUERY_LENGTH):
         self.scope = scope
         self.receive = receive
+        self.max_body_size = max_body_size
+        self.max_query_params = max_query_params
+        self.max_query_length = max_query_length
+        self.user = None
+        self._state = None
+        self._stream_consumed = False
         self._body = None
         self._json = None
         self._form = None
+        self._headers = None
+        self._query_params = None
+        self._url = None
         
+    @property
+    def state(self) -> Dict[str, Any]:
+        """Free-form per-request storage for middleware and handlers"""
+        if self._state is None:
+            self._state = {}
+        return self._state
+    
     @property
     def method(self) -> str:
         """Get HTTP method"""
@@ -28,23 +60,20 @@ class Request:
         return self.scope.get("query_string", b"")
     
     @property
-    def query_params(self) -> Dict[str, str]:
-        """Get parsed query parameters"""
-        if not self.query_string:
-            return {}
-        
-        query_string = self.query_string.decode("utf-8")
-        return dict(urllib.parse.parse_qsl(query_string))
+    def query_params(self) -> QueryParams:
+        """Get parsed query parameters (parsed once, on first access)"""
+        if self._query_params is None:
+            self._query_params = QueryParams.parse(
+                self.query_string, self.max_query_params, self.max_query_length
+            )
+        return self._query_params
     
     @property
-    def headers(self) -> Dict[str, str]:
-        """Get request headers as a dictionary"""
-        headers = {}
-        for raw_header in self.scope.get("headers", []):
-            name = raw_header[0].decode("latin1").lower()
-            value = raw_header[1].decode("latin1")
-            headers[name] = value
-        return headers
+    def headers(self) -> Headers:
+        """Get request headers (built once per request, decoded lazily)"""
+        if self._headers is None:
+            self._headers = Headers(self.scope.get("headers", []))
+        return self._headers
     
     @property
     def client_ip(self) -> str:
@@ -57,14 +86,18 @@ class Request:
     @property
     def url(self) -> str:
         """Get full URL"""
+        if self._url is None:
+            self._url = self._build_url()
+        return self._url
+    
+    def _build_url(self) -> str:
         scheme = self.scope.get("scheme", "http")
         host = None
         port = None
         
         # Try to get host from headers first
-        headers = self.headers
-        if "host" in headers:
-            host_header = headers["host"]
+        host_header = self.headers.get("host")
+        if host_header:
             if ":" in host_header:
                 host, port_str = host_header.split(":", 1)
                 try:
@@ -91,18 +124,47 @@ class Request:
         
         return url
     
+    def check_content_length(self):
+        """Reject the body up front if Content-Length is over max_body_size"""
+        if self.max_body_size is None:
+            return
+        length = self.content_length
+        if length is not None and length > self.max_body_size:
+            from core.exceptions import RequestEntityTooLarge
+            raise RequestEntityTooLarge()
+    
+    async def stream(self) -> AsyncIterator[bytes]:
+        """Iterate over the request body as it arrives from the server"""
+        if self._body is not None:
+            yield self._body
+            return
+        if self._stream_consumed:
+            raise RuntimeError("Request body stream already consumed")
+        
+        self._stream_consumed = True
+        self.check_content_length()
+        
+        received = 0
+        more_body = True
+        while more_body:
+            message = await self.receive()
+            if message["type"] == "http.disconnect":
+                from core.exceptions import ClientDisconnect
+                raise ClientDisconnect()
+            
+            chunk = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if chunk:
+                received += len(chunk)
+                if self.max_body_size is not None and received > self.max_body_size:
+                    from core.exceptions import RequestEntityTooLarge
+                    raise RequestEntityTooLarge()
+                yield chunk
+    
     async def body(self) -> bytes:
         """Get raw request body"""
         if self._body is None:
-            body_parts = []
-            more_body = True
-            
-            while more_body:
-                message = await self.receive()
-                body_parts.append(message.get("body", b""))
-                more_body = message.get("more_body", False)
-            
-            self._body = b"".join(body_parts)
+            self._body = b"".join([chunk async for chunk in self.stream()])
         
         return self._body
     
@@ -111,33 +173,48 @@ class Request:
         if self._json is None:
             body = await self.body()
             if body:
+                codec = get_json_codec()
                 try:
-                    self._json = json.loads(body.decode("utf-8"))
-                except (json.JSONDecodeError, UnicodeDecodeError):
+                    self._json = codec.loads(body)
+                except codec.decode_errors:
                     self._json = {}
             else:
                 self._json = {}
         
         return self._json
     
-    async def form(self) -> Dict[str, Any]:
-        """Parse request body as form data"""
+    async def form(self, **limits) -> FormData:
+        """Parse request body as form data
+        
+        multipart/form-data is parsed while streaming, with file parts
+        spooled to disk; ``limits`` are passed to MultiPartParser
+        (spool_max_size, max_field_size, max_file_size, max_total_size,
+        max_parts).
+        """
         if self._form is None:
-            body = await self.body()
-            if body:
+            content_type = self.headers.get_raw(b"content-type", b"")
+            if content_type.startswith(b"multipart/form-data"):
+                from .forms import MultiPartParser
+                limits.setdefault("max_total_size", self.max_body_size)
+                parser = MultiPartParser(content_type, self.stream(), **limits)
+                self._form = await parser.parse()
+            else:
+                body = await self.body()
                 try:
-                    body_str = body.decode("utf-8")
-                    self._form = dict(urllib.parse.parse_qsl(body_str))
+                    self._form = FormData(urllib.parse.parse_qsl(body.decode("utf-8")))
                 except UnicodeDecodeError:
-                    self._form = {}
-            else:
-                self._form = {}
+                    self._form = FormData()
         
         return self._form
     
+    async def close(self):
+        """Release resources held by the request (spooled uploads)"""
+        if self._form is not None:
+            await self._form.close()
+    
     def get_header(self, name: str, default: str = None) -> Optional[str]:
         """Get a specific header value"""
-        return self.headers.get(name.lower(), default)
+        return self.headers.get(name, default)
     
     @property
     def content_type(self) -> Optional[str]:
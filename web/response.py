@@ -1,63 +1,125 @@
-import json
-from typing import Any, Dict, Optional, Union
+import asyncio
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterable, List, Optional, Tuple, Union
+from .datastructures import Headers
+from .json_codec import get_json_codec
+
+RawHeaderList = List[Tuple[bytes, bytes]]
+
+JSON_MEDIA_TYPE = "application/json"
+HTML_MEDIA_TYPE = "text/html; charset=utf-8"
+TEXT_MEDIA_TYPE = "text/plain; charset=utf-8"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Pre-encoded content-type headers, shared by every response that uses them
+_content_type_headers: Dict[str, Tuple[bytes, bytes]] = {}
+_MAX_CACHED_CONTENT_TYPES = 64
+
+
+def content_type_header(media_type: str) -> Tuple[bytes, bytes]:
+    """Get the encoded content-type header pair for a media type"""
+    header = _content_type_headers.get(media_type)
+    if header is None:
+        header = (b"content-type", media_type.encode("latin1"))
+        if len(_content_type_headers) < _MAX_CACHED_CONTENT_TYPES:
+            _content_type_headers[media_type] = header
+    return header
+
+
+def encode_headers(headers: Dict[str, str]) -> RawHeaderList:
+    """Encode a str header dict into lowercased byte pairs"""
+    return [
+        (name.lower().encode("latin1"), value.encode("latin1"))
+        for name, value in headers.items()
+    ]
+
 
 class Response:
-    """HTTP Response class"""
+    """HTTP Response class
+    
+    The body and headers are encoded once, at construction; headers are
+    kept as (name, value) byte pairs and sent as-is.
+    """
+    
+    __slots__ = ("status_code", "media_type", "body", "raw_headers")
     
     def __init__(
         self, 
-        content: Union[str, bytes, dict] = "", 
+        content: Union[str, bytes, dict, list] = "", 
         status_code: int = 200, 
         headers: Optional[Dict[str, str]] = None,
         media_type: Optional[str] = None
     ):
-        self.content = content
         self.status_code = status_code
-        self.headers = headers or {}
-        self.media_type = media_type
+        self.body = self.render(content)
         
-        # Set content type if not provided
-        if media_type and "content-type" not in self.headers:
-            self.headers["content-type"] = media_type
+        # Default content type from the kind of content
+        if media_type is None:
+            if isinstance(content, (dict, list)):
+                media_type = JSON_MEDIA_TYPE
+            elif isinstance(content, str):
+                media_type = TEXT_MEDIA_TYPE
+        self.media_type = media_type
+        self.raw_headers = self.build_headers(headers, media_type)
+    
+    @staticmethod
+    def build_headers(headers: Optional[Dict[str, str]], media_type: Optional[str]) -> RawHeaderList:
+        """Encode headers, adding content-type from media_type if missing"""
+        raw_headers = encode_headers(headers) if headers else []
+        if media_type and not any(name == b"content-type" for name, _ in raw_headers):
+            raw_headers.append(content_type_header(media_type))
+        return raw_headers
+    
+    @staticmethod
+    def render(content: Any) -> bytes:
+        """Encode content to body bytes"""
+        if isinstance(content, bytes):
+            return content
+        if isinstance(content, str):
+            return content.encode("utf-8")
+        if isinstance(content, (dict, list)):
+            return get_json_codec().dumps(content)
+        return str(content).encode("utf-8")
+    
+    @property
+    def headers(self) -> Headers:
+        """Read-only view of the response headers"""
+        return Headers(self.raw_headers)
+    
+    def set_header(self, name: str, value: str):
+        """Set a header, replacing any existing values"""
+        key = name.lower().encode("latin1")
+        self.raw_headers = [header for header in self.raw_headers if header[0] != key]
+        self.raw_headers.append((key, value.encode("latin1")))
+    
+    def append_header(self, name: str, value: str):
+        """Add a header value (e.g. another Set-Cookie)"""
+        self.raw_headers.append((name.lower().encode("latin1"), value.encode("latin1")))
     
     async def __call__(self, scope, receive, send):
         """ASGI interface for sending response"""
-        # Prepare the body
-        if isinstance(self.content, dict):
-            body = json.dumps(self.content).encode("utf-8")
-            if "content-type" not in self.headers:
-                self.headers["content-type"] = "application/json"
-        elif isinstance(self.content, str):
-            body = self.content.encode("utf-8")
-            if "content-type" not in self.headers:
-                self.headers["content-type"] = "text/plain; charset=utf-8"
-        else:
-            body = self.content if isinstance(self.content, bytes) else str(self.content).encode("utf-8")
-        
-        # Send response start
         await send({
             "type": "http.response.start",
             "status": self.status_code,
-            "headers": [
-                [name.encode(), value.encode()] 
-                for name, value in self.headers.items()
-            ]
+            "headers": self.raw_headers
         })
         
-        # Send response body
         await send({
             "type": "http.response.body",
-            "body": body
+            "body": self.body
         })
     
+    def freeze(self) -> "ConstantResponse":
+        """Snapshot this response as an immutable, shareable ConstantResponse"""
+        return ConstantResponse.from_response(self)
+    
     @classmethod
     def json(cls, data: Any, status_code: int = 200, headers: Optional[Dict[str, str]] = None):
         """Create a JSON response"""
         return cls(
-            content=data,
+            content=get_json_codec().dumps(data),
             status_code=status_code,
             headers=headers,
-            media_type="application/json"
+            media_type=JSON_MEDIA_TYPE
         )
     
     @classmethod
@@ -67,7 +129,7 @@ class Response:
             content=content,
             status_code=status_code,
             headers=headers,
-            media_type="text/html; charset=utf-8"
+            media_type=HTML_MEDIA_TYPE
         )
     
     @classmethod
@@ -77,7 +139,7 @@ class Response:
             content=content,
             status_code=status_code,
             headers=headers,
-            media_type="text/plain; charset=utf-8"
+            media_type=TEXT_MEDIA_TYPE
         )
     
     @classmethod
@@ -92,3 +154,264 @@ class Response:
             status_code=status_code,
             headers=redirect_headers
         )
+
+
+class ConstantResponse(Response):
+    """Immutable response whose ASGI messages are built once and reused
+    
+    Meant for module-level constants (static pages, canned errors): the
+    ``http.response.start`` and ``http.response.body`` messages, including
+    Content-Length, are prebuilt at construction, so sending costs exactly
+    two ``send`` calls and no allocation. Headers are stored as a tuple and
+    the mutating helpers raise ``TypeError``.
+    """
+    
+    __slots__ = ("start_message", "body_message")
+    
+    def __init__(
+        self,
+        content: Union[str, bytes, dict, list] = "",
+        status_code: int = 200,
+        headers: Optional[Dict[str, str]] = None,
+        media_type: Optional[str] = None
+    ):
+        super().__init__(content, status_code, headers, media_type)
+        self._build_messages()
+    
+    @classmethod
+    def from_response(cls, response: Response) -> "ConstantResponse":
+        """Build a constant response from a plain Response's status, headers and body"""
+        constant = cls.__new__(cls)
+        constant.status_code = response.status_code
+        constant.media_type = response.media_type
+        constant.body = response.body
+        constant.raw_headers = response.raw_headers
+        constant._build_messages()
+        return constant
+    
+    def _build_messages(self):
+        raw_headers = list(self.raw_headers)
+        if not any(name == b"content-length" for name, _ in raw_headers):
+            raw_headers.append((b"content-length", str(len(self.body)).encode("latin1")))
+        self.raw_headers = tuple(raw_headers)
+        self.start_message = {
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers
+        }
+        self.body_message = {
+            "type": "http.response.body",
+            "body": self.body
+        }
+    
+    def set_header(self, name: str, value: str):
+        raise TypeError("ConstantResponse is immutable; build a new response instead")
+    
+    def append_header(self, name: str, value: str):
+        raise TypeError("ConstantResponse is immutable; build a new response instead")
+    
+    def freeze(self) -> "ConstantResponse":
+        return self
+    
+    async def __call__(self, scope, receive, send):
+        """ASGI interface; sends the two prebuilt messages"""
+        await send(self.start_message)
+        await send(self.body_message)
+
+
+_STOP = object()
+
+
+async def iterate_in_threadpool(iterator: Iterable) -> AsyncIterator:
+    """Drive a blocking iterator from the default executor"""
+    loop = asyncio.get_running_loop()
+    iterator = iter(iterator)
+    while True:
+        item = await loop.run_in_executor(None, next, iterator, _STOP)
+        if item is _STOP:
+            break
+        yield item
+
+
+class StreamingResponse(Response):
+    """Response whose body is produced by a sync or async iterator
+    
+    Chunks are sent with ``more_body=True`` as they are produced. Chunks
+    smaller than ``buffer_size`` are coalesced into one message (pass 0 to
+    send every chunk as-is). Each ``send`` is awaited before the next chunk
+    is pulled, so a slow client slows the producer down, and production
+    stops as soon as the client disconnects.
+    """
+    
+    __slots__ = ("body_iterator", "buffer_size")
+    
+    DEFAULT_BUFFER_SIZE = 16 * 1024
+    
+    def __init__(
+        self,
+        content: Union[Iterable, AsyncIterable],
+        status_code: int = 200,
+        headers: Optional[Dict[str, str]] = None,
+        media_type: Optional[str] = None,
+        buffer_size: int = DEFAULT_BUFFER_SIZE
+    ):
+        self.status_code = status_code
+        self.body = b""
+        self.media_type = media_type
+        self.raw_headers = self.build_headers(headers, media_type)
+        self.buffer_size = buffer_size
+        if hasattr(content, "__aiter__"):
+            self.body_iterator = content
+        else:
+            self.body_iterator = iterate_in_threadpool(content)
+    
+    async def __call__(self, scope, receive, send):
+        """ASGI interface; races the body stream against client disconnect"""
+        stream = asyncio.ensure_future(self.stream_response(send))
+        listener = asyncio.ensure_future(self.listen_for_disconnect(receive))
+        try:
+            await asyncio.wait((stream, listener), return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in (stream, listener):
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(stream, listener, return_exceptions=True)
+        
+        if not stream.cancelled() and stream.exception() is not None:
+            raise stream.exception()
+    
+    @staticmethod
+    async def listen_for_disconnect(receive):
+        """Return once the server reports the client has gone away"""
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+    
+    async def stream_response(self, send):
+        """Send the start message, then the coalesced body chunks"""
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers
+        })
+        
+        buffer_size = self.buffer_size
+        buffer = bytearray()
+        try:
+            async for chunk in self.body_iterator:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode("utf-8")
+                if not chunk:
+                    continue
+                
+                if not buffer and len(chunk) >= buffer_size:
+                    # Big enough on its own, skip the copy into the buffer
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                    continue
+                
+                buffer += chunk
+                if len(buffer) >= buffer_size:
+                    await send({"type": "http.response.body", "body": bytes(buffer), "more_body": True})
+                    buffer.clear()
+        finally:
+            aclose = getattr(self.body_iterator, "aclose", None)
+            if aclose is not None:
+                await aclose()
+        
+        await send({"type": "http.response.body", "body": bytes(buffer), "more_body": False})
+
+
+class JSONStreamResponse(StreamingResponse):
+    """Stream items from a sync or async iterator as one JSON array
+    
+    Items are encoded one at a time into a reusable buffer that is flushed
+    every ``buffer_size`` bytes, so memory stays proportional to the chunk
+    size rather than the result size. The first item is flushed straight
+    away to keep time-to-first-byte low.
+    """
+    
+    __slots__ = ()
+    
+    opening = b"["
+    separator = b","
+    terminator = b""
+    closing = b"]"
+    
+    def __init__(
+        self,
+        content: Union[Iterable, AsyncIterable],
+        status_code: int = 200,
+        headers: Optional[Dict[str, str]] = None,
+        media_type: str = JSON_MEDIA_TYPE,
+        buffer_size: int = StreamingResponse.DEFAULT_BUFFER_SIZE
+    ):
+        super().__init__(content, status_code, headers, media_type, buffer_size)
+    
+    async def stream_response(self, send):
+        """Send the start message, then the encoded items in buffer-sized chunks"""
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers
+        })
+        
+        dumps = get_json_codec().dumps
+        separator = self.separator
+        terminator = self.terminator
+        buffer_size = self.buffer_size
+        buffer = bytearray(self.opening)
+        first = True
+        try:
+            async for item in self.body_iterator:
+                if not first:
+                    buffer += separator
+                buffer += dumps(item)
+                buffer += terminator
+                if first or len(buffer) >= buffer_size:
+                    first = False
+                    await send({"type": "http.response.body", "body": bytes(buffer), "more_body": True})
+                    buffer.clear()
+        finally:
+            aclose = getattr(self.body_iterator, "aclose", None)
+            if aclose is not None:
+                await aclose()
+        
+        buffer += self.closing
+        await send({"type": "http.response.body", "body": bytes(buffer), "more_body": False})
+
+
+class NDJSONResponse(JSONStreamResponse):
+    """Stream items as newline-delimited JSON, one document per line"""
+    
+    __slots__ = ()
+    
+    opening = b""
+    separator = b""
+    terminator = b"\n"
+    closing = b""
+    
+    def __init__(
+        self,
+        content: Union[Iterable, AsyncIterable],
+        status_code: int = 200,
+        headers: Optional[Dict[str, str]] = None,
+        media_type: str = NDJSON_MEDIA_TYPE,
+        buffer_size: int = StreamingResponse.DEFAULT_BUFFER_SIZE
+    ):
+        super().__init__(content, status_code, headers, media_type, buffer_size)
+
+
+def json_response(data: Any, status_code: int = 200, headers: Optional[Dict[str, str]] = None) -> Response:
+    """Create a JSON response"""
+    return Response.json(data, status_code, headers)
+
+
+def html_response(content: str, status_code: int = 200, headers: Optional[Dict[str, str]] = None) -> Response:
+    """Create an HTML response"""
+    return Response.html(content, status_code, headers)
+
+
+def redirect(url: str, status_code: int = 302, headers: Optional[Dict[str, str]] = None) -> Response:
+    """Create a redirect response"""
+    return Response.redirect(url, status_code, headers)
@@ -0,0 +1,309 @@
+# web/sse.py
+"""
+Server-Sent Events for AbriPy Framework
+
+``EventSourceResponse`` streams events to one client, sending a comment
+line every ``ping_interval`` seconds so proxies keep the connection open.
+``EventChannel`` fans events out to many clients: each event is encoded
+once and the same bytes object is queued for every subscriber, recent
+events are kept in a ring buffer so reconnecting clients resume from
+their ``Last-Event-ID``, and subscribers that fall behind are dropped or
+coalesced instead of buffering without limit::
+
+    prices = EventChannel(history_size=512)
+
+    @app.get('/prices')
+    async def price_stream(request):
+        return prices.response(request)
+
+    prices.publish({"symbol": "ABC", "price": 12.5}, event="price")
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, AsyncIterable, Deque, Dict, Iterable, Optional, Set, Tuple, Union
+
+from .json_codec import get_json_codec
+from .response import StreamingResponse
+
+EVENT_STREAM_MEDIA_TYPE = "text/event-stream"
+PING = b": ping\n\n"
+
+OVERFLOW_DROP = "drop"
+OVERFLOW_COALESCE = "coalesce"
+
+
+def encode_event(data: Any = "", event: Optional[str] = None, id: Optional[str] = None,
+                 retry: Optional[int] = None) -> bytes:
+    """Encode one event in the text/event-stream format
+
+    Dicts and lists are sent as JSON; multi-line data becomes several
+    ``data:`` lines.
+    """
+    if isinstance(data, (dict, list)):
+        data = get_json_codec().dumps(data)
+    if isinstance(data, bytes):
+        data = data.decode("utf-8")
+    elif not isinstance(data, str):
+        data = str(data)
+
+    lines = []
+    if id is not None:
+        lines.append(f"id: {id}")
+    if event is not None:
+        lines.append(f"event: {event}")
+    if retry is not None:
+        lines.append(f"retry: {retry}")
+    for line in data.splitlines() or [""]:
+        lines.append(f"data: {line}")
+    return ("\n".join(lines) + "\n\n").encode("utf-8")
+
+
+class ServerSentEvent:
+    """A single event; ``encode()`` gives its wire form"""
+
+    __slots__ = ("data", "event", "id", "retry")
+
+    def __init__(self, data: Any = "", event: Optional[str] = None, id: Optional[str] = None,
+                 retry: Optional[int] = None):
+        self.data = data
+        self.event = event
+        self.id = id
+        self.retry = retry
+
+    def encode(self) -> bytes:
+        return encode_event(self.data, self.event, self.id, self.retry)
+
+
+class EventSourceResponse(StreamingResponse):
+    """Stream events from a sync or async iterator as text/event-stream
+
+    Items may be ``ServerSentEvent`` instances, pre-encoded bytes (such as
+    the batches yielded by an ``EventChannel`` subscription), strings or
+    JSON-serializable dicts/lists. Each item is flushed immediately; a
+    ``: ping`` comment is sent whenever nothing was written for
+    ``ping_interval`` seconds.
+    """
+
+    __slots__ = ("ping_interval", "retry", "_last_send")
+
+    DEFAULT_PING_INTERVAL = 15.0
+
+    def __init__(
+        self,
+        content: Union[Iterable, AsyncIterable],
+        status_code: int = 200,
+        headers: Optional[Dict[str, str]] = None,
+        ping_interval: Optional[float] = DEFAULT_PING_INTERVAL,
+        retry: Optional[int] = None
+    ):
+        sse_headers = {"cache-control": "no-cache", "x-accel-buffering": "no"}
+        if headers:
+            sse_headers.update(headers)
+        super().__init__(content, status_code, sse_headers, EVENT_STREAM_MEDIA_TYPE, buffer_size=0)
+        self.ping_interval = ping_interval
+        self.retry = retry
+        self._last_send = 0.0
+
+    @staticmethod
+    def encode_item(item: Any) -> bytes:
+        """Wire form of one item from the content iterator"""
+        if isinstance(item, bytes):
+            return item
+        if isinstance(item, ServerSentEvent):
+            return item.encode()
+        return encode_event(item)
+
+    async def stream_response(self, send):
+        """Send the start message, then each event as it is produced"""
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers
+        })
+        if self.retry is not None:
+            await send({"type": "http.response.body", "body": f"retry: {self.retry}\n\n".encode(), "more_body": True})
+        self._last_send = time.monotonic()
+
+        lock = asyncio.Lock()
+        pinger = None
+        if self.ping_interval:
+            pinger = asyncio.ensure_future(self._ping(send, lock))
+        try:
+            async for item in self.body_iterator:
+                chunk = self.encode_item(item)
+                if not chunk:
+                    continue
+                async with lock:
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                    self._last_send = time.monotonic()
+        finally:
+            if pinger is not None:
+                pinger.cancel()
+                await asyncio.gather(pinger, return_exceptions=True)
+            aclose = getattr(self.body_iterator, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    async def _ping(self, send, lock: asyncio.Lock):
+        interval = self.ping_interval
+        while True:
+            await asyncio.sleep(max(self._last_send + interval - time.monotonic(), 0))
+            if time.monotonic() - self._last_send < interval:
+                continue
+            async with lock:
+                await send({"type": "http.response.body", "body": PING, "more_body": True})
+                self._last_send = time.monotonic()
+
+
+class Subscription:
+    """One subscriber's bounded queue of encoded events
+
+    Async-iterating a subscription yields bytes; events that piled up
+    since the last read are joined into a single chunk. Iteration ends
+    when the subscription is closed or dropped for falling behind.
+    """
+
+    __slots__ = ("channel", "max_pending", "overflow", "closed", "dropped", "_pending", "_replayed", "_ready")
+
+    def __init__(self, channel: "EventChannel", max_pending: int, overflow: str):
+        self.channel = channel
+        self.max_pending = max_pending
+        self.overflow = overflow
+        self.closed = False
+        self.dropped = False
+        self._pending: Deque[Tuple[Optional[str], bytes]] = deque()
+        # Replayed history at the front of _pending; it doesn't count toward max_pending
+        self._replayed = 0
+        self._ready = asyncio.Event()
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def push(self, key: Optional[str], chunk: bytes) -> bool:
+        """Queue an encoded event; returns False if the subscriber was dropped"""
+        if self.closed:
+            return False
+        pending = self._pending
+        replayed = self._replayed
+        if len(pending) - replayed >= self.max_pending:
+            if self.overflow != OVERFLOW_COALESCE:
+                self.dropped = True
+                self.close()
+                return False
+            # The new event supersedes the oldest live queued one of its type
+            for index in range(replayed, len(pending)):
+                if pending[index][0] == key:
+                    del pending[index]
+                    break
+            else:
+                del pending[replayed]
+        pending.append((key, chunk))
+        self._ready.set()
+        return True
+
+    def close(self):
+        """Stop the subscription and detach it from its channel"""
+        if not self.closed:
+            self.closed = True
+            self.channel._subscribers.discard(self)
+            self._ready.set()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> bytes:
+        while not self._pending:
+            if self.closed:
+                raise StopAsyncIteration
+            self._ready.clear()
+            await self._ready.wait()
+        if self.dropped:
+            # A dropped client reconnects and resumes with Last-Event-ID
+            raise StopAsyncIteration
+
+        pending = self._pending
+        if len(pending) == 1:
+            chunk = pending.popleft()[1]
+        else:
+            chunk = b"".join(item[1] for item in pending)
+            pending.clear()
+        self._replayed = 0
+        return chunk
+
+    async def aclose(self):
+        self.close()
+
+
+class EventChannel:
+    """Broadcast events to many SSE subscribers
+
+    ``publish`` encodes an event once and queues the same bytes for every
+    subscriber. The last ``history_size`` events are kept so that a client
+    reconnecting with ``Last-Event-ID`` receives what it missed (everything
+    retained is replayed if the id is no longer in the buffer). A
+    subscriber with ``max_pending`` events queued is dropped, so its
+    browser reconnects and resumes from the buffer, or with
+    ``overflow="coalesce"`` has new events replace queued ones of the same
+    type (the oldest queued event goes if there is none).
+
+    Must be used from the event loop thread.
+    """
+
+    def __init__(self, history_size: int = 256, max_pending: int = 64, overflow: str = OVERFLOW_DROP):
+        if overflow not in (OVERFLOW_DROP, OVERFLOW_COALESCE):
+            raise ValueError(f"Unknown overflow policy '{overflow}' (choose from drop, coalesce)")
+        self.max_pending = max_pending
+        self.overflow = overflow
+        self.history: Deque[Tuple[str, Optional[str], bytes]] = deque(maxlen=history_size)
+        self.dropped = 0
+        self._subscribers: Set[Subscription] = set()
+        self._next_id = 1
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, data: Any = "", event: Optional[str] = None, id: Optional[str] = None) -> str:
+        """Encode an event once and queue it for every subscriber; returns its id"""
+        if id is None:
+            id = str(self._next_id)
+            self._next_id += 1
+        chunk = encode_event(data, event, id)
+        self.history.append((id, event, chunk))
+
+        for subscriber in list(self._subscribers):
+            if not subscriber.push(event, chunk):
+                self.dropped += 1
+        return id
+
+    def subscribe(self, last_event_id: Optional[str] = None) -> Subscription:
+        """Register a subscriber, replaying events after last_event_id"""
+        subscription = Subscription(self, self.max_pending, self.overflow)
+        if last_event_id is not None and self.history:
+            replay = list(self.history)
+            for index, (event_id, _, _) in enumerate(replay):
+                if event_id == last_event_id:
+                    replay = replay[index + 1:]
+                    break
+            # Replayed history is already bounded by history_size, so only
+            # events published from now on count toward max_pending
+            subscription._pending.extend((event, chunk) for _, event, chunk in replay)
+            subscription._replayed = len(replay)
+            if replay:
+                subscription._ready.set()
+        self._subscribers.add(subscription)
+        return subscription
+
+    def response(self, request, **kwargs) -> EventSourceResponse:
+        """EventSourceResponse for a new subscriber, resuming from the request's Last-Event-ID"""
+        return EventSourceResponse(self.subscribe(request.headers.get("last-event-id")), **kwargs)
+
+    def close(self):
+        """End every subscription"""
+        for subscriber in list(self._subscribers):
+            subscriber.close()
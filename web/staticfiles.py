@@ -0,0 +1,300 @@
+# web/staticfiles.py
+import asyncio
+import email.utils
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import shutil
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from .files import FileResponse, make_etag
+from .response import ConstantResponse, Response, content_type_header
+
+IMMUTABLE_CACHE_CONTROL = b"public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = b"no-cache"
+
+COMPRESSIBLE_EXTENSIONS = frozenset((
+    ".html", ".htm", ".css", ".js", ".mjs", ".json", ".map", ".svg", ".xml",
+    ".txt", ".csv", ".md", ".wasm", ".ico", ".webmanifest",
+))
+
+_FINGERPRINT = re.compile(r"^(?P<stem>.+)\.(?P<hash>[0-9a-f]{8})(?P<suffix>\.[^./]+)$")
+_NOT_FOUND = ConstantResponse("Not Found", status_code=404)
+
+
+class _CacheEntry:
+    __slots__ = ("mtime_ns", "size", "checked", "etag", "response")
+
+    def __init__(self, mtime_ns: int, size: int, etag: bytes, response: Response):
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.checked = time.monotonic()
+        self.etag = etag
+        self.response = response
+
+
+class StaticFiles:
+    """Serve files under a directory, mounted at a URL prefix
+
+    Small files are kept in a bounded LRU cache of ready-to-send responses,
+    invalidated when the file's mtime or size changes (checked at most
+    every ``check_interval`` seconds per file). A precompressed ``.gz``
+    sibling is preferred when the client accepts gzip. URLs produced by
+    ``url_for`` carry a content hash and are served with a one-year
+    immutable Cache-Control; everything else must be revalidated.
+
+    On a cache miss the stat calls, hashing and file reads run in the
+    default executor, so large files don't stall the event loop.
+    ``url_for`` is synchronous for use in templates: fingerprints are
+    cached and re-checked at most every ``check_interval`` seconds, and
+    ``await static.load_fingerprints()`` at startup hashes every file in
+    the executor so no request has to.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        prefix: str = "/static",
+        max_cache_entries: int = 512,
+        max_cached_file_size: int = 64 * 1024,
+        max_cache_bytes: int = 32 * 1024 * 1024,
+        check_interval: float = 1.0
+    ):
+        self.directory = os.path.realpath(directory)
+        self.prefix = prefix.rstrip("/")
+        self.max_cache_entries = max_cache_entries
+        self.max_cached_file_size = max_cached_file_size
+        self.max_cache_bytes = max_cache_bytes
+        self.check_interval = check_interval
+
+        self._cache: "OrderedDict[Tuple[str, bool], _CacheEntry]" = OrderedDict()
+        self._cache_bytes = 0
+        self._fingerprints: Dict[str, Tuple[int, str, float]] = {}  # path: (mtime_ns, hash, checked)
+
+    def resolve(self, relative_path: str) -> Optional[str]:
+        """Map a URL path below the prefix to a file path inside the directory"""
+        if "\x00" in relative_path:
+            return None
+        full_path = os.path.realpath(os.path.join(self.directory, relative_path.lstrip("/")))
+        if not full_path.startswith(self.directory + os.sep):
+            return None
+        return full_path
+
+    def fingerprint(self, relative_path: str) -> Optional[str]:
+        """Short content hash of a file, cached until its mtime changes"""
+        full_path = self.resolve(relative_path)
+        if full_path is None:
+            return None
+        now = time.monotonic()
+        cached = self._fingerprints.get(full_path)
+        if cached is not None and now - cached[2] < self.check_interval:
+            return cached[1]
+
+        try:
+            mtime_ns = os.stat(full_path).st_mtime_ns
+        except OSError:
+            self._fingerprints.pop(full_path, None)
+            return None
+        if cached is not None and cached[0] == mtime_ns:
+            value = cached[1]
+        else:
+            digest = hashlib.sha256()
+            with open(full_path, "rb") as f:
+                for block in iter(lambda: f.read(64 * 1024), b""):
+                    digest.update(block)
+            value = digest.hexdigest()[:8]
+        self._fingerprints[full_path] = (mtime_ns, value, now)
+        return value
+
+    async def load_fingerprints(self) -> int:
+        """Hash every file under the directory in the executor; returns how many"""
+        return await asyncio.get_running_loop().run_in_executor(None, self._fingerprint_all)
+
+    def _fingerprint_all(self) -> int:
+        count = 0
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if self.fingerprint(os.path.relpath(os.path.join(root, name), self.directory)) is not None:
+                    count += 1
+        return count
+
+    def url_for(self, relative_path: str) -> str:
+        """Fingerprinted URL for a file, e.g. /static/app.3f2a1b9c.css"""
+        relative_path = relative_path.lstrip("/")
+        value = self.fingerprint(relative_path)
+        if value is None:
+            return f"{self.prefix}/{relative_path}"
+        stem, suffix = os.path.splitext(relative_path)
+        return f"{self.prefix}/{stem}.{value}{suffix}"
+
+    async def __call__(self, request) -> Response:
+        """Route handler for GET/HEAD requests under the prefix"""
+        relative_path = request.path[len(self.prefix):]
+        gzip_ok = b"gzip" in request.headers.get_raw(b"accept-encoding", b"")
+        cacheable = request.method != "HEAD" and request.headers.get_raw(b"range") is None
+
+        # Hot path: a recently validated cache entry for this exact URL
+        key = (relative_path, gzip_ok)
+        entry = self._cache.get(key)
+        if cacheable and entry is not None and time.monotonic() - entry.checked < self.check_interval:
+            self._cache.move_to_end(key)
+            return self._conditional(entry, request)
+
+        loop = asyncio.get_running_loop()
+        located = await loop.run_in_executor(None, self._locate, relative_path, gzip_ok)
+        if located is None:
+            self._evict(key)
+            return _NOT_FOUND
+        full_path, serve_path, stat_result, encoding, immutable = located
+        media_type = mimetypes.guess_type(full_path)[0] or "application/octet-stream"
+
+        if cacheable and stat_result.st_size <= self.max_cached_file_size:
+            if entry is not None and entry.mtime_ns == stat_result.st_mtime_ns and entry.size == stat_result.st_size:
+                entry.checked = time.monotonic()
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                else:
+                    # Evicted by another request while we were checking the file
+                    self._store(key, entry)
+            else:
+                entry = await loop.run_in_executor(
+                    None, self._build_entry, serve_path, stat_result, media_type, encoding, immutable
+                )
+                self._evict(key)
+                self._store(key, entry)
+            return self._conditional(entry, request)
+
+        headers = {
+            "cache-control": (IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL).decode(),
+            "vary": "Accept-Encoding",
+        }
+        if encoding:
+            headers["content-encoding"] = encoding
+        return FileResponse(serve_path, media_type=media_type, headers=headers, stat_result=stat_result)
+
+    def _locate(self, relative_path: str, gzip_ok: bool
+                ) -> Optional[Tuple[str, str, os.stat_result, Optional[str], bool]]:
+        """Filesystem work for a cache miss: (path, served path, stat, encoding, immutable)"""
+        full_path = self.resolve(relative_path)
+        if full_path is None:
+            return None
+        immutable = False
+        if not os.path.isfile(full_path):
+            # Strip a content hash added by url_for
+            match = _FINGERPRINT.match(relative_path)
+            if match is None:
+                return None
+            full_path = self.resolve(match.group("stem") + match.group("suffix"))
+            if full_path is None or not os.path.isfile(full_path):
+                return None
+            immutable = self.fingerprint(full_path[len(self.directory):]) == match.group("hash")
+
+        serve_path, encoding = self._select_variant(full_path, gzip_ok)
+        try:
+            stat_result = os.stat(serve_path)
+        except OSError:
+            return None
+        return full_path, serve_path, stat_result, encoding, immutable
+
+    @staticmethod
+    def _select_variant(full_path: str, gzip_ok: bool) -> Tuple[str, Optional[str]]:
+        if gzip_ok:
+            compressed = full_path + ".gz"
+            try:
+                # A .gz older than its source is stale; serve the source
+                if os.stat(compressed).st_mtime_ns >= os.stat(full_path).st_mtime_ns:
+                    return compressed, "gzip"
+            except OSError:
+                pass
+        return full_path, None
+
+    @staticmethod
+    def _build_entry(serve_path: str, stat_result: os.stat_result, media_type: str,
+                     encoding: Optional[str], immutable: bool) -> _CacheEntry:
+        with open(serve_path, "rb") as f:
+            body = f.read()
+
+        etag = make_etag(stat_result).encode("latin1")
+        response = Response(body, media_type=media_type)
+        response.raw_headers = [
+            content_type_header(media_type),
+            (b"content-length", str(len(body)).encode("latin1")),
+            (b"etag", etag),
+            (b"last-modified", email.utils.formatdate(stat_result.st_mtime, usegmt=True).encode("latin1")),
+            (b"cache-control", IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL),
+            (b"vary", b"Accept-Encoding"),
+        ]
+        if encoding:
+            response.raw_headers.append((b"content-encoding", encoding.encode("latin1")))
+        return _CacheEntry(stat_result.st_mtime_ns, stat_result.st_size, etag, response.freeze())
+
+    @staticmethod
+    def _conditional(entry: _CacheEntry, request) -> Response:
+        if_none_match = request.headers.get_raw(b"if-none-match")
+        if if_none_match is not None and entry.etag in [tag.strip() for tag in if_none_match.split(b",")]:
+            response = Response(b"", status_code=304)
+            response.raw_headers = [
+                header for header in entry.response.raw_headers
+                if header[0] not in (b"content-type", b"content-length")
+            ]
+            return response
+        return entry.response
+
+    def _store(self, key: Tuple[str, bool], entry: _CacheEntry):
+        self._cache[key] = entry
+        self._cache_bytes += entry.size
+        while self._cache and (
+            len(self._cache) > self.max_cache_entries or self._cache_bytes > self.max_cache_bytes
+        ):
+            _, evicted = self._cache.popitem(last=False)
+            self._cache_bytes -= evicted.size
+
+    def _evict(self, key: Tuple[str, bool]):
+        entry = self._cache.pop(key, None)
+        if entry is not None:
+            self._cache_bytes -= entry.size
+
+    def clear_cache(self):
+        """Drop every cached response"""
+        self._cache.clear()
+        self._cache_bytes = 0
+
+
+def precompress_directory(directory: str, min_size: int = 256, level: int = 9,
+                          extensions=COMPRESSIBLE_EXTENSIONS) -> List[Tuple[str, int, int]]:
+    """Write .gz siblings for compressible files that are missing or stale
+
+    Returns (path, original size, compressed size) for every file written.
+    Files that don't shrink are skipped.
+    """
+    written = []
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if name.endswith(".gz") or os.path.splitext(name)[1].lower() not in extensions:
+                continue
+
+            path = os.path.join(root, name)
+            target = path + ".gz"
+            source_stat = os.stat(path)
+            if source_stat.st_size < min_size:
+                continue
+            if os.path.exists(target) and os.stat(target).st_mtime_ns >= source_stat.st_mtime_ns:
+                continue
+
+            temporary = target + ".tmp"
+            with open(path, "rb") as src, open(temporary, "wb") as raw:
+                # mtime=0 keeps the output reproducible across builds
+                with gzip.GzipFile(filename="", mode="wb", compresslevel=level, fileobj=raw, mtime=0) as dst:
+                    shutil.copyfileobj(src, dst)
+
+            compressed_size = os.path.getsize(temporary)
+            if compressed_size >= source_stat.st_size:
+                os.remove(temporary)
+                continue
+            os.replace(temporary, target)
+            written.append((path, source_stat.st_size, compressed_size))
+    return written
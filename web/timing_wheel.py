@@ -0,0 +1,81 @@
+# web/timing_wheel.py
+"""
+Hierarchical timing wheel
+
+Tracks deadlines for very many keys (e.g. WebSocket connections) with
+O(1) schedule/cancel and per-tick work proportional to what expires,
+instead of one event-loop timer per key. Level 0 has one slot per tick;
+each higher level has slots ``slots`` times wider, and its entries are
+cascaded down when the wheel reaches their slot.
+"""
+
+import math
+from typing import Dict, Hashable, List, Tuple
+
+
+class TimingWheel:
+    """Deadlines in whole ticks; call ``advance()`` once per tick"""
+
+    def __init__(self, tick: float = 1.0, slots: int = 64, levels: int = 4):
+        self.tick = tick
+        self.slots = slots
+        self.levels = levels
+        self.current = 0
+        self._spans = [slots ** level for level in range(levels)]
+        self._wheels: List[List[Dict[Hashable, int]]] = [
+            [{} for _ in range(slots)] for _ in range(levels)
+        ]
+        self._where: Dict[Hashable, Tuple[int, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._where
+
+    def schedule(self, key: Hashable, delay: float):
+        """(Re)schedule key to expire after delay seconds (at least one tick)"""
+        self.cancel(key)
+        self._place(key, self.current + max(math.ceil(delay / self.tick), 1))
+
+    def cancel(self, key: Hashable):
+        where = self._where.pop(key, None)
+        if where is not None:
+            level, slot = where
+            del self._wheels[level][slot][key]
+
+    def _place(self, key: Hashable, deadline: int):
+        remaining = deadline - self.current
+        level = 0
+        while level < self.levels - 1 and remaining >= self._spans[level + 1]:
+            level += 1
+        slot = (deadline // self._spans[level]) % self.slots
+        self._wheels[level][slot][key] = deadline
+        self._where[key] = (level, slot)
+
+    def advance(self) -> List[Hashable]:
+        """Move forward one tick and return the keys that expired"""
+        self.current += 1
+        current = self.current
+
+        # Cascade the higher levels whose slot boundary was reached, top first
+        for level in range(self.levels - 1, 0, -1):
+            span = self._spans[level]
+            if current % span:
+                continue
+            slot = (current // span) % self.slots
+            entries = self._wheels[level][slot]
+            if entries:
+                self._wheels[level][slot] = {}
+                for key, deadline in entries.items():
+                    self._place(key, deadline)
+
+        slot = current % self.slots
+        expired = self._wheels[0][slot]
+        if not expired:
+            return []
+        self._wheels[0][slot] = {}
+        where = self._where
+        for key in expired:
+            del where[key]
+        return list(expired)
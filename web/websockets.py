@@ -1,17 +1,192 @@
 # http/websockets.py
 import asyncio
-import json
-from typing import Dict, List, Callable, Any, Optional
+import logging
+import math
+import time
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Callable, Any, Optional, Set, Tuple, Union
 import uuid
+from .message_codecs import MessageCodec, available_codecs, json_message_codec
+from .timing_wheel import TimingWheel
+
+logger = logging.getLogger("abripy")
+
+
+class WebSocketDisconnect(Exception):
+    """Raised by receive calls once the client has disconnected"""
+    
+    def __init__(self, code: int = 1000, reason: str = ""):
+        super().__init__(code, reason)
+        self.code = code
+        self.reason = reason
+
+
+class ASGIWebSocket:
+    """WebSocket API over an ASGI scope/receive/send triple
+    
+    Provides the ``send_text``/``receive_text``/``close`` methods that
+    ``WebSocketConnection`` expects.
+    """
+    
+    __slots__ = ("scope", "_receive", "_send", "accepted", "closed")
+    
+    def __init__(self, scope, receive, send):
+        self.scope = scope
+        self._receive = receive
+        self._send = send
+        self.accepted = False
+        self.closed = False
+    
+    @property
+    def path(self) -> str:
+        return self.scope.get("path", "/")
+    
+    @property
+    def subprotocols(self) -> List[str]:
+        return self.scope.get("subprotocols") or []
+    
+    async def accept(self, subprotocol: Optional[str] = None, headers: Optional[List] = None):
+        """Complete the handshake (waits for websocket.connect first)"""
+        message = await self._receive()
+        if message["type"] == "websocket.disconnect":
+            self.closed = True
+            raise WebSocketDisconnect(message.get("code", 1000))
+        
+        accept = {"type": "websocket.accept"}
+        if subprotocol is not None:
+            accept["subprotocol"] = subprotocol
+        if headers:
+            accept["headers"] = headers
+        await self._send(accept)
+        self.accepted = True
+    
+    async def receive(self) -> Union[str, bytes]:
+        """Next text or binary frame"""
+        message = await self._receive()
+        if message["type"] == "websocket.disconnect":
+            self.closed = True
+            raise WebSocketDisconnect(message.get("code", 1000), message.get("reason") or "")
+        text = message.get("text")
+        return text if text is not None else message.get("bytes") or b""
+    
+    async def receive_text(self) -> str:
+        data = await self.receive()
+        return data if isinstance(data, str) else data.decode("utf-8")
+    
+    async def receive_bytes(self) -> bytes:
+        data = await self.receive()
+        return data if isinstance(data, bytes) else data.encode("utf-8")
+    
+    async def send_text(self, data: str):
+        await self._send({"type": "websocket.send", "text": data})
+    
+    async def send_bytes(self, data: bytes):
+        await self._send({"type": "websocket.send", "bytes": data})
+    
+    async def close(self, code: int = 1000, reason: str = ""):
+        """Close the connection (before accept this rejects the handshake)"""
+        if self.closed:
+            return
+        self.closed = True
+        await self._send({"type": "websocket.close", "code": code, "reason": reason})
+
+
+OVERFLOW_DROP_OLDEST = "drop_oldest"
+OVERFLOW_DISCONNECT = "disconnect"
+OVERFLOW_COALESCE = "coalesce"
+OVERFLOW_POLICIES = (OVERFLOW_DROP_OLDEST, OVERFLOW_DISCONNECT, OVERFLOW_COALESCE)
+
+COALESCE_ARRAY = "array"
+COALESCE_LAST_VALUE = "last_value"
+
+# Close code sent to clients disconnected for falling behind ("Try Again Later")
+SLOW_CONSUMER_CLOSE_CODE = 1013
+# Close code sent to clients evicted after idle_timeout ("Going Away")
+IDLE_CLOSE_CODE = 1001
+
+# ASGI has no access to protocol-level ping frames, so heartbeats are
+# application messages ({"type": "ping"} in the connection's codec);
+# clients answer with any message, e.g. {"type": "pong"}
+
+Frame = Union[str, bytes]
+
+
+class FanoutStats:
+    """Broadcast counters and latency samples for a WebSocketManager
+    
+    ``enqueue`` latency is how long a broadcast took to queue its frame for
+    the whole room; ``delivery`` latency is how long a frame waited in a
+    connection's queue before its writer finished sending it.
+    """
+    
+    __slots__ = ("broadcasts", "frames_queued", "frames_sent", "dropped", "disconnected",
+                 "coalesced", "enqueue_samples", "delivery_samples")
+    
+    def __init__(self, max_samples: int = 1024):
+        self.broadcasts = 0
+        self.frames_queued = 0
+        self.frames_sent = 0
+        self.dropped = 0
+        self.disconnected = 0
+        self.coalesced = 0
+        self.enqueue_samples: Deque[float] = deque(maxlen=max_samples)
+        self.delivery_samples: Deque[float] = deque(maxlen=max_samples)
+    
+    @staticmethod
+    def percentile(samples, fraction: float) -> float:
+        """Nearest-rank percentile of samples (0.0 when empty)"""
+        if not samples:
+            return 0.0
+        ordered = sorted(samples)
+        index = max(math.ceil(fraction * len(ordered)) - 1, 0)
+        return ordered[index]
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Counters plus p50/p99/max latencies in milliseconds"""
+        report: Dict[str, Any] = {
+            "broadcasts": self.broadcasts,
+            "frames_queued": self.frames_queued,
+            "frames_sent": self.frames_sent,
+            "dropped": self.dropped,
+            "disconnected": self.disconnected,
+            "coalesced": self.coalesced,
+        }
+        for name, samples in (("enqueue", self.enqueue_samples), ("delivery", self.delivery_samples)):
+            report[f"{name}_p50_ms"] = self.percentile(samples, 0.50) * 1000
+            report[f"{name}_p99_ms"] = self.percentile(samples, 0.99) * 1000
+            report[f"{name}_max_ms"] = max(samples, default=0.0) * 1000
+        return report
+
 
 class WebSocketConnection:
-    """WebSocket connection wrapper"""
+    """WebSocket connection wrapper
+    
+    ``send_text``/``send_json`` write directly. ``enqueue`` instead puts a
+    pre-encoded frame on a bounded outbound queue drained by a per-connection
+    writer task, so a slow client never blocks the sender; broadcasts use it.
+    """
     
-    def __init__(self, websocket, connection_id: str = None):
+    def __init__(self, websocket, connection_id: str = None, max_queue: int = 256,
+                 codec: Optional[MessageCodec] = None):
         self.websocket = websocket
+        self.codec = codec or json_message_codec()
         self.connection_id = connection_id or str(uuid.uuid4())
         self.is_connected = True
         self.user_data: Dict[str, Any] = {}
+        self.max_queue = max_queue
+        self.stats: Optional[FanoutStats] = None
+        self.last_seen = time.monotonic()
+        self.last_ping = 0.0
+        self.coalesce_mode: Optional[str] = None
+        self.coalesce_window = 0.0
+        self.coalesce_key = "type"
+        self._coalesced: Dict[Any, str] = {}
+        self._coalesce_overflow = OVERFLOW_DROP_OLDEST
+        self._coalesce_handle: Optional[asyncio.Handle] = None
+        self._coalesce_counter = 0
+        self._queue: Deque[Tuple[Frame, Any, float]] = deque()
+        self._ready: Optional[asyncio.Event] = None
+        self._writer: Optional[asyncio.Task] = None
     
     async def send_text(self, message: str):
         """Send text message"""
@@ -21,77 +196,410 @@ class WebSocketConnection:
             except Exception:
                 self.is_connected = False
     
+    async def send_bytes(self, message: bytes):
+        """Send binary message"""
+        if self.is_connected:
+            try:
+                await self.websocket.send_bytes(message)
+            except Exception:
+                self.is_connected = False
+    
     async def send_json(self, data: Dict[str, Any]):
-        """Send JSON message"""
-        await self.send_text(json.dumps(data))
+        """Send a message in the connection's codec (JSON text unless another was negotiated)
+        
+        When coalescing, the message is queued for the next coalesced frame.
+        """
+        frame = self.codec.encode(data)
+        if self.coalesce_mode is not None:
+            key = data.get(self.coalesce_key) if isinstance(data, dict) else None
+            self.enqueue(frame, key=key)
+        elif isinstance(frame, str):
+            await self.send_text(frame)
+        else:
+            await self.send_bytes(frame)
+    
+    async def receive(self) -> Frame:
+        """Receive the next text or binary frame"""
+        data = await self.websocket.receive()
+        # Any inbound frame (including a pong) proves the client is alive
+        self.last_seen = time.monotonic()
+        return data
     
     async def receive_text(self) -> str:
         """Receive text message"""
-        return await self.websocket.receive_text()
+        data = await self.receive()
+        return data if isinstance(data, str) else data.decode("utf-8")
     
     async def receive_json(self) -> Dict[str, Any]:
-        """Receive JSON message"""
-        text = await self.receive_text()
-        return json.loads(text)
+        """Receive a message in the connection's codec"""
+        data = await self.receive()
+        if self.codec.binary and isinstance(data, str):
+            data = data.encode("utf-8")
+        elif not self.codec.binary and isinstance(data, bytes):
+            data = data.decode("utf-8")
+        return self.codec.decode(data)
+    
+    @property
+    def queued(self) -> int:
+        """Frames waiting in the outbound queue"""
+        return len(self._queue)
+    
+    def enable_coalescing(self, mode: str = COALESCE_ARRAY, window: float = 0.0, key: str = "type"):
+        """Merge outgoing JSON text frames into one frame per loop iteration or window
+        
+        Frames queued (by ``send_json``, ``enqueue`` or room broadcasts)
+        within the same event-loop iteration, or within ``window`` seconds
+        if it is positive, are sent as a single JSON array. With
+        ``last_value`` only the newest message per ``key`` value survives.
+        The client must expect arrays once this is enabled.
+        """
+        if mode not in (COALESCE_ARRAY, COALESCE_LAST_VALUE):
+            raise ValueError(f"Unknown coalescing mode '{mode}' (choose from array, last_value)")
+        self.coalesce_mode = mode
+        self.coalesce_window = window
+        self.coalesce_key = key
+    
+    def disable_coalescing(self):
+        """Send anything still buffered and go back to one frame per message"""
+        self.flush_coalesced()
+        self.coalesce_mode = None
     
-    async def close(self):
+    def enqueue(self, frame: Frame, overflow: str = OVERFLOW_DROP_OLDEST, key: Any = None) -> bool:
+        """Queue a pre-encoded frame for the writer task
+        
+        When the queue is full, ``drop_oldest`` discards the oldest frame,
+        ``coalesce`` replaces the oldest queued frame with the same key (or
+        the oldest frame if none matches), and ``disconnect`` closes the
+        connection. Returns False if the frame was not queued.
+        """
+        if self.coalesce_mode is not None and isinstance(frame, str):
+            return self._buffer_frame(frame, overflow, key)
+        return self._push(frame, overflow, key)
+    
+    def _buffer_frame(self, frame: str, overflow: str, key: Any) -> bool:
+        if not self.is_connected:
+            return False
+        pending = self._coalesced
+        if self.coalesce_mode == COALESCE_ARRAY or key is None:
+            # Every message is kept; a counter keeps the dict keys unique
+            self._coalesce_counter += 1
+            key = (None, self._coalesce_counter)
+        elif key in pending and self.stats is not None:
+            self.stats.coalesced += 1
+        pending[key] = frame
+        self._coalesce_overflow = overflow
+        
+        if len(pending) >= self.max_queue:
+            self.flush_coalesced()
+        elif self._coalesce_handle is None:
+            loop = asyncio.get_running_loop()
+            if self.coalesce_window > 0:
+                self._coalesce_handle = loop.call_later(self.coalesce_window, self.flush_coalesced)
+            else:
+                self._coalesce_handle = loop.call_soon(self.flush_coalesced)
+        return True
+    
+    def flush_coalesced(self):
+        """Queue the buffered messages as one JSON array frame"""
+        if self._coalesce_handle is not None:
+            self._coalesce_handle.cancel()
+            self._coalesce_handle = None
+        pending = self._coalesced
+        if not pending:
+            return
+        frames = list(pending.values())
+        pending.clear()
+        if self.stats is not None:
+            self.stats.coalesced += len(frames) - 1
+        # Frames are already JSON, so the array is built without re-encoding
+        self._push("[" + ",".join(frames) + "]", self._coalesce_overflow, None)
+    
+    def _push(self, frame: Frame, overflow: str, key: Any) -> bool:
+        if not self.is_connected:
+            return False
+        queue = self._queue
+        stats = self.stats
+        if len(queue) >= self.max_queue:
+            if overflow == OVERFLOW_DISCONNECT:
+                self.is_connected = False
+                queue.clear()
+                if stats is not None:
+                    stats.disconnected += 1
+                asyncio.ensure_future(self.close_quietly(SLOW_CONSUMER_CLOSE_CODE))
+                return False
+            if overflow == OVERFLOW_COALESCE and key is not None:
+                for index, item in enumerate(queue):
+                    if item[1] == key:
+                        del queue[index]
+                        break
+                else:
+                    queue.popleft()
+            else:
+                queue.popleft()
+            if stats is not None:
+                stats.dropped += 1
+        
+        queue.append((frame, key, time.perf_counter()))
+        if stats is not None:
+            stats.frames_queued += 1
+        if self._writer is None:
+            self._ready = asyncio.Event()
+            self._writer = asyncio.ensure_future(self._write_loop())
+        self._ready.set()
+        return True
+    
+    async def _write_loop(self):
+        queue = self._queue
+        ready = self._ready
+        websocket = self.websocket
+        try:
+            while self.is_connected:
+                if not queue:
+                    ready.clear()
+                    await ready.wait()
+                    continue
+                frame, _, queued_at = queue.popleft()
+                if isinstance(frame, str):
+                    await websocket.send_text(frame)
+                else:
+                    await websocket.send_bytes(frame)
+                stats = self.stats
+                if stats is not None:
+                    stats.frames_sent += 1
+                    stats.delivery_samples.append(time.perf_counter() - queued_at)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.is_connected = False
+    
+    async def close_quietly(self, code: int):
+        """Close from a background task, ignoring errors from an already-dead socket"""
+        try:
+            await self.websocket.close(code)
+        except Exception:
+            pass
+    
+    def stop_writer(self):
+        """Cancel the writer task and drop any queued frames"""
+        if self._coalesce_handle is not None:
+            self._coalesce_handle.cancel()
+            self._coalesce_handle = None
+        self._coalesced.clear()
+        self._queue.clear()
+        if self._writer is not None and not self._writer.done():
+            self._writer.cancel()
+        self._writer = None
+    
+    async def close(self, code: int = 1000):
         """Close connection"""
         self.is_connected = False
-        await self.websocket.close()
+        self.stop_writer()
+        await self.websocket.close(code)
 
 class WebSocketManager:
     """WebSocket connection manager"""
     
-    def __init__(self):
+    def __init__(
+        self,
+        overflow: str = OVERFLOW_DROP_OLDEST,
+        ping_interval: Optional[float] = None,
+        idle_timeout: Optional[float] = None,
+        heartbeat_tick: float = 1.0,
+        codecs: Optional[List[str]] = None
+    ):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy '{overflow}' (choose from {', '.join(OVERFLOW_POLICIES)})")
         self.connections: Dict[str, WebSocketConnection] = {}
-        self.rooms: Dict[str, List[str]] = {}
+        # Rooms are insertion-ordered sets (dict keys); connection_rooms is
+        # the reverse index, so leaving every room costs O(rooms joined)
+        self.rooms: Dict[str, Dict[str, None]] = {}
+        self.connection_rooms: Dict[str, Set[str]] = {}
         self.handlers: Dict[str, Callable] = {}
+        self.overflow = overflow
+        self.room_overflow: Dict[str, str] = {}
+        self.stats = FanoutStats()
+        self.backplane = None
+        self.codecs = available_codecs(codecs)
+        
+        # Liveness: one timing-wheel entry per connection, no per-connection timers
+        self.ping_interval = ping_interval
+        self.idle_timeout = idle_timeout
+        self.idle_evictions = 0
+        self.wheel = TimingWheel(tick=heartbeat_tick)
+        self._heartbeat: Optional[asyncio.Task] = None
+    
+    @property
+    def heartbeat_enabled(self) -> bool:
+        return bool(self.ping_interval or self.idle_timeout)
+    
+    def negotiate(self, offered: List[str]) -> Tuple[Optional[str], MessageCodec]:
+        """Pick the first offered subprotocol with a codec; JSON (and no subprotocol) otherwise"""
+        for subprotocol in offered:
+            codec = self.codecs.get(subprotocol)
+            if codec is not None:
+                return subprotocol, codec
+        return None, json_message_codec()
     
     def add_connection(self, connection: WebSocketConnection):
         """Add new connection"""
+        connection.stats = self.stats
         self.connections[connection.connection_id] = connection
+        if self.heartbeat_enabled and connection.connection_id not in self.wheel:
+            connection.last_seen = time.monotonic()
+            self.wheel.schedule(connection.connection_id, self._next_check(connection, connection.last_seen))
+            if self._heartbeat is None or self._heartbeat.done():
+                self._heartbeat = asyncio.ensure_future(self._run_heartbeat())
     
     def remove_connection(self, connection_id: str):
         """Remove connection"""
         if connection_id in self.connections:
             # Remove from all rooms
-            for room_connections in self.rooms.values():
-                if connection_id in room_connections:
-                    room_connections.remove(connection_id)
+            self.leave_rooms(connection_id)
             
-            del self.connections[connection_id]
+            self.wheel.cancel(connection_id)
+            self.connections.pop(connection_id).stop_writer()
     
     def join_room(self, connection_id: str, room_name: str):
         """Add connection to room"""
-        if room_name not in self.rooms:
-            self.rooms[room_name] = []
+        room = self.rooms.get(room_name)
+        if room is None:
+            room = self.rooms[room_name] = {}
+        room[connection_id] = None
         
-        if connection_id not in self.rooms[room_name]:
-            self.rooms[room_name].append(connection_id)
+        joined = self.connection_rooms.get(connection_id)
+        if joined is None:
+            joined = self.connection_rooms[connection_id] = set()
+        joined.add(room_name)
     
     def leave_room(self, connection_id: str, room_name: str):
-        """Remove connection from room"""
-        if room_name in self.rooms and connection_id in self.rooms[room_name]:
-            self.rooms[room_name].remove(connection_id)
+        """Remove connection from room; empty rooms are dropped"""
+        room = self.rooms.get(room_name)
+        if room is not None and connection_id in room:
+            del room[connection_id]
+            if not room:
+                del self.rooms[room_name]
+            joined = self.connection_rooms[connection_id]
+            joined.discard(room_name)
+            if not joined:
+                del self.connection_rooms[connection_id]
+    
+    def join_rooms(self, connection_id: str, room_names: Iterable[str]):
+        """Add connection to several rooms"""
+        for room_name in room_names:
+            self.join_room(connection_id, room_name)
+    
+    def leave_rooms(self, connection_id: str, room_names: Optional[Iterable[str]] = None):
+        """Remove connection from several rooms (all of its rooms by default)"""
+        if room_names is None:
+            room_names = self.connection_rooms.pop(connection_id, ())
+            for room_name in room_names:
+                room = self.rooms[room_name]
+                del room[connection_id]
+                if not room:
+                    del self.rooms[room_name]
+            return
+        for room_name in list(room_names):
+            self.leave_room(connection_id, room_name)
+    
+    def add_to_room(self, room_name: str, connection_ids: Iterable[str]):
+        """Add several connections to one room"""
+        for connection_id in connection_ids:
+            self.join_room(connection_id, room_name)
+    
+    def get_rooms(self, connection_id: str) -> Set[str]:
+        """Rooms a connection belongs to"""
+        return set(self.connection_rooms.get(connection_id, ()))
+    
+    def room_members(self, room_name: str) -> List[str]:
+        """Connection ids in a room, in join order"""
+        return list(self.rooms.get(room_name, ()))
     
-    async def broadcast_to_room(self, room_name: str, message: Dict[str, Any]):
-        """Broadcast message to all connections in room"""
-        if room_name not in self.rooms:
+    def room_size(self, room_name: str) -> int:
+        """Number of connections in a room"""
+        return len(self.rooms.get(room_name, ()))
+    
+    def room_sizes(self) -> Dict[str, int]:
+        """Size of every non-empty room"""
+        return {room_name: len(room) for room_name, room in self.rooms.items()}
+    
+    def set_room_overflow(self, room_name: str, overflow: str):
+        """Choose what happens when a member's send queue is full during broadcasts to room_name"""
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy '{overflow}' (choose from {', '.join(OVERFLOW_POLICIES)})")
+        self.room_overflow[room_name] = overflow
+    
+    async def broadcast_to_room(self, room_name: str, message: Dict[str, Any], key: Any = None):
+        """Broadcast message to all connections in room
+        
+        The message is encoded once and the same frame is queued for every
+        member; the call returns without waiting for any client. ``key``
+        identifies messages that supersede each other under the coalesce
+        policy and defaults to the message's ``type``. With a backplane
+        attached the frame is also published once to the other workers.
+        """
+        frame = json_message_codec().encode(message)
+        if key is None:
+            key = message.get('type')
+        if self.backplane is not None:
+            self.backplane.publish(room_name, frame, key)
+        self.deliver_local(room_name, frame, key)
+    
+    def deliver_local(self, room_name: str, frame: Frame, key: Any = None):
+        """Queue an encoded frame for this process's members of room_name
+        
+        frame is JSON text; members that negotiated another codec get it
+        re-encoded once per codec, not once per member.
+        """
+        room = self.rooms.get(room_name)
+        if not room:
             return
         
+        started = time.perf_counter()
+        overflow = self.room_overflow.get(room_name, self.overflow)
+        connections = self.connections
+        json_codec = json_message_codec()
+        encoded: Optional[Dict[str, Frame]] = None
         disconnected = []
-        
-        for connection_id in self.rooms[room_name]:
-            if connection_id in self.connections:
-                connection = self.connections[connection_id]
-                try:
-                    await connection.send_json(message)
-                except Exception:
-                    disconnected.append(connection_id)
+        for connection_id in room:
+            connection = connections.get(connection_id)
+            if connection is None:
+                continue
+            codec = connection.codec
+            if codec is json_codec:
+                connection_frame = frame
+            else:
+                if encoded is None:
+                    encoded = {"message": json_codec.decode(frame)}
+                connection_frame = encoded.get(codec.subprotocol)
+                if connection_frame is None:
+                    connection_frame = encoded[codec.subprotocol] = codec.encode(encoded["message"])
+            if not connection.enqueue(connection_frame, overflow, key) and not connection.is_connected:
+                disconnected.append(connection_id)
         
         # Clean up disconnected connections
         for connection_id in disconnected:
             self.remove_connection(connection_id)
+        
+        stats = self.stats
+        stats.broadcasts += 1
+        stats.enqueue_samples.append(time.perf_counter() - started)
+    
+    async def attach_backplane(self, backplane):
+        """Share room broadcasts with other workers through a backplane (see web.backplane)"""
+        if self.backplane is not None:
+            await self.detach_backplane()
+        await backplane.start(self.deliver_local)
+        self.backplane = backplane
+    
+    async def detach_backplane(self):
+        """Stop sharing broadcasts with other workers"""
+        backplane, self.backplane = self.backplane, None
+        if backplane is not None:
+            await backplane.stop()
+    
+    def fanout_stats(self) -> Dict[str, Any]:
+        """Broadcast counters and enqueue/delivery latency percentiles"""
+        return self.stats.snapshot()
     
     def on_message(self, message_type: str):
         """Decorator for message handlers"""
@@ -111,3 +619,71 @@ class WebSocketManager:
                 await handler(connection, message)
             else:
                 handler(connection, message)
+    
+    def _next_check(self, connection: WebSocketConnection, now: float) -> float:
+        """Seconds until the connection's next ping or idle deadline"""
+        deadlines = []
+        if self.ping_interval:
+            deadlines.append(max(connection.last_seen, connection.last_ping) + self.ping_interval)
+        if self.idle_timeout:
+            deadlines.append(connection.last_seen + self.idle_timeout)
+        return max(min(deadlines) - now, 0)
+    
+    def check_liveness(self, connection_id: str, now: float):
+        """Ping or evict a connection whose wheel entry expired"""
+        connection = self.connections.get(connection_id)
+        if connection is None:
+            return
+        if self.idle_timeout and now - connection.last_seen >= self.idle_timeout:
+            self.idle_evictions += 1
+            self.remove_connection(connection_id)
+            connection.is_connected = False
+            asyncio.ensure_future(connection.close_quietly(IDLE_CLOSE_CODE))
+            return
+        if self.ping_interval and now - max(connection.last_seen, connection.last_ping) >= self.ping_interval:
+            connection.last_ping = now
+            connection.enqueue(connection.codec.ping_frame)
+        self.wheel.schedule(connection_id, self._next_check(connection, now))
+    
+    async def _run_heartbeat(self):
+        """Advance the timing wheel in real time while connections remain"""
+        wheel = self.wheel
+        started = time.monotonic() - wheel.current * wheel.tick
+        while len(wheel):
+            await asyncio.sleep(wheel.tick)
+            now = time.monotonic()
+            # Catch up on ticks missed while the loop was busy
+            while wheel.current < (now - started) / wheel.tick:
+                for connection_id in wheel.advance():
+                    self.check_liveness(connection_id, now)
+    
+    def stop_heartbeat(self):
+        """Cancel the heartbeat task (it restarts with the next connection)"""
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            self._heartbeat = None
+    
+    async def serve(self, connection: WebSocketConnection):
+        """Register connection and dispatch its messages until it disconnects
+        
+        Frames are decoded with the connection's codec; ones that don't
+        decode to an object are skipped. The connection is
+        removed from the manager (and every room) however the loop ends.
+        """
+        self.add_connection(connection)
+        codec = connection.codec
+        try:
+            while connection.is_connected:
+                data = await connection.receive()
+                try:
+                    message = codec.decode(data)
+                except codec.decode_errors:
+                    logger.debug("Ignoring undecodable WebSocket frame from %s", connection.connection_id)
+                    continue
+                if isinstance(message, dict):
+                    await self.handle_message(connection, message)
+        except WebSocketDisconnect:
+            pass
+        finally:
+            connection.is_connected = False
+            self.remove_connection(connection.connection_id)